@@ -0,0 +1,208 @@
+# ============================================================================
+# EXECUTOR POOL - Prebuilt AgentExecutors, one per Groq key
+# Path: backend/agents/executor_pool.py
+# ============================================================================
+
+from typing import Callable, Dict, List, Optional
+import os
+
+from langchain_groq import ChatGroq
+from langchain.agents import AgentExecutor
+from langchain_core.callbacks import AsyncCallbackHandler
+
+from agents.token_accounting import estimate_prompt_tokens, tool_schema_tokens
+from utils.api_key_rotator import APIKeyScheduler, KeyLease
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Groq 429 (raised as groq.RateLimitError)"""
+    return getattr(error, "status_code", None) == 429 or "rate_limit" in str(error).lower()
+
+class ToolActivity(AsyncCallbackHandler):
+    """Counts tool calls of a run - once a tool has run, the run must not be repeated"""
+    
+    def __init__(self):
+        self.tools_started = 0
+    
+    async def on_tool_start(self, serialized: Dict, input_str: str, **kwargs) -> None:
+        self.tools_started += 1
+
+class LeaseAccounting(AsyncCallbackHandler):
+    """Debits every LLM call of a run from the leased key's rate-limit buckets"""
+    
+    def __init__(self, key_lease: KeyLease, default_tool_tokens: int = 0):
+        self.key_lease = key_lease
+        self.default_tool_tokens = default_tool_tokens
+    
+    async def on_chat_model_start(self, serialized: Dict, messages: List[List], **kwargs) -> None:
+        tools = (kwargs.get("invocation_params") or {}).get("tools")
+        tool_tokens = tool_schema_tokens(tools) if tools else self.default_tool_tokens
+        for prompt in messages:
+            self.key_lease.report_call(estimate_prompt_tokens(prompt, tool_tokens))
+
+def with_callbacks(config: Optional[Dict], *handlers) -> Dict:
+    """Copy of a run config with extra callback handlers added"""
+    config = dict(config or {})
+    config["callbacks"] = [*(config.get("callbacks") or []), *handlers]
+    return config
+
+class ExecutorLease:
+    """
+    An executor checked out for one request - release() (or `with`) when done
+    """
+    
+    def __init__(self, executor: AgentExecutor, label: str, key_lease: Optional[KeyLease] = None):
+        self.executor = executor
+        self.label = label
+        self.key = key_lease.key if key_lease is not None else None
+        self._key_lease = key_lease
+        
+        # Pass with the run's config so each LLM call is charged to the key
+        self.callbacks = [LeaseAccounting(key_lease)] if key_lease is not None else []
+    
+    def release(self):
+        if self._key_lease is not None:
+            self._key_lease.release()
+    
+    def __enter__(self) -> "ExecutorLease":
+        return self
+    
+    def __exit__(self, *exc):
+        self.release()
+
+class ExecutorPool:
+    """
+    Every executor is built once at startup and never replaced, so
+    concurrent requests can share them safely. The key scheduler decides
+    which executor a request leases; a run rate-limited before any tool
+    was called fails over to the next healthy key, or - with no other key
+    left - waits out the key's cooldown and runs again on it (tools have
+    side effects - saved applications, sanction letters - and must not run
+    twice). Timeouts, 5xx and connection errors are retried per LLM call
+    by the SDK.
+    """
+    
+    def __init__(
+        self,
+        build_executor: Callable[[ChatGroq], AgentExecutor],
+        scheduler: Optional[APIKeyScheduler],
+        model: str = "llama-3.3-70b-versatile",
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        max_retries: int = 2,
+        rate_limit_retries: int = 2
+    ):
+        self.scheduler = scheduler
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.max_retries = max_retries
+        self.rate_limit_retries = rate_limit_retries
+        
+        self._executors: Dict[str, AgentExecutor] = {}
+        self._labels: Dict[str, str] = {}
+        
+        if scheduler is None:
+            # Single key, no rate-limit tracking - SDK retries stay on
+            api_key = os.getenv("GROQ_API_KEY")
+            self._executors[api_key] = build_executor(self._create_llm(api_key))
+            self._labels[api_key] = "default"
+        else:
+            for i, api_key in enumerate(scheduler.get_all_keys()):
+                self._executors[api_key] = build_executor(self._create_llm(api_key))
+                self._labels[api_key] = f"key_{i + 1}"
+        
+        self.runs = 0
+        self.failovers = 0
+        self.rate_limit_retries_used = 0
+        self.unsafe_failovers_skipped = 0
+        self.leases: Dict[str, int] = {label: 0 for label in self._labels.values()}
+    
+    def _create_llm(self, api_key: str) -> ChatGroq:
+        """
+        Groq chat model for one key - SDK retries stay on for transient
+        errors; with a scheduler, responses feed its rate-limit tracking and
+        its HTTP client keeps the SDK from retrying 429s (handled in ainvoke)
+        """
+        if self.scheduler is None:
+            return ChatGroq(
+                model=self.model,
+                temperature=self.temperature,
+                api_key=api_key,
+                max_tokens=self.max_tokens,
+                max_retries=self.max_retries
+            )
+        
+        return ChatGroq(
+            model=self.model,
+            temperature=self.temperature,
+            api_key=api_key,
+            max_tokens=self.max_tokens,
+            max_retries=self.max_retries,
+            http_async_client=self.scheduler.http_async_client(api_key)
+        )
+    
+    def __len__(self) -> int:
+        return len(self._executors)
+    
+    @property
+    def default_executor(self) -> AgentExecutor:
+        return next(iter(self._executors.values()))
+    
+    async def lease(self, estimated_tokens: float = 0, exclude: Optional[List[str]] = None) -> ExecutorLease:
+        """Executor of the least-loaded healthy key"""
+        if self.scheduler is None:
+            executor = self.default_executor
+            self.leases["default"] += 1
+            return ExecutorLease(executor, "default")
+        
+        key_lease = await self.scheduler.acquire(estimated_tokens, exclude=exclude)
+        self.leases[key_lease.label] += 1
+        return ExecutorLease(self._executors[key_lease.key], key_lease.label, key_lease)
+    
+    async def ainvoke(self, inputs: Dict, estimated_tokens: float = 0, config: Optional[Dict] = None) -> Dict:
+        """
+        Run inputs on a leased executor; on a rate limit before the first
+        tool call, retry on the next healthy key until every key has been
+        tried, then up to rate_limit_retries more times once a key's
+        cooldown is over (the scheduler waits for it)
+        """
+        self.runs += 1
+        attempts = len(self) + (self.rate_limit_retries if self.scheduler is not None else 0)
+        tried: List[str] = []
+        
+        for attempt in range(attempts):
+            activity = ToolActivity()
+            with await self.lease(estimated_tokens, exclude=tried) as lease:
+                try:
+                    return await lease.executor.ainvoke(inputs, config=with_callbacks(config, activity, *lease.callbacks))
+                except Exception as e:
+                    if not is_rate_limit_error(e) or attempt == attempts - 1:
+                        raise
+                    if activity.tools_started:
+                        self.unsafe_failovers_skipped += 1
+                        print(f"⚠️  Groq {lease.label} rate limited after {activity.tools_started} tool call(s) - not re-running the turn")
+                        raise
+                    if not self.scheduler.is_cooling_down(lease.key):
+                        # 429 seen without rate-limit headers - cool down anyway
+                        self.scheduler.report_rate_limited(lease.key)
+                    
+                    tried.append(lease.key)
+                    if len(tried) < len(self):
+                        self.failovers += 1
+                        print(f"🔄 Groq {lease.label} rate limited, failing over to another key...")
+                    else:
+                        # No other key left - wait for the first cooldown to end
+                        tried = []
+                        self.rate_limit_retries_used += 1
+                        print(f"⏳ Groq {lease.label} rate limited, retrying once a key has cooled down...")
+    
+    def get_stats(self) -> Dict:
+        return {
+            "model": self.model,
+            "executors": len(self),
+            "runs": self.runs,
+            "failovers": self.failovers,
+            "rate_limit_retries": self.rate_limit_retries_used,
+            "unsafe_failovers_skipped": self.unsafe_failovers_skipped,
+            "leases": dict(self.leases)
+        }
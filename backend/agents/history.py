@@ -0,0 +1,357 @@
+# ============================================================================
+# CONVERSATION HISTORY - Token-budgeted window + rolling summary
+# Path: backend/agents/history.py
+# ============================================================================
+
+from typing import Deque, Dict, List, Optional, Tuple
+from collections import OrderedDict, deque
+import os
+import re
+from dotenv import load_dotenv
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from agents.intent_router import AMOUNT_UNITS, format_inr
+from utils.session_manager import session_manager
+from utils.tokens import estimate_tokens
+
+load_dotenv()
+
+# ============================================================================
+# PINNED FACTS
+# ============================================================================
+
+AMOUNT = r"(?:₹|rs\.?|inr)?\s*(\d[\d,]*(?:\.\d+)?)\s*(lakhs?|lacs?|l|k|thousand|crores?|cr)?\b"
+
+FACT_PATTERNS = {
+    "pan": re.compile(r"\b([A-Z]{5}\d{4}[A-Z])\b|\bpan\b(?:\s+(?:no\.?|number))?\s*(?:is|:|-)?\s*([A-Za-z0-9]{8,12})\b", re.IGNORECASE),
+    "monthly_income": re.compile(r"(?:income|salary|earn\w*|take[- ]home)[^\d₹]{0,25}" + AMOUNT, re.IGNORECASE),
+    "existing_emi": re.compile(
+        r"(?:existing|current|ongoing|other)\s+(?:(?:home|car|personal|loans?)\s+)*emis?[^\d₹]{0,20}" + AMOUNT,
+        re.IGNORECASE
+    ),
+    # Not an EMI mention ("loan EMI of 10000", "loan of 10000 EMI")
+    "loan_amount": re.compile(
+        r"(?:loan|need|want|borrow|amount|looking for)(?:(?!emi)[^\d₹]){0,25}" + AMOUNT + r"(?!\s*(?:/-\s*)?(?:per\s+month\s+)?emi)",
+        re.IGNORECASE
+    ),
+    "tenure_months": re.compile(
+        r"(?:^\s*|\b(?:for|tenure|over|repay\w*|period|term)\D{0,15})(\d+(?:\.\d+)?)\s*(months?|mos?|years?|yrs?)\b",
+        re.IGNORECASE
+    ),
+    "employment_type": re.compile(r"\b(salaried|self[- ]employed|business\s*owner|freelancer)\b", re.IGNORECASE),
+}
+
+NO_EMI_PATTERN = re.compile(r"\bno\s+(?:existing\s+|current\s+|other\s+)?(?:emis?|loans?)\b", re.IGNORECASE)
+
+FACT_LABELS = {
+    "pan": "PAN",
+    "full_name": "Name",
+    "employment_type": "Employment",
+    "monthly_income": "Monthly income",
+    "existing_emi": "Existing EMI",
+    "loan_amount": "Requested loan amount",
+    "tenure_months": "Requested tenure",
+    "credit_score": "Credit score",
+}
+
+def _amount(digits: str, unit: Optional[str]) -> float:
+    value = float(digits.replace(",", ""))
+    if unit:
+        value *= AMOUNT_UNITS[unit.lower()]
+    return value
+
+def extract_facts(text: str) -> Dict:
+    """
+    Structured loan details mentioned in a customer message
+    (latest mention wins when merged into the session)
+    """
+    facts = {}
+    
+    match = FACT_PATTERNS["pan"].search(text)
+    if match:
+        token = match.group(1) or match.group(2)
+        if re.search(r"\d", token) and re.search(r"[A-Za-z]", token):
+            facts["pan"] = token.upper()
+    
+    emi_spans = [match.span() for match in FACT_PATTERNS["existing_emi"].finditer(text)]
+    for name in ("monthly_income", "existing_emi", "loan_amount"):
+        for match in FACT_PATTERNS[name].finditer(text):
+            # An amount that is an existing EMI is never the requested loan
+            if name == "loan_amount" and any(start < match.end() and match.start() < end for start, end in emi_spans):
+                continue
+            value = _amount(match.group(1), match.group(2))
+            if value >= 1000:
+                facts[name] = value
+            break
+    
+    if "existing_emi" not in facts and NO_EMI_PATTERN.search(text):
+        facts["existing_emi"] = 0.0
+    
+    match = FACT_PATTERNS["tenure_months"].search(text)
+    if match:
+        months = float(match.group(1)) * (12 if match.group(2).lower().startswith("y") else 1)
+        if 1 <= months <= 480:
+            facts["tenure_months"] = int(months)
+    
+    match = FACT_PATTERNS["employment_type"].search(text)
+    if match:
+        employment = re.sub(r"[\s-]+", " ", match.group(1)).title()
+        facts["employment_type"] = employment.replace("Self Employed", "Self-Employed")
+    
+    return facts
+
+def format_facts(customer_data: Dict) -> str:
+    lines = []
+    for key, label in FACT_LABELS.items():
+        value = customer_data.get(key)
+        if value is None or value == "":
+            continue
+        if key in ("monthly_income", "existing_emi", "loan_amount"):
+            value = format_inr(value)
+        elif key == "tenure_months":
+            value = f"{value} months"
+        lines.append(f"- {label}: {value}")
+    return "\n".join(lines)
+
+# ============================================================================
+# SUMMARY
+# ============================================================================
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+def summarize_message(role: str, content: str, max_words: int = 30) -> str:
+    """One extractive line per message - its first sentence, clipped"""
+    text = re.sub(r"\s+", " ", content).strip()
+    first = SENTENCE_END.split(text, 1)[0]
+    words = first.split(" ")
+    if len(words) > max_words:
+        first = " ".join(words[:max_words]) + "…"
+    speaker = "Customer" if role == "user" else "Assistant"
+    return f"- {speaker}: {first}"
+
+# ============================================================================
+# HISTORY MANAGER
+# ============================================================================
+
+# Rough overheads of a cached window and of one converted message (tuple + LangChain message)
+WINDOW_OVERHEAD_BYTES = 300
+WINDOW_ITEM_OVERHEAD_BYTES = 700
+
+class _SessionWindow:
+    """
+    Converted verbatim window of one session - (role, content, LangChain
+    message or None, tokens) for session messages covered..covered+len-1
+    """
+    
+    __slots__ = ("covered", "items", "tokens", "summary", "bytes")
+    
+    def __init__(self, covered: int, summary: str):
+        self.covered = covered
+        self.items: Deque[Tuple[str, str, Optional[BaseMessage], int]] = deque()
+        self.tokens = 0
+        self.summary = summary
+        self.bytes = 0  # as last reported to the session store
+    
+    def size(self) -> int:
+        """Approximate memory held by the window"""
+        return WINDOW_OVERHEAD_BYTES + len(self.summary.encode("utf-8")) + sum(
+            WINDOW_ITEM_OVERHEAD_BYTES + len(content.encode("utf-8")) for _, content, _, _ in self.items
+        )
+    
+    @property
+    def seen(self) -> int:
+        """Session messages converted so far"""
+        return self.covered + len(self.items)
+
+def _to_langchain(role: str, content: str) -> Optional[BaseMessage]:
+    if role == "user":
+        return HumanMessage(content=content)
+    if role == "assistant":
+        return AIMessage(content=content)
+    return None
+
+class HistoryManager:
+    """
+    Builds chat_history for a turn within a token budget:
+    - the last `keep_turns` exchanges verbatim (fewer if they exceed the budget)
+    - older messages folded into a rolling extractive summary kept on the session
+    - pinned customer facts (PAN, income, amount, tenure, ...) from session data
+    
+    Converted LangChain messages are cached per session (bounded LRU), so a
+    turn only fetches and converts the messages added since the last one.
+    A window is dropped when the session store removes its session, and
+    its size counts toward the store's memory cap
+    """
+    
+    def __init__(
+        self,
+        token_budget: int = 1500,
+        keep_turns: int = 4,
+        summary_tokens: int = 400,
+        max_cached_sessions: int = 10000
+    ):
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.summary_tokens = summary_tokens
+        self.max_cached_sessions = max_cached_sessions
+        
+        self._windows: "OrderedDict[str, _SessionWindow]" = OrderedDict()
+        self._window_bytes = 0
+        
+        self.turns_built = 0
+        self.total_history_tokens = 0
+        self.max_history_tokens = 0
+        self.messages_folded = 0
+        self.messages_converted = 0
+        self.window_hits = 0
+        self.window_rebuilds = 0
+    
+    async def observe_user_message(self, session_id: str, message: str):
+        """Pin any structured facts in a customer message"""
+        facts = extract_facts(message)
+        if facts:
+            await session_manager.update_customer_data(session_id, facts)
+    
+    def _fold(self, summary: str, messages: List[Tuple[str, str]]) -> str:
+        """Append newly evicted (role, content) messages and trim the oldest summary lines to budget"""
+        lines = [line for line in summary.split("\n") if line]
+        lines.extend(summarize_message(role, content) for role, content in messages)
+        
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_tokens:
+            lines.pop(0)
+        
+        return "\n".join(lines)
+    
+    def _window(self, session_id: str, summary: Dict) -> _SessionWindow:
+        """
+        Cached window for the session - rebuilt from the stored summary
+        position when missing or when another worker has moved it on
+        """
+        window = self._windows.get(session_id)
+        if window is not None and window.covered == summary["covered"]:
+            self._windows.move_to_end(session_id)
+            self.window_hits += 1
+            return window
+        
+        if window is not None:
+            self._discard(session_id)
+        
+        window = _SessionWindow(summary["covered"], summary["text"])
+        self._windows[session_id] = window
+        while len(self._windows) > self.max_cached_sessions:
+            self._discard(next(iter(self._windows)))
+        self.window_rebuilds += 1
+        return window
+    
+    def _resize(self, session_id: str, window: _SessionWindow):
+        """Report the window's size change to the session store"""
+        size = window.size()
+        delta, window.bytes = size - window.bytes, size
+        if self._windows.get(session_id) is window:
+            self._window_bytes += delta
+            session_manager.track_cache_bytes(session_id, delta)
+    
+    def _discard(self, session_id: str):
+        """Drop a cached window and release its bytes in the session store"""
+        window = self._windows.pop(session_id)
+        self._window_bytes -= window.bytes
+        session_manager.track_cache_bytes(session_id, -window.bytes)
+    
+    def forget(self, session_id: str):
+        """Session store removed the session - drop its window (store already forgot the bytes)"""
+        window = self._windows.pop(session_id, None)
+        if window is not None:
+            self._window_bytes -= window.bytes
+    
+    def _append(self, window: _SessionWindow, messages: List[Dict]) -> List[Tuple[str, str]]:
+        """
+        Convert new messages onto the window, evicting the oldest beyond
+        `keep_turns` exchanges or the token budget - returns evicted (role, content)
+        """
+        available = self.token_budget - self.summary_tokens
+        max_items = 2 * self.keep_turns
+        evicted = []
+        
+        for msg in messages:
+            role, content = msg.get("role", ""), msg.get("content", "")
+            tokens = estimate_tokens(content)
+            window.items.append((role, content, _to_langchain(role, content), tokens))
+            window.tokens += tokens
+            self.messages_converted += 1
+            
+            while len(window.items) > 1 and (len(window.items) > max_items or window.tokens > available):
+                old_role, old_content, _, old_tokens = window.items.popleft()
+                window.tokens -= old_tokens
+                window.covered += 1
+                evicted.append((old_role, old_content))
+        
+        return evicted
+    
+    async def build(self, session_id: str) -> List[BaseMessage]:
+        """
+        LangChain chat_history for the session's messages so far (call
+        before recording the current user message)
+        """
+        summary = await session_manager.get_history_summary(session_id)
+        window = self._window(session_id, summary)
+        
+        new_messages = await session_manager.get_messages(session_id, start=window.seen)
+        evicted = self._append(window, new_messages)
+        
+        if evicted:
+            window.summary = self._fold(window.summary, evicted)
+            await session_manager.set_history_summary(session_id, window.summary, window.covered)
+            self.messages_folded += len(evicted)
+        
+        self._resize(session_id, window)
+        
+        chat_history: List[BaseMessage] = []
+        tokens = window.tokens
+        
+        if window.covered > 0:
+            parts = []
+            facts = format_facts(await session_manager.get_customer_data(session_id))
+            if facts:
+                parts.append(f"Known customer details (keep using these, do not ask again):\n{facts}")
+            if window.summary:
+                parts.append(f"Summary of the earlier conversation:\n{window.summary}")
+            if parts:
+                context = "\n\n".join(parts)
+                chat_history.append(SystemMessage(content=context))
+                tokens += estimate_tokens(context)
+        
+        chat_history.extend(message for _, _, message, _ in window.items if message is not None)
+        
+        self.turns_built += 1
+        self.total_history_tokens += tokens
+        self.max_history_tokens = max(self.max_history_tokens, tokens)
+        
+        return chat_history
+    
+    def get_stats(self) -> Dict:
+        return {
+            "token_budget": self.token_budget,
+            "keep_turns": self.keep_turns,
+            "summary_tokens": self.summary_tokens,
+            "turns_built": self.turns_built,
+            "avg_history_tokens": round(self.total_history_tokens / self.turns_built, 1) if self.turns_built else 0.0,
+            "max_history_tokens": self.max_history_tokens,
+            "messages_folded": self.messages_folded,
+            "messages_converted": self.messages_converted,
+            "cached_windows": len(self._windows),
+            "window_bytes": self._window_bytes,
+            "window_hits": self.window_hits,
+            "window_rebuilds": self.window_rebuilds
+        }
+
+# Global history manager instance
+history_manager = HistoryManager(
+    token_budget=int(os.getenv("HISTORY_TOKEN_BUDGET", 1500)),
+    keep_turns=int(os.getenv("HISTORY_KEEP_TURNS", 4)),
+    summary_tokens=int(os.getenv("HISTORY_SUMMARY_TOKENS", 400)),
+    max_cached_sessions=int(os.getenv("HISTORY_CACHE_SESSIONS", 10000))
+)
+
+# Windows go away with their sessions (cleared, expired or evicted)
+session_manager.add_eviction_listener(history_manager.forget)
@@ -0,0 +1,307 @@
+# ============================================================================
+# INTENT ROUTER - Deterministic fast path for structured requests
+# Path: backend/agents/intent_router.py
+# ============================================================================
+
+from typing import Dict, Optional
+import asyncio
+import json
+import os
+import re
+from dotenv import load_dotenv
+
+from utils.policy_engine import policy_engine
+
+load_dotenv()
+
+# ============================================================================
+# PATTERNS
+# ============================================================================
+
+EMI_CUE = re.compile(r"\bemi\b|\bmonthly\s+(?:installment|instalment|payment)", re.IGNORECASE)
+
+# Anything beyond a plain EMI calculation goes to the agent
+EMI_BLOCKERS = re.compile(
+    r"eligib|approv|apply|sanction|afford|income|salary|\bpan\b|compare|\bor\b|\bvs\.?\b|versus",
+    re.IGNORECASE
+)
+
+RATE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(?:%|percent\b|pc\b)", re.IGNORECASE)
+TENURE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(months?|mos?|mths?|years?|yrs?)\b", re.IGNORECASE)
+AMOUNT_PATTERN = re.compile(
+    r"(₹|rs\.?|inr)?\s*(\d[\d,]*(?:\.\d+)?)\s*(lakhs?|lacs?|l|k|thousand|crores?|cr)?\b",
+    re.IGNORECASE
+)
+
+AMOUNT_UNITS = {
+    "l": 100000, "lakh": 100000, "lakhs": 100000, "lac": 100000, "lacs": 100000,
+    "k": 1000, "thousand": 1000,
+    "cr": 10000000, "crore": 10000000, "crores": 10000000
+}
+
+# "ABCDE1234F", "my pan is ABCDE1234F", "PAN: ABCDE1234F" - PAN format only,
+# so short replies like "36months" never trigger bureau lookups
+BARE_PAN_PATTERN = re.compile(
+    r"^(?:(?:my\s+)?pan(?:\s+(?:no\.?|number))?\s*(?:is|:|-)?\s*)?([a-z]{5}[0-9]{4}[a-z])\s*[.!]?$",
+    re.IGNORECASE
+)
+
+CLEAR_PATTERN = re.compile(
+    r"^(?:please\s+)?(?:clear|reset|restart|end)\s+(?:my\s+|the\s+|this\s+)?(?:session|chat|conversation)"
+    r"(?:\s+please)?\s*[.!]?$|^start\s+over\s*[.!]?$",
+    re.IGNORECASE
+)
+
+CLEAR_RESPONSE = "Your session has been cleared. How can I help you today?"
+
+# Details the PAN reply asks for - once any is known the agent takes over
+PAN_FOLLOW_UP_FACTS = ("loan_amount", "tenure_months", "employment_type", "monthly_income")
+
+# ============================================================================
+# PARSING
+# ============================================================================
+
+def parse_emi_request(message: str) -> Optional[Dict]:
+    """
+    Amount, rate and tenure from an EMI question - None unless each
+    appears exactly once (anything else is left to the agent)
+    """
+    if not EMI_CUE.search(message) or EMI_BLOCKERS.search(message):
+        return None
+    
+    rates = RATE_PATTERN.findall(message)
+    tenures = TENURE_PATTERN.findall(message)
+    if len(rates) != 1 or len(tenures) != 1:
+        return None
+    
+    # Amount is whatever number is left once rate and tenure are removed
+    remainder = TENURE_PATTERN.sub(" ", RATE_PATTERN.sub(" ", message))
+    amounts = []
+    for currency, digits, unit in AMOUNT_PATTERN.findall(remainder):
+        value = float(digits.replace(",", ""))
+        if unit:
+            value *= AMOUNT_UNITS[unit.lower()]
+        elif not currency and value < 1000:
+            continue
+        amounts.append(value)
+    
+    if len(amounts) != 1:
+        return None
+    
+    rate = float(rates[0])
+    tenure_value, tenure_unit = tenures[0]
+    tenure = float(tenure_value) * (12 if tenure_unit.lower().startswith("y") else 1)
+    
+    if not (0 < rate <= 50) or not (1 <= tenure <= 480) or tenure != int(tenure) or amounts[0] <= 0:
+        return None
+    
+    return {"loan_amount": amounts[0], "interest_rate": rate, "tenure": int(tenure)}
+
+def parse_bare_pan(message: str) -> Optional[str]:
+    """PAN when it is the whole message"""
+    match = BARE_PAN_PATTERN.match(message.strip())
+    return match.group(1).upper() if match else None
+
+def format_inr(amount: float) -> str:
+    """Indian digit grouping: 500000 -> ₹5,00,000"""
+    rupees = int(round(amount))
+    digits = str(rupees)
+    if len(digits) > 3:
+        head, tail = digits[:-3], digits[-3:]
+        groups = []
+        while len(head) > 2:
+            groups.insert(0, head[-2:])
+            head = head[:-2]
+        if head:
+            groups.insert(0, head)
+        digits = ",".join(groups + [tail])
+    return f"₹{digits}"
+
+# ============================================================================
+# ROUTER
+# ============================================================================
+
+class IntentRouter:
+    """
+    Rule-based classifier for turns that need no reasoning
+    classify() is a cheap regex pass; route() calls the tools directly
+    and returns a templated reply, or None to fall through to the agent
+    """
+    
+    def __init__(self):
+        self.routed: Dict[str, int] = {"emi_calculation": 0, "pan_submission": 0, "clear_session": 0}
+        self.fallthrough = 0
+    
+    def classify(self, message: str) -> Optional[Dict]:
+        """Returns {"intent": str, ...params} or None"""
+        message = message.strip()
+        
+        if CLEAR_PATTERN.match(message):
+            return {"intent": "clear_session"}
+        
+        pan = parse_bare_pan(message)
+        if pan:
+            return {"intent": "pan_submission", "pan": pan}
+        
+        emi = parse_emi_request(message)
+        if emi:
+            return {"intent": "emi_calculation", **emi}
+        
+        return None
+    
+    async def route(self, message: str, session_id: str) -> Optional[Dict]:
+        """
+        Answer message without the LLM if possible
+        Returns {"intent", "response", "tools_used"[, "reset_session"]} or None
+        """
+        intent = self.classify(message)
+        result = None
+        
+        if intent is None:
+            pass
+        elif intent["intent"] == "clear_session":
+            result = {"response": CLEAR_RESPONSE, "tools_used": [], "reset_session": True}
+        elif intent["intent"] == "emi_calculation":
+            result = self._handle_emi(intent)
+        elif intent["intent"] == "pan_submission":
+            result = await self._handle_pan(intent["pan"], session_id)
+        
+        if result is None:
+            self.fallthrough += 1
+            return None
+        
+        self.routed[intent["intent"]] += 1
+        return {"intent": intent["intent"], **result}
+    
+    def _handle_emi(self, params: Dict) -> Optional[Dict]:
+        from tools.loan_tools import calculate_emi_tool
+        
+        args = {k: params[k] for k in ("loan_amount", "interest_rate", "tenure")}
+        data = json.loads(calculate_emi_tool.invoke(args))
+        if "error" in data:
+            return None
+        
+        rate = f"{data['interest_rate']:g}"
+        response = (
+            f"For a loan of {format_inr(data['loan_amount'])} at {rate}% per annum over "
+            f"{data['tenure']} months:\n\n"
+            f"- Monthly EMI: {format_inr(data['monthly_emi'])}\n"
+            f"- Total interest: {format_inr(data['total_interest'])}\n"
+            f"- Total payment: {format_inr(data['total_payment'])}\n\n"
+            f"Your actual rate depends on your credit profile. Would you like to check your eligibility?"
+        )
+        
+        return {"response": response, "tools_used": ["calculate_emi_tool"]}
+    
+    async def _is_opening_turn(self, session_id: str) -> bool:
+        """
+        No earlier turns and no pinned loan details - the templated PAN reply
+        (which asks for amount, tenure, employment and income) fits
+        """
+        from utils.session_manager import session_manager
+        
+        customer_data = await session_manager.get_customer_data(session_id)
+        if any(customer_data.get(key) is not None for key in PAN_FOLLOW_UP_FACTS):
+            return False
+        
+        # The current message is already recorded - any reply means a prior turn
+        messages = await session_manager.get_messages(session_id)
+        return not any(message["role"] == "assistant" for message in messages)
+    
+    async def _handle_pan(self, pan: str, session_id: str) -> Optional[Dict]:
+        from tools.loan_tools import (
+            verify_kyc_tool,
+            check_credit_score_tool,
+            check_existing_customer_tool
+        )
+        from utils.session_manager import session_manager
+        
+        # Mid-conversation the agent knows what is still missing
+        if not await self._is_opening_turn(session_id):
+            return None
+        
+        tools_used = ["check_existing_customer_tool", "verify_kyc_tool", "check_credit_score_tool"]
+        
+        # Independent lookups - run concurrently
+        existing, kyc, credit = [
+            json.loads(raw) for raw in await asyncio.gather(
+                check_existing_customer_tool.ainvoke({"pan": pan}),
+                verify_kyc_tool.ainvoke({"pan": pan}),
+                check_credit_score_tool.ainvoke({"pan": pan})
+            )
+        ]
+        
+        if not kyc.get("verified"):
+            if kyc.get("kyc_status"):
+                response = (
+                    f"I'm sorry, but the KYC for PAN {pan} is not complete (status: {kyc['kyc_status']}). "
+                    f"You'll need to complete KYC verification before you can apply for a loan. "
+                    f"Is there anything else I can help you with?"
+                )
+                return {"response": response, "tools_used": tools_used[:2]}
+            
+            if "not found" in kyc.get("error", ""):
+                response = (
+                    f"I couldn't find PAN {pan} in our records. "
+                    f"Could you please double-check the PAN number and share it again?"
+                )
+                return {"response": response, "tools_used": tools_used[:2]}
+            
+            return None
+        
+        if not credit.get("success"):
+            return None
+        
+        customer = kyc["data"]
+        score = credit["data"]["score"]
+        first_name = (customer.get("full_name") or "").split(" ")[0] or "there"
+        
+        await session_manager.update_customer_data(session_id, {
+            "pan": pan,
+            "full_name": customer.get("full_name"),
+            "age": customer.get("age"),
+            "phone": customer.get("phone"),
+            "credit_score": score,
+            "existing_customer": existing.get("exists", False),
+            "customer_id": (existing.get("data") or {}).get("customer_id")
+        })
+        
+        greeting = f"Welcome back, {first_name}!" if existing.get("exists") else f"Thank you, {first_name}!"
+        
+        min_credit_score = policy_engine.policy.min_credit_score
+        
+        if score < min_credit_score:
+            response = (
+                f"{greeting} Your KYC is verified, but your credit score is {score}, "
+                f"which is below our minimum requirement of {min_credit_score}. "
+                f"Unfortunately, we can't offer a personal loan at this time. "
+                f"Paying existing EMIs on time and reducing outstanding debt will help improve your score."
+            )
+        else:
+            response = (
+                f"{greeting} Your KYC is verified ✅ and your credit score is {score} "
+                f"({credit['data']['score_category']}).\n\n"
+                f"To help you with a loan, I need to know:\n"
+                f"1) How much loan amount do you need?\n"
+                f"2) For how many months?\n"
+                f"3) Are you salaried or self-employed?\n"
+                f"4) What's your monthly income?"
+            )
+        
+        return {"response": response, "tools_used": tools_used}
+    
+    def get_stats(self) -> Dict:
+        routed = sum(self.routed.values())
+        total = routed + self.fallthrough
+        return {
+            "routed": dict(self.routed),
+            "total_routed": routed,
+            "fallthrough": self.fallthrough,
+            "llm_calls_skipped": routed,
+            "route_rate": round(routed / total, 4) if total else 0.0
+        }
+
+# Global router instance (INTENT_ROUTER=off disables it)
+intent_router: Optional[IntentRouter] = None
+if os.getenv("INTENT_ROUTER", "on").lower() != "off":
+    intent_router = IntentRouter()
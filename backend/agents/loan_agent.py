@@ -3,21 +3,31 @@
 # Path: backend/agents/loan_agent.py
 # ============================================================================
 
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
+import asyncio
 import uuid
 import os
 from dotenv import load_dotenv
 
-from langchain_groq import ChatGroq
 from langchain.agents import AgentExecutor, create_tool_calling_agent
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import HumanMessage, AIMessage
 
 from tools.loan_tools import get_all_tools
-from database.supabase_client import get_supabase_client
+from database.repository import get_repository
+from utils.tokens import estimate_tokens
+from database.write_behind import persistence_queue
+from agents.response_cache import response_cache, is_cacheable_question, SESSION_INDEPENDENT_TOOLS
+from agents.intent_router import intent_router
+from agents.executor_pool import ExecutorPool, with_callbacks
+from agents.history import history_manager
+from agents.prefetch import lookup_prefetcher
+from agents.token_accounting import TurnTokenUsage, token_profiler, tool_schema_tokens
 
 load_dotenv()
 
+# Stored as the answer of a streamed turn the client disconnected from
+INTERRUPTED_MARKER = "[Response interrupted - the connection closed before the answer was complete]"
+
 # ============================================================================
 # SYSTEM PROMPT WITH KNOWLEDGE BASE
 # ============================================================================
@@ -43,11 +53,11 @@ def create_system_prompt() -> str:
    - Loan amount they want
    - Tenure (how many months)
    - Purpose of loan (optional but nice to know)
-   
+
 2. **NEVER use data from existing customer records for new applications**
    - Even if check_existing_customer_tool returns data, ASK for current requirements
    - Previous loan amount ≠ current loan amount
-   
+
 3. **ALWAYS collect fresh information** for each application:
    - Employment type (Salaried/Self-Employed/Business Owner)
    - Monthly income
@@ -213,26 +223,16 @@ class LoanAgent:
     def __init__(self):
         self.name = "QuickLoan AI Assistant"
         
-        # Initialize LLM with key rotation
+        # Key scheduler picks a Groq key per request
         from utils.api_key_rotator import groq_key_rotator
         
-        if groq_key_rotator:
-            api_key = groq_key_rotator.get_key()
-            print(f"✅ Using Groq with {groq_key_rotator.get_count()} key(s) in rotation")
+        self.key_scheduler = groq_key_rotator
+        
+        if self.key_scheduler:
+            print(f"✅ Using Groq with {self.key_scheduler.get_count()} key(s) in rate-limit-aware rotation")
         else:
-            api_key = os.getenv("GROQ_API_KEY")
             print("⚠️  Using single Groq key (no rotation)")
         
-        self.llm = ChatGroq(
-            model="llama-3.3-70b-versatile",
-            temperature=0.7,
-            api_key=api_key,
-            max_tokens=2000
-        )
-        
-        # Store key rotator for re-initialization on errors
-        self.key_rotator = groq_key_rotator
-        
         # Get all tools
         self.tools = get_all_tools()
         
@@ -244,37 +244,205 @@ class LoanAgent:
             MessagesPlaceholder(variable_name="agent_scratchpad")
         ])
         
-        # Create agent
+        # Prebuilt agent + executor per key - leased per request, never rebuilt
+        self.executor_pool = ExecutorPool(
+            self._build_executor,
+            self.key_scheduler,
+            model=os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile"),
+            max_retries=int(os.getenv("GROQ_MAX_RETRIES", 2)),
+            rate_limit_retries=int(os.getenv("GROQ_RATE_LIMIT_RETRIES", 2))
+        )
+        
+        # Prompt + tool schemas are sent on every LLM call
+        self._tool_schema_tokens = tool_schema_tokens(self.tools)
+        self._base_prompt_tokens = estimate_tokens(create_system_prompt()) + self._tool_schema_tokens
+        
+        print(f"✅ LangChain Agent initialized with {len(self.tools)} tools and {len(self.executor_pool)} executor(s)")
+    
+    def _build_executor(self, llm) -> AgentExecutor:
+        """Create tool-calling agent and executor for the given LLM"""
         agent = create_tool_calling_agent(
-            llm=self.llm,
+            llm=llm,
             tools=self.tools,
             prompt=self.prompt
         )
         
-        # Create executor
-        self.agent_executor = AgentExecutor(
+        return AgentExecutor(
             agent=agent,
             tools=self.tools,
             verbose=True,
             max_iterations=20,
-            handle_parsing_errors=True
+            handle_parsing_errors=True,
+            return_intermediate_steps=True
         )
+    
+    def _estimate_request_tokens(self, message: str, chat_history: List) -> int:
+        """Rough prompt size of one LLM call for this turn"""
+        history_tokens = sum(estimate_tokens(str(m.content)) for m in chat_history)
+        return self._base_prompt_tokens + history_tokens + estimate_tokens(message)
+    
+    async def _prepare_turn(self, message: str, session_id: Optional[str]):
+        """
+        Resolve session, record user message and build LangChain chat history
+        Returns (session_id, chat_history)
+        """
+        from utils.session_manager import session_manager
         
-        print("✅ LangChain Agent initialized with", len(self.tools), "tools")
+        # PAN in the message? Start KYC/credit/customer lookups now so they
+        # run while the session is loaded and the LLM plans its tool calls
+        lookup_prefetcher.prefetch_message(message)
+        
+        # Create or get session
+        if not session_id:
+            session_id = await session_manager.create_session()
+        else:
+            # Ensure session exists
+            if not await session_manager.touch_session(session_id):
+                session_id = await session_manager.create_session()
+        
+        # Pin any loan details in the message
+        await history_manager.observe_user_message(session_id, message)
+        
+        # Recent turns verbatim + summary of older ones (built before the
+        # current message is recorded, only new messages are converted)
+        chat_history = await history_manager.build(session_id)
+        
+        # Add user message to session
+        await session_manager.add_message(session_id, "user", message)
+        
+        return session_id, chat_history
     
-    def _get_next_llm(self):
-        """Get LLM with next key in rotation"""
-        if self.key_rotator:
-            api_key = self.key_rotator.get_key()
+    def _extract_tools_used(self, intermediate_steps: List) -> List[str]:
+        """Get unique tool names (in call order) from agent intermediate steps"""
+        tools_used = []
+        
+        print(f"🔍 Debug - Intermediate steps count: {len(intermediate_steps)}")
+        
+        for step in intermediate_steps:
+            try:
+                # step is tuple: (AgentAction, observation)
+                if isinstance(step, tuple) and len(step) >= 1:
+                    agent_action = step[0]
+                    # Try multiple ways to get tool name
+                    tool_name = None
+                    if hasattr(agent_action, 'tool'):
+                        tool_name = agent_action.tool
+                    elif isinstance(agent_action, dict):
+                        tool_name = agent_action.get('tool')
+                    
+                    if tool_name and tool_name not in tools_used:
+                        tools_used.append(tool_name)
+                        print(f"✅ Tracked tool: {tool_name}")
+            except Exception as e:
+                print(f"⚠️  Error extracting tool from step: {e}")
+        
+        print(f"📊 Total tools used: {len(tools_used)}")
+        
+        return tools_used
+    
+    async def _route_turn(self, message: str, session_id: str) -> Optional[Dict]:
+        """
+        Deterministic fast path (EMI query, bare PAN, clear session)
+        Returns the turn result, or None if the agent should handle it
+        """
+        if intent_router is None:
+            return None
+        
+        try:
+            routed = await intent_router.route(message, session_id)
+        except Exception as e:
+            print(f"⚠️  Intent routing failed, using agent: {e}")
+            return None
+        
+        if routed is None:
+            return None
+        
+        print(f"⚡ Routed intent without LLM: {routed['intent']}")
+        
+        if routed.get("reset_session"):
+            from utils.session_manager import session_manager
+            await session_manager.clear_session(session_id)
+            session_id = await session_manager.create_session()
         else:
-            api_key = os.getenv("GROQ_API_KEY")
+            await self._finish_turn(session_id, message, routed["response"])
         
-        return ChatGroq(
-            model="llama-3.3-70b-versatile",
-            temperature=0.7,
-            api_key=api_key,
-            max_tokens=2000
-        )
+        return {
+            "response": routed["response"],
+            "session_id": session_id,
+            "tools_used": routed["tools_used"],
+            "intent": routed["intent"]
+        }
+    
+    async def _embed_cacheable(self, message: str) -> Optional[List[float]]:
+        """Embed message if it is a generic question the response cache can serve"""
+        if response_cache is None or not is_cacheable_question(message):
+            return None
+        
+        try:
+            from rag.retriever import get_retriever
+            embedding = await asyncio.to_thread(get_retriever().embed_query, message)
+            return embedding if any(embedding) else None
+        except Exception as e:
+            print(f"⚠️  Response cache embedding skipped: {e}")
+            return None
+    
+    def _cache_answer(
+        self,
+        message: str,
+        embedding: Optional[List[float]],
+        response: str,
+        tools_used: List[str],
+        chat_history: List
+    ):
+        """
+        Cache answers built only from the knowledge base. The answer is served
+        to other sessions, so it must not have seen this session's history
+        (names, PAN, amounts the customer mentioned earlier)
+        """
+        if embedding is None or response_cache is None or chat_history:
+            return
+        if "retrieve_knowledge_tool" in tools_used and set(tools_used) <= SESSION_INDEPENDENT_TOOLS:
+            response_cache.store(message, embedding, response, tools_used)
+    
+    async def _finish_turn(self, session_id: str, message: str, response: str):
+        """Record agent response in memory and queue the turn for DB persistence"""
+        from utils.session_manager import session_manager
+        
+        # Add agent response to session
+        await session_manager.add_message(session_id, "assistant", response)
+        
+        # Queue DB writes - flushed in batches by the write-behind task
+        persistence_queue.enqueue_session(session_id)
+        persistence_queue.enqueue_message(session_id, "user", message)
+        persistence_queue.enqueue_message(session_id, "agent", response)
+    
+    async def _fail_turn(self, session_id: str, message: str) -> str:
+        """Record generic error response for a failed turn (and the message that failed)"""
+        from utils.session_manager import session_manager
+        
+        error_response = "I apologize, but I encountered an error. Please try again."
+        await session_manager.add_message(session_id, "assistant", error_response)
+        
+        persistence_queue.enqueue_session(session_id)
+        persistence_queue.enqueue_message(session_id, "user", message)
+        persistence_queue.enqueue_message(session_id, "agent", error_response)
+        
+        return error_response
+    
+    async def _interrupt_turn(self, session_id: str, message: str, partial_response: str):
+        """Record a turn whose stream was closed before it finished (and queue it for persistence)"""
+        from utils.session_manager import session_manager
+        
+        response = f"{partial_response}\n\n{INTERRUPTED_MARKER}" if partial_response else INTERRUPTED_MARKER
+        try:
+            await session_manager.add_message(session_id, "assistant", response)
+        except Exception as e:
+            print(f"⚠️  Could not record interrupted turn for session {session_id}: {e}")
+        
+        persistence_queue.enqueue_session(session_id)
+        persistence_queue.enqueue_message(session_id, "user", message)
+        persistence_queue.enqueue_message(session_id, "agent", response)
+        print(f"⚠️  Stream for session {session_id} closed before the turn finished - recorded as interrupted")
     
     async def invoke(
         self,
@@ -285,124 +453,57 @@ class LoanAgent:
         """
         Process user message through LangChain agent with in-memory history
         """
-        from utils.session_manager import session_manager
-        
-        # Create or get session
-        if not session_id:
-            session_id = session_manager.create_session()
-        else:
-            # Ensure session exists
-            if not session_manager.get_session(session_id):
-                session_id = session_manager.create_session()
+        session_id, chat_history = await self._prepare_turn(message, session_id)
         
-        # Add user message to session
-        session_manager.add_message(session_id, "user", message)
+        # Structured request? Answer without the LLM
+        routed = await self._route_turn(message, session_id)
+        if routed:
+            return routed
         
-        # Get conversation history from memory
-        messages = session_manager.get_messages(session_id)
+        # Generic product question answered before? Skip the agent run
+        question_embedding = await self._embed_cacheable(message)
+        if question_embedding is not None:
+            cached = response_cache.lookup(question_embedding)
+            if cached:
+                print(f"⚡ Response cache hit ({cached['similarity']:.2f}): {cached['matched_question']}")
+                await self._finish_turn(session_id, message, cached["answer"])
+                return {
+                    "response": cached["answer"],
+                    "session_id": session_id,
+                    "tools_used": cached["tools_used"],
+                    "cached": True
+                }
         
-        # Format chat history for LangChain (exclude current message)
-        chat_history = []
-        for msg in messages[:-1]:  # Exclude the message we just added
-            if msg.get("role") == "user":
-                chat_history.append(HumanMessage(content=msg.get("content", "")))
-            elif msg.get("role") == "assistant":
-                chat_history.append(AIMessage(content=msg.get("content", "")))
+        usage = TurnTokenUsage(self._tool_schema_tokens)
         
         try:
             # Invoke agent
-            result = await self.agent_executor.ainvoke({
-                "input": message,
-                "chat_history": chat_history
-            })
+            result = await self.executor_pool.ainvoke(
+                {"input": message, "chat_history": chat_history},
+                estimated_tokens=self._estimate_request_tokens(message, chat_history),
+                config={"callbacks": [usage]}
+            )
             
             response = result.get("output", "I apologize, I couldn't process that.")
             
             # Extract tools used from intermediate steps
-            tools_used = []
-            intermediate_steps = result.get("intermediate_steps", [])
-            
-            print(f"🔍 Debug - Intermediate steps count: {len(intermediate_steps)}")
-            
-            for step in intermediate_steps:
-                try:
-                    # step is tuple: (AgentAction, observation)
-                    if isinstance(step, tuple) and len(step) >= 1:
-                        agent_action = step[0]
-                        # Try multiple ways to get tool name
-                        tool_name = None
-                        if hasattr(agent_action, 'tool'):
-                            tool_name = agent_action.tool
-                        elif hasattr(agent_action, 'tool_input') and isinstance(agent_action, dict):
-                            tool_name = agent_action.get('tool')
-                        elif isinstance(agent_action, dict):
-                            tool_name = agent_action.get('tool')
-                        
-                        if tool_name and tool_name not in tools_used:
-                            tools_used.append(tool_name)
-                            print(f"✅ Tracked tool: {tool_name}")
-                except Exception as e:
-                    print(f"⚠️  Error extracting tool from step: {e}")
-            
-            print(f"📊 Total tools used: {len(tools_used)}")
+            tools_used = self._extract_tools_used(result.get("intermediate_steps", []))
             
-            # Add agent response to session
-            session_manager.add_message(session_id, "assistant", response)
-            
-            # Save to database (async, fire and forget) - create session first
-            try:
-                await self._ensure_session_in_db(session_id)
-                await self._save_message(session_id, "user", message)
-                await self._save_message(session_id, "agent", response)
-            except Exception as db_error:
-                print(f"⚠️  DB save skipped: {db_error}")
+            await self._finish_turn(session_id, message, response)
+            self._cache_answer(message, question_embedding, response, tools_used, chat_history)
+            token_profiler.record(session_id, usage)
             
             return {
                 "response": response,
                 "session_id": session_id,
                 "tools_used": tools_used
             }
-            
+        
         except Exception as e:
             print(f"❌ Agent error: {e}")
+            token_profiler.record(session_id, usage)
             
-            # Try with next key on rate limit
-            if "rate_limit" in str(e).lower() and self.key_rotator:
-                print("🔄 Retrying with next API key...")
-                self.llm = self._get_next_llm()
-                # Recreate agent with new LLM
-                agent = create_tool_calling_agent(
-                    llm=self.llm,
-                    tools=self.tools,
-                    prompt=self.prompt
-                )
-                self.agent_executor = AgentExecutor(
-                    agent=agent,
-                    tools=self.tools,
-                    verbose=True,
-                    max_iterations=20,
-                    handle_parsing_errors=True
-                )
-                # Retry once
-                try:
-                    result = await self.agent_executor.ainvoke({
-                        "input": message,
-                        "chat_history": chat_history
-                    })
-                    response = result.get("output", "I apologize, I couldn't process that.")
-                    session_manager.add_message(session_id, "assistant", response)
-                    return {
-                        "response": response,
-                        "session_id": session_id,
-                        "tools_used": []
-                    }
-                except Exception as retry_error:
-                    print(f"❌ Retry failed: {retry_error}")
-            
-            error_response = "I apologize, but I encountered an error. Please try again."
-            session_manager.add_message(session_id, "assistant", error_response)
-            
-            await self._save_message(session_id, "agent", error_response)
+            error_response = await self._fail_turn(session_id, message)
             
             return {
                 "response": error_response,
@@ -411,57 +512,155 @@ class LoanAgent:
                 "error": str(e)
             }
     
+    async def invoke_stream(
+        self,
+        message: str,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Process user message and yield events while the agent runs
+        
+        Yields dicts of shape {"event": str, "data": dict}:
+            session    - resolved session_id (sent first)
+            token      - LLM output token
+            tool_start - tool name and input
+            tool_end   - tool name and output
+            done       - final response, session_id and tools_used
+            error      - error message (stream ends after this)
+        """
+        session_id, chat_history = await self._prepare_turn(message, session_id)
+        
+        # Set once the turn is recorded - a stream closed before that (client
+        # disconnected) is recorded as interrupted in the finally block
+        closed = False
+        streamed: List[str] = []
+        
+        try:
+            yield {"event": "session", "data": {"session_id": session_id}}
+            
+            routed = await self._route_turn(message, session_id)
+            if routed:
+                closed = True
+                yield {"event": "token", "data": {"content": routed["response"]}}
+                yield {"event": "done", "data": routed}
+                return
+            
+            question_embedding = await self._embed_cacheable(message)
+            if question_embedding is not None:
+                cached = response_cache.lookup(question_embedding)
+                if cached:
+                    await self._finish_turn(session_id, message, cached["answer"])
+                    closed = True
+                    yield {"event": "token", "data": {"content": cached["answer"]}}
+                    yield {
+                        "event": "done",
+                        "data": {
+                            "response": cached["answer"],
+                            "session_id": session_id,
+                            "tools_used": cached["tools_used"],
+                            "cached": True
+                        }
+                    }
+                    return
+            
+            tools_used = []
+            response = None
+            
+            # Stream on one leased executor (no failover once tokens have been sent)
+            lease = await self.executor_pool.lease(self._estimate_request_tokens(message, chat_history))
+            usage = TurnTokenUsage(self._tool_schema_tokens)
+            
+            try:
+                async for event in lease.executor.astream_events(
+                    {"input": message, "chat_history": chat_history},
+                    config=with_callbacks({"callbacks": [usage]}, *lease.callbacks),
+                    version="v2"
+                ):
+                    kind = event["event"]
+                    
+                    if kind == "on_chat_model_stream":
+                        content = event["data"]["chunk"].content
+                        if content and isinstance(content, str):
+                            streamed.append(content)
+                            yield {"event": "token", "data": {"content": content}}
+                    
+                    elif kind == "on_tool_start":
+                        tool_name = event["name"]
+                        if tool_name not in tools_used:
+                            tools_used.append(tool_name)
+                        yield {
+                            "event": "tool_start",
+                            "data": {"tool": tool_name, "input": event["data"].get("input")}
+                        }
+                    
+                    elif kind == "on_tool_end":
+                        output = event["data"].get("output")
+                        yield {
+                            "event": "tool_end",
+                            "data": {
+                                "tool": event["name"],
+                                "output": getattr(output, "content", output)
+                            }
+                        }
+                    
+                    elif kind == "on_chain_end" and not event.get("parent_ids"):
+                        # Top-level AgentExecutor run finished
+                        output = event["data"].get("output") or {}
+                        response = output.get("output")
+                
+                if response is None:
+                    response = "I apologize, I couldn't process that."
+                
+                await self._finish_turn(session_id, message, response)
+                closed = True
+                self._cache_answer(message, question_embedding, response, tools_used, chat_history)
+                
+                yield {
+                    "event": "done",
+                    "data": {
+                        "response": response,
+                        "session_id": session_id,
+                        "tools_used": tools_used
+                    }
+                }
+            
+            except Exception as e:
+                print(f"❌ Agent stream error: {e}")
+                
+                error_response = await self._fail_turn(session_id, message)
+                closed = True
+                
+                yield {
+                    "event": "error",
+                    "data": {
+                        "response": error_response,
+                        "session_id": session_id,
+                        "tools_used": tools_used,
+                        "error": str(e)
+                    }
+                }
+            
+            finally:
+                lease.release()
+                token_profiler.record(session_id, usage)
+        
+        finally:
+            if not closed:
+                await self._interrupt_turn(session_id, message, "".join(streamed))
+    
     async def _create_session(self) -> str:
         """Create new conversation session in DB"""
         try:
-            supabase = get_supabase_client()
+            repo = get_repository()
             session_id = str(uuid.uuid4())
             
-            supabase.table("conversation_sessions").insert({
-                "id": session_id,
-                "session_type": "loan_application",
-                "status": "active",
-                "current_stage": "greeting"
-            }).execute()
+            await repo.sessions.create(session_id, current_stage="greeting")
             
             return session_id
         except Exception as e:
             print(f"❌ Error creating session in DB: {e}")
             return str(uuid.uuid4())
     
-    async def _ensure_session_in_db(self, session_id: str):
-        """Ensure session exists in DB, create if not"""
-        try:
-            supabase = get_supabase_client()
-            
-            # Check if exists
-            result = supabase.table("conversation_sessions").select("id").eq("id", session_id).execute()
-            
-            if not result.data:
-                # Create it
-                supabase.table("conversation_sessions").insert({
-                    "id": session_id,
-                    "session_type": "loan_application",
-                    "status": "active",
-                    "current_stage": "in_progress"
-                }).execute()
-                print(f"✅ Created session in DB: {session_id}")
-        except Exception as e:
-            print(f"⚠️  Could not ensure session in DB: {e}")
-    
-    async def _save_message(self, session_id: str, sender: str, message: str):
-        """Save message to database (async)"""
-        try:
-            supabase = get_supabase_client()
-            
-            supabase.table("conversation_messages").insert({
-                "session_id": session_id,
-                "sender": sender,
-                "message": message
-            }).execute()
-        except Exception as e:
-            print(f"⚠️  Warning: Could not save message to DB: {e}")
-    
     def get_tool_names(self) -> List[str]:
         """Return list of available tool names"""
-        return [tool.name for tool in self.tools]
\ No newline at end of file
+        return [tool.name for tool in self.tools]
@@ -0,0 +1,124 @@
+# ============================================================================
+# LOOKUP PREFETCH - Start bureau/customer lookups as soon as a PAN appears
+# Path: backend/agents/prefetch.py
+# ============================================================================
+
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+
+from agents.history import extract_facts
+from utils.bureau_cache import bureau_cache
+
+load_dotenv()
+
+async def _lookup_customer(pan: str) -> Optional[Dict]:
+    from database.repository import get_repository
+    return await get_repository().customers.get_by_pan(pan)
+
+# kind -> lookup (PAN upper-cased by the caller) - bureau calls go through the shared cache
+LOOKUPS: Dict[str, Callable[[str], Awaitable[Any]]] = {
+    "kyc": bureau_cache.verify_kyc,
+    "credit": bureau_cache.fetch_credit_score,
+    "customer": _lookup_customer,
+}
+
+class LookupPrefetcher:
+    """
+    Speculatively starts the KYC, credit score and existing-customer
+    lookups when a PAN shows up in a user message, so they run while the
+    LLM is still deciding to call the tools. Tools go through fetch(),
+    which awaits the running lookup instead of starting another one.
+    
+    Unused prefetches are dropped after `ttl` seconds (newest `max_entries` kept)
+    """
+    
+    def __init__(self, ttl: float = 60, max_entries: int = 1000, enabled: bool = True):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        
+        # (kind, pan) -> (task, started_at)
+        self._tasks: "OrderedDict[Tuple[str, str], Tuple[asyncio.Task, float]]" = OrderedDict()
+        
+        self.prefetched = 0
+        self.hits = 0
+        self.misses = 0
+        self._head_start_ms = 0.0
+    
+    def prefetch_message(self, message: str) -> Optional[str]:
+        """Prefetch lookups for a PAN in the message - returns the PAN if one was found"""
+        if not self.enabled:
+            return None
+        pan = extract_facts(message).get("pan")
+        if pan:
+            self.prefetch(pan)
+        return pan
+    
+    def prefetch(self, pan: str):
+        """Start every lookup for the PAN that is not already prefetched"""
+        pan = pan.upper()
+        now = time.monotonic()
+        
+        for kind, lookup in LOOKUPS.items():
+            key = (kind, pan)
+            entry = self._tasks.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                continue
+            
+            task = asyncio.create_task(lookup(pan))
+            task.add_done_callback(_consume_exception)
+            self._tasks[key] = (task, now)
+            self._tasks.move_to_end(key)
+            self.prefetched += 1
+        
+        while len(self._tasks) > self.max_entries:
+            self._tasks.popitem(last=False)
+    
+    async def fetch(self, kind: str, pan: str) -> Any:
+        """
+        Result of a lookup - from the prefetched task when there is one
+        (each prefetch serves one call, later calls look up again)
+        """
+        pan = pan.upper()
+        entry = self._tasks.pop((kind, pan), None)
+        
+        if entry is not None:
+            task, started_at = entry
+            failed = task.done() and (task.cancelled() or task.exception() is not None)
+            if not failed and time.monotonic() - started_at < self.ttl:
+                self.hits += 1
+                self._head_start_ms += (time.monotonic() - started_at) * 1000
+                # Shielded - a cancelled tool call must not cancel the shared lookup
+                return await asyncio.shield(task)
+        
+        self.misses += 1
+        return await LOOKUPS[kind](pan)
+    
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl,
+            "tracked_lookups": len(self._tasks),
+            "prefetched": self.prefetched,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "avg_head_start_ms": round(self._head_start_ms / self.hits, 1) if self.hits else 0.0
+        }
+
+def _consume_exception(task: asyncio.Task):
+    """Failed prefetches are reported by the tool that awaits them, not as unretrieved-exception warnings"""
+    if not task.cancelled():
+        task.exception()
+
+# Global prefetcher instance
+lookup_prefetcher = LookupPrefetcher(
+    ttl=float(os.getenv("PREFETCH_TTL", 60)),
+    max_entries=int(os.getenv("PREFETCH_MAX_ENTRIES", 1000)),
+    enabled=os.getenv("PREFETCH", "on").lower() != "off"
+)
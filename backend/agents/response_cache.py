@@ -0,0 +1,168 @@
+# ============================================================================
+# SEMANTIC RESPONSE CACHE - Reuse answers to generic product questions
+# Path: backend/agents/response_cache.py
+# ============================================================================
+
+from typing import Dict, List, Optional
+from collections import OrderedDict
+import os
+import re
+import time
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Anything that ties a question to a specific customer makes it uncacheable
+PERSONAL_PATTERN = re.compile(
+    r"\d|\b(i|i'm|im|i've|my|me|mine|myself|we|our|us)\b",
+    re.IGNORECASE
+)
+QUESTION_PATTERN = re.compile(
+    r"\?|^\s*(what|what's|whats|how|which|when|where|why|can|do|does|is|are|tell|explain|list)\b",
+    re.IGNORECASE
+)
+
+# Tools whose output is the same for every customer
+SESSION_INDEPENDENT_TOOLS = {"retrieve_knowledge_tool"}
+
+def is_cacheable_question(message: str) -> bool:
+    """
+    Generic product question - short, phrased as a question, no personal
+    details (numbers, PAN, first-person pronouns)
+    """
+    message = message.strip()
+    return (
+        0 < len(message) <= 200
+        and not PERSONAL_PATTERN.search(message)
+        and bool(QUESTION_PATTERN.search(message))
+    )
+
+class CachedAnswer:
+    __slots__ = ("question", "answer", "tools_used", "expires_at", "hits")
+    
+    def __init__(self, question: str, answer: str, tools_used: List[str], expires_at: float):
+        self.question = question
+        self.answer = answer
+        self.tools_used = tools_used
+        self.expires_at = expires_at
+        self.hits = 0
+
+class SemanticResponseCache:
+    """
+    Answers keyed by question embedding; a lookup hits when cosine
+    similarity to a stored question is >= threshold
+    """
+    
+    def __init__(self, threshold: float = 0.92, ttl: float = 3600, max_entries: int = 500):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self._vectors: Dict[int, np.ndarray] = {}
+        self._next_id = 0
+        
+        # Stacked vectors for one matrix-vector product per lookup
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_ids: List[int] = []
+        
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def _normalize(self, embedding: List[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+    
+    def _remove(self, entry_id: int):
+        self._entries.pop(entry_id, None)
+        self._vectors.pop(entry_id, None)
+        self._matrix = None
+    
+    def lookup(self, embedding: List[float]) -> Optional[Dict]:
+        """Best non-expired answer above threshold, or None"""
+        query = self._normalize(embedding)
+        if query is None or not self._entries:
+            self.misses += 1
+            return None
+        
+        if self._matrix is None:
+            self._matrix_ids = list(self._entries)
+            self._matrix = np.stack([self._vectors[i] for i in self._matrix_ids])
+        
+        scores = self._matrix @ query
+        best = int(np.argmax(scores))
+        similarity = float(scores[best])
+        entry_id = self._matrix_ids[best]
+        entry = self._entries.get(entry_id)
+        
+        if entry is not None and entry.expires_at <= time.time():
+            self._remove(entry_id)
+            entry = None
+        
+        if entry is None or similarity < self.threshold:
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(entry_id)
+        entry.hits += 1
+        self.hits += 1
+        
+        return {
+            "answer": entry.answer,
+            "tools_used": entry.tools_used,
+            "matched_question": entry.question,
+            "similarity": round(similarity, 4)
+        }
+    
+    def store(self, question: str, embedding: List[float], answer: str, tools_used: List[str]):
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+        
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = CachedAnswer(question, answer, tools_used, time.time() + self.ttl)
+        self._vectors[entry_id] = vector
+        self._matrix = None
+        self.stores += 1
+        
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+    
+    def invalidate(self):
+        """Drop every answer (knowledge base changed)"""
+        self._entries.clear()
+        self._vectors.clear()
+        self._matrix = None
+        self.invalidations += 1
+    
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+# Global response cache instance (RESPONSE_CACHE=off disables it)
+response_cache: Optional[SemanticResponseCache] = None
+if os.getenv("RESPONSE_CACHE", "on").lower() != "off":
+    response_cache = SemanticResponseCache(
+        threshold=float(os.getenv("RESPONSE_CACHE_THRESHOLD", 0.92)),
+        ttl=float(os.getenv("RESPONSE_CACHE_TTL", 3600)),
+        max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", 500))
+    )
@@ -0,0 +1,199 @@
+# ============================================================================
+# TOKEN ACCOUNTING - Where each turn's prompt tokens go
+# Path: backend/agents/token_accounting.py
+# ============================================================================
+
+from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+import json
+import os
+import threading
+from dotenv import load_dotenv
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import LLMResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from utils.tokens import estimate_tokens
+
+load_dotenv()
+
+INPUT_CATEGORIES = ("system", "tools", "history", "scratchpad", "input")
+
+def tool_schema_tokens(tools: List) -> int:
+    """Estimated tokens of the tool schemas sent with every LLM call"""
+    schemas = [tool if isinstance(tool, dict) else convert_to_openai_tool(tool) for tool in tools]
+    return estimate_tokens(json.dumps(schemas)) if schemas else 0
+
+def _message_tokens(message: BaseMessage) -> int:
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    tokens = estimate_tokens(content)
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        tokens += estimate_tokens(json.dumps(tool_calls, default=str))
+    return tokens
+
+def estimate_prompt_tokens(prompt: List[BaseMessage], tool_tokens: int = 0) -> int:
+    """Estimated input tokens of one LLM call (messages plus tool schemas)"""
+    return tool_tokens + sum(_message_tokens(message) for message in prompt)
+
+class TurnTokenUsage(AsyncCallbackHandler):
+    """
+    Callback for one agent turn - splits every LLM call's prompt into
+    system prompt / tool schemas / history / scratchpad / user input
+    (estimated) and records provider-reported input/output tokens
+    """
+    
+    def __init__(self, default_tool_tokens: int = 0):
+        self.default_tool_tokens = default_tool_tokens
+        self.iterations = 0
+        self.input = {category: 0 for category in INPUT_CATEGORIES}
+        self.provider_input_tokens = 0
+        self.output_tokens = 0
+    
+    async def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[BaseMessage]],
+        **kwargs: Any
+    ) -> None:
+        params = kwargs.get("invocation_params") or {}
+        tools = params.get("tools")
+        tool_tokens = tool_schema_tokens(tools) if tools else self.default_tool_tokens
+        
+        for prompt in messages:
+            self.iterations += 1
+            self.input["tools"] += tool_tokens
+            
+            # Prompt layout: system, *chat_history, human input, *scratchpad
+            input_index = max(
+                (i for i, m in enumerate(prompt) if isinstance(m, HumanMessage)),
+                default=len(prompt)
+            )
+            
+            for i, message in enumerate(prompt):
+                tokens = _message_tokens(message)
+                if i == 0 and isinstance(message, SystemMessage):
+                    self.input["system"] += tokens
+                elif i < input_index:
+                    self.input["history"] += tokens
+                elif i == input_index:
+                    self.input["input"] += tokens
+                else:
+                    self.input["scratchpad"] += tokens
+    
+    async def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        input_tokens = output_tokens = None
+        
+        # Streaming and non-streaming runs report usage in different places
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    input_tokens = (input_tokens or 0) + usage.get("input_tokens", 0)
+                    output_tokens = (output_tokens or 0) + usage.get("output_tokens", 0)
+        
+        if input_tokens is None:
+            token_usage = (response.llm_output or {}).get("token_usage") or {}
+            input_tokens = token_usage.get("prompt_tokens")
+            output_tokens = token_usage.get("completion_tokens")
+        
+        if output_tokens is None:
+            output_tokens = sum(
+                estimate_tokens(generation.text)
+                for generations in response.generations
+                for generation in generations
+            )
+        
+        self.provider_input_tokens += input_tokens or 0
+        self.output_tokens += output_tokens
+    
+    def to_dict(self) -> Dict:
+        estimated_input = sum(self.input.values())
+        return {
+            "iterations": self.iterations,
+            "input_tokens": dict(self.input),
+            "estimated_input_tokens": estimated_input,
+            "provider_input_tokens": self.provider_input_tokens,
+            "output_tokens": self.output_tokens
+        }
+
+class _Totals:
+    def __init__(self):
+        self.turns = 0
+        self.iterations = 0
+        self.input = {category: 0 for category in INPUT_CATEGORIES}
+        self.provider_input_tokens = 0
+        self.output_tokens = 0
+        self.last_turn: Optional[Dict] = None
+    
+    def add(self, usage: Dict):
+        self.turns += 1
+        self.iterations += usage["iterations"]
+        for category, tokens in usage["input_tokens"].items():
+            self.input[category] += tokens
+        self.provider_input_tokens += usage["provider_input_tokens"]
+        self.output_tokens += usage["output_tokens"]
+        self.last_turn = usage
+    
+    def to_dict(self) -> Dict:
+        estimated_input = sum(self.input.values())
+        share = {
+            category: round(tokens / estimated_input, 4) if estimated_input else 0.0
+            for category, tokens in self.input.items()
+        }
+        per_turn = lambda total: round(total / self.turns, 1) if self.turns else 0.0
+        return {
+            "turns": self.turns,
+            "iterations": self.iterations,
+            "avg_iterations_per_turn": per_turn(self.iterations),
+            "input_tokens": dict(self.input),
+            "input_share": share,
+            "estimated_input_tokens": estimated_input,
+            "provider_input_tokens": self.provider_input_tokens,
+            "output_tokens": self.output_tokens,
+            "avg_input_tokens_per_turn": per_turn(self.provider_input_tokens or estimated_input),
+            "avg_output_tokens_per_turn": per_turn(self.output_tokens),
+            "last_turn": self.last_turn
+        }
+
+class TokenProfiler:
+    """
+    Aggregates per-turn usage overall and per session (most recent
+    `max_sessions` sessions are kept)
+    """
+    
+    def __init__(self, max_sessions: int = 1000):
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._overall = _Totals()
+        self._sessions: "OrderedDict[str, _Totals]" = OrderedDict()
+    
+    def record(self, session_id: str, usage: TurnTokenUsage):
+        if usage.iterations == 0:
+            return
+        
+        data = usage.to_dict()
+        with self._lock:
+            self._overall.add(data)
+            
+            totals = self._sessions.pop(session_id, None) or _Totals()
+            totals.add(data)
+            self._sessions[session_id] = totals
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = self._overall.to_dict()
+            stats["tracked_sessions"] = len(self._sessions)
+            return stats
+    
+    def get_session_stats(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            totals = self._sessions.get(session_id)
+            return totals.to_dict() if totals else None
+
+# Global profiler instance
+token_profiler = TokenProfiler(max_sessions=int(os.getenv("TOKEN_STATS_MAX_SESSIONS", 1000)))
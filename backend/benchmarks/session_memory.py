@@ -0,0 +1,149 @@
+# ============================================================================
+# BENCHMARK - Bytes per in-memory session
+# Path: backend/benchmarks/session_memory.py
+#
+# Usage (from backend/):
+#   python benchmarks/session_memory.py [--sessions 20000] [--turns 10]
+# ============================================================================
+
+from collections import OrderedDict
+from datetime import datetime
+import argparse
+import asyncio
+import gc
+import os
+import random
+import sys
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.session_manager import InMemorySessionBackend
+
+USER_MESSAGES = [
+    "Hi, I want a personal loan",
+    "My PAN is ABCDE1234F",
+    "I am salaried, my monthly salary is 85,000",
+    "I need a loan of 5 lakh for 3 years",
+    "What will my EMI be at 11.5%?",
+    "no existing EMI",
+    "Can you reduce the interest rate a little?",
+    "okay, please go ahead",
+]
+
+ASSISTANT_MESSAGE = (
+    "Thank you! Based on your profile, you are eligible for a personal loan of up to "
+    "₹{amount:,} at an interest rate of {rate}% per annum. For a tenure of 36 months your "
+    "monthly EMI would be approximately ₹{emi:,}. The processing fee is 2% of the loan amount "
+    "and there are no prepayment charges after 6 EMIs. Would you like me to proceed with the "
+    "application, or would you like to explore a different amount or tenure? I can also "
+    "explain how the interest rate was determined from your credit score and income."
+)
+
+CUSTOMER_DATA = {
+    "pan": "ABCDE1234F",
+    "full_name": "Rohan Gupta",
+    "age": 32,
+    "phone": "9876543210",
+    "credit_score": 790,
+    "existing_customer": False,
+    "customer_id": None,
+    "monthly_income": 85000.0,
+    "loan_amount": 500000.0,
+    "tenure_months": 36,
+}
+
+def conversation(turns: int, rng: random.Random):
+    for turn in range(turns):
+        yield "user", USER_MESSAGES[turn % len(USER_MESSAGES)]
+        yield "assistant", ASSISTANT_MESSAGE.format(
+            amount=rng.randrange(100, 1500) * 1000,
+            rate=round(rng.uniform(10.5, 16), 2),
+            emi=rng.randrange(5000, 50000)
+        )
+
+# ----------------------------------------------------------------------------
+# Previous layout: dict per message with ISO timestamp, dict per session
+# ----------------------------------------------------------------------------
+
+def build_legacy(sessions: int, turns: int, rng: random.Random):
+    store = OrderedDict()
+    for _ in range(sessions):
+        session_id = str(uuid.uuid4())
+        session = {
+            "messages": [],
+            "customer_data": {},
+            "summary": {"text": "", "covered": 0},
+            "created_at": datetime.now(),
+            "last_activity": datetime.now()
+        }
+        for role, content in conversation(turns, rng):
+            session["messages"].append({
+                "role": role,
+                "content": content,
+                "timestamp": datetime.now().isoformat()
+            })
+        session["customer_data"].update(CUSTOMER_DATA)
+        store[session_id] = session
+    return store
+
+async def build_compact(sessions: int, turns: int, rng: random.Random, compress_cold: bool):
+    manager = InMemorySessionBackend(
+        max_sessions=sessions + 1,
+        max_bytes=1 << 62,
+        compress_cold=compress_cold
+    )
+    for _ in range(sessions):
+        session_id = await manager.create_session()
+        for role, content in conversation(turns, rng):
+            await manager.add_message(session_id, role, content)
+        await manager.update_customer_data(session_id, CUSTOMER_DATA)
+    return manager
+
+def measure(label: str, build, sessions: int):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    
+    per_session = (after - before) / sessions
+    print(f"{label:<34} {per_session:>10,.0f} B/session   {(after - before) / (1024 * 1024):>8.1f} MB total")
+    return per_session, store
+
+def main():
+    parser = argparse.ArgumentParser(description="In-memory session footprint")
+    parser.add_argument("--sessions", type=int, default=20000)
+    parser.add_argument("--turns", type=int, default=10, help="user+assistant exchanges per session")
+    args = parser.parse_args()
+    
+    print(f"📊 {args.sessions:,} sessions x {args.turns} turns ({2 * args.turns} messages each)\n")
+    
+    legacy, store = measure(
+        "dict messages (previous)",
+        lambda: build_legacy(args.sessions, args.turns, random.Random(7)),
+        args.sessions
+    )
+    del store
+    compact, store = measure(
+        "slotted records",
+        lambda: asyncio.run(build_compact(args.sessions, args.turns, random.Random(7), False)),
+        args.sessions
+    )
+    del store
+    compressed, manager = measure(
+        "slotted records + cold compression",
+        lambda: asyncio.run(build_compact(args.sessions, args.turns, random.Random(7), True)),
+        args.sessions
+    )
+    
+    print()
+    print(f"slotted records:        {compact / legacy:.0%} of previous")
+    print(f"+ cold compression:     {compressed / legacy:.0%} of previous "
+          f"({manager.compressed_messages:,} messages compressed)")
+
+if __name__ == "__main__":
+    main()
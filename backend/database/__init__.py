@@ -1,3 +1,11 @@
 from .supabase_client import get_supabase_client, get_service_client
+from .repository import get_repository, close_repository, Repository, RepositoryError
 
-__all__ = ["get_supabase_client", "get_service_client"]
\ No newline at end of file
+__all__ = [
+    "get_supabase_client",
+    "get_service_client",
+    "get_repository",
+    "close_repository",
+    "Repository",
+    "RepositoryError",
+]
\ No newline at end of file
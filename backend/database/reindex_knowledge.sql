@@ -0,0 +1,55 @@
+-- ============================================================================
+-- REINDEX KNOWLEDGE - Apply a knowledge base re-index in one transaction
+-- Path: backend/database/reindex_knowledge.sql
+--
+-- Run once in the Supabase SQL Editor. rag/indexer.py first inserts the
+-- new chunks into knowledge_base_staging in batches (one reindex_id per
+-- run), then calls POST /rest/v1/rpc/reindex_knowledge. PostgREST runs
+-- the function in a single transaction, so match_knowledge sees either
+-- the old or the new set of chunks, never a mix of both - and no single
+-- request has to carry every embedding.
+-- ============================================================================
+
+create table if not exists knowledge_base_staging (
+    id uuid primary key,
+    reindex_id uuid not null,
+    content text not null,
+    embedding vector not null,
+    metadata jsonb,
+    created_at timestamptz not null default now()
+);
+
+create index if not exists knowledge_base_staging_reindex_id_idx
+    on knowledge_base_staging (reindex_id);
+
+-- Earlier version took the new rows inline, in one request body
+drop function if exists reindex_knowledge(jsonb, uuid[], jsonb);
+
+create or replace function reindex_knowledge(
+    reindex_id uuid,      -- staged rows of this run (knowledge_base_staging)
+    stale_ids uuid[],     -- rows of removed chunks
+    kept_metadata jsonb   -- [{id, metadata}] for kept rows whose position moved
+)
+returns void
+language plpgsql
+as $$
+begin
+    insert into knowledge_base_embeddings (id, content, embedding, metadata)
+    select s.id, s.content, s.embedding, s.metadata
+    from knowledge_base_staging as s
+    where s.reindex_id = reindex_knowledge.reindex_id;
+
+    update knowledge_base_embeddings as k
+    set metadata = m->'metadata'
+    from jsonb_array_elements(kept_metadata) as m
+    where k.id = (m->>'id')::uuid;
+
+    delete from knowledge_base_embeddings
+    where id = any(stale_ids);
+
+    -- This run's staging rows, plus any left behind by runs that died
+    delete from knowledge_base_staging as s
+    where s.reindex_id = reindex_knowledge.reindex_id
+       or s.created_at < now() - interval '1 day';
+end;
+$$;
@@ -0,0 +1,374 @@
+# ============================================================================
+# ASYNC REPOSITORY - Non-blocking Supabase (PostgREST) access
+# Path: backend/database/repository.py
+# ============================================================================
+
+from typing import Any, Dict, List, Optional, TypedDict
+import os
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ============================================================================
+# ROW TYPES
+# ============================================================================
+
+class CustomerRow(TypedDict, total=False):
+    id: str
+    pan_number: str
+    full_name: str
+    dob: str
+    age: int
+    phone: str
+    email: str
+    kyc_status: str
+    employment_type: str
+    monthly_income: float
+    company_name: str
+
+class LoanApplicationRow(TypedDict, total=False):
+    id: str
+    customer_id: str
+    created_at: str
+
+class ConversationSessionRow(TypedDict, total=False):
+    id: str
+    session_type: str
+    status: str
+    current_stage: str
+    collected_data: Dict[str, Any]
+
+class ConversationMessageRow(TypedDict, total=False):
+    id: str
+    session_id: str
+    sender: str
+    message: str
+
+class KnowledgeChunkRow(TypedDict, total=False):
+    id: str
+    content: str
+    embedding: Any
+    metadata: Dict[str, Any]
+
+class RepositoryError(Exception):
+    """Raised when a PostgREST request fails"""
+    
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+# ============================================================================
+# POOLED POSTGREST CLIENT
+# ============================================================================
+
+class AsyncPostgrestClient:
+    """
+    Thin async PostgREST client over a pooled httpx.AsyncClient
+    Filters use PostgREST syntax, e.g. {"pan_number": "eq.ABCDE1234F"}
+    """
+    
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        max_connections: int = 20,
+        timeout: float = 10.0
+    ):
+        self._client = httpx.AsyncClient(
+            base_url=f"{url.rstrip('/')}/rest/v1",
+            headers={
+                "apikey": key,
+                "Authorization": f"Bearer {key}",
+                "Content-Type": "application/json"
+            },
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            timeout=timeout
+        )
+    
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, str]] = None,
+        json: Any = None,
+        prefer: Optional[str] = None
+    ) -> Any:
+        headers = {"Prefer": prefer} if prefer else None
+        response = await self._client.request(method, path, params=params, json=json, headers=headers)
+        
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get("message", response.text)
+            except ValueError:
+                detail = response.text
+            raise RepositoryError(f"{method} {path} failed ({response.status_code}): {detail}", response.status_code)
+        
+        if not response.content:
+            return []
+        return response.json()
+    
+    async def select(
+        self,
+        table: str,
+        columns: str = "*",
+        filters: Optional[Dict[str, str]] = None,
+        order: Optional[str] = None,
+        desc: bool = False,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None
+    ) -> List[Dict]:
+        params = {"select": columns, **(filters or {})}
+        if order:
+            params["order"] = f"{order}.{'desc' if desc else 'asc'}"
+        if limit is not None:
+            params["limit"] = str(limit)
+        if offset:
+            params["offset"] = str(offset)
+        return await self._request("GET", f"/{table}", params=params)
+    
+    async def insert(
+        self,
+        table: str,
+        rows: Any,
+        returning: bool = True,
+        ignore_duplicates: bool = False
+    ) -> List[Dict]:
+        prefer = "return=representation" if returning else "return=minimal"
+        if ignore_duplicates:
+            prefer += ",resolution=ignore-duplicates"
+        return await self._request("POST", f"/{table}", json=rows, prefer=prefer)
+    
+    async def update(self, table: str, values: Dict, filters: Dict[str, str]) -> List[Dict]:
+        return await self._request(
+            "PATCH", f"/{table}", params=filters, json=values, prefer="return=representation"
+        )
+    
+    async def delete(self, table: str, filters: Dict[str, str]) -> List[Dict]:
+        return await self._request("DELETE", f"/{table}", params=filters, prefer="return=minimal")
+    
+    async def rpc(self, function: str, params: Dict) -> Any:
+        return await self._request("POST", f"/rpc/{function}", json=params)
+    
+    async def aclose(self):
+        await self._client.aclose()
+
+def eq(value: Any) -> str:
+    """PostgREST equality filter"""
+    return f"eq.{value}"
+
+# ============================================================================
+# TABLE REPOSITORIES
+# ============================================================================
+
+class CustomersRepository:
+    table = "customers"
+    
+    def __init__(self, client: AsyncPostgrestClient):
+        self.client = client
+    
+    async def get_by_pan(self, pan: str) -> Optional[CustomerRow]:
+        rows = await self.client.select(self.table, filters={"pan_number": eq(pan)}, limit=1)
+        return rows[0] if rows else None
+    
+    async def get_id_by_pan(self, pan: str) -> Optional[str]:
+        rows = await self.client.select(self.table, columns="id", filters={"pan_number": eq(pan)}, limit=1)
+        return rows[0]["id"] if rows else None
+    
+    async def create(self, fields: CustomerRow) -> CustomerRow:
+        rows = await self.client.insert(self.table, fields)
+        return rows[0]
+    
+    async def update_by_pan(self, pan: str, fields: CustomerRow) -> List[CustomerRow]:
+        return await self.client.update(self.table, fields, {"pan_number": eq(pan)})
+
+class LoanApplicationsRepository:
+    table = "loan_applications"
+    
+    def __init__(self, client: AsyncPostgrestClient):
+        self.client = client
+    
+    async def create(self, data: LoanApplicationRow) -> LoanApplicationRow:
+        rows = await self.client.insert(self.table, data)
+        return rows[0]
+    
+    async def list_by_customer(self, customer_id: str, limit: int = 5) -> List[LoanApplicationRow]:
+        return await self.client.select(
+            self.table,
+            filters={"customer_id": eq(customer_id)},
+            order="created_at",
+            desc=True,
+            limit=limit
+        )
+
+class ConversationSessionsRepository:
+    table = "conversation_sessions"
+    
+    def __init__(self, client: AsyncPostgrestClient):
+        self.client = client
+    
+    async def exists(self, session_id: str) -> bool:
+        rows = await self.client.select(self.table, columns="id", filters={"id": eq(session_id)}, limit=1)
+        return bool(rows)
+    
+    async def create(self, session_id: str, current_stage: str = "in_progress") -> None:
+        await self.client.insert(self.table, {
+            "id": session_id,
+            "session_type": "loan_application",
+            "status": "active",
+            "current_stage": current_stage
+        }, returning=False)
+    
+    async def create_many(self, session_ids: List[str], current_stage: str = "in_progress") -> None:
+        """Bulk insert sessions, skipping ids that already exist"""
+        await self.client.insert(self.table, [
+            {
+                "id": session_id,
+                "session_type": "loan_application",
+                "status": "active",
+                "current_stage": current_stage
+            }
+            for session_id in session_ids
+        ], returning=False, ignore_duplicates=True)
+    
+    async def update_state(self, session_id: str, stage: str, collected_data: Dict) -> None:
+        await self.client.update(self.table, {
+            "current_stage": stage,
+            "collected_data": collected_data
+        }, {"id": eq(session_id)})
+
+class ConversationMessagesRepository:
+    table = "conversation_messages"
+    
+    def __init__(self, client: AsyncPostgrestClient):
+        self.client = client
+    
+    async def create(self, session_id: str, sender: str, message: str) -> None:
+        await self.client.insert(self.table, {
+            "session_id": session_id,
+            "sender": sender,
+            "message": message
+        }, returning=False)
+    
+    async def create_many(self, rows: List[ConversationMessageRow]) -> None:
+        """Multi-row insert in a single round-trip"""
+        await self.client.insert(self.table, rows, returning=False)
+
+class KnowledgeBaseRepository:
+    table = "knowledge_base_embeddings"
+    staging_table = "knowledge_base_staging"
+    
+    def __init__(self, client: AsyncPostgrestClient):
+        self.client = client
+    
+    async def list_chunks(self, include_embedding: bool = False, page_size: int = 1000) -> List[KnowledgeChunkRow]:
+        """Fetch every chunk, paging past the PostgREST row limit"""
+        columns = "id,content,metadata,embedding" if include_embedding else "id,content,metadata"
+        rows: List[KnowledgeChunkRow] = []
+        
+        while True:
+            page = await self.client.select(
+                self.table,
+                columns=columns,
+                order="id",
+                limit=page_size,
+                offset=len(rows)
+            )
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+    
+    async def insert_many(self, rows: List[KnowledgeChunkRow], batch_size: int = 200) -> None:
+        """Multi-row inserts, `batch_size` chunks per request"""
+        for start in range(0, len(rows), batch_size):
+            await self.client.insert(self.table, rows[start:start + batch_size], returning=False)
+    
+    async def delete_by_ids(self, ids: List[str], batch_size: int = 100) -> None:
+        for start in range(0, len(ids), batch_size):
+            batch = ",".join(ids[start:start + batch_size])
+            await self.client.delete(self.table, {"id": f"in.({batch})"})
+    
+    async def update_metadata(self, chunk_id: str, metadata: Dict[str, Any]) -> None:
+        await self.client.update(self.table, {"metadata": metadata}, {"id": eq(chunk_id)})
+    
+    async def stage_chunks(self, reindex_id: str, rows: List[KnowledgeChunkRow], batch_size: int = 200) -> None:
+        """Multi-row inserts into knowledge_base_staging, `batch_size` chunks per request"""
+        for start in range(0, len(rows), batch_size):
+            batch = [{**row, "reindex_id": reindex_id} for row in rows[start:start + batch_size]]
+            await self.client.insert(self.staging_table, batch, returning=False)
+    
+    async def discard_staged(self, reindex_id: str) -> None:
+        await self.client.delete(self.staging_table, {"reindex_id": eq(reindex_id)})
+    
+    async def swap_chunks(
+        self,
+        reindex_id: str,
+        stale_ids: List[str],
+        kept_metadata: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Move the staged rows in, re-number and delete in one transaction
+        (reindex_knowledge function - database/reindex_knowledge.sql)
+        """
+        await self.client.rpc("reindex_knowledge", {
+            "reindex_id": reindex_id,
+            "stale_ids": stale_ids,
+            "kept_metadata": kept_metadata
+        })
+
+class Repository:
+    """
+    Async data-access layer - one repository per table over a shared pool
+    """
+    
+    def __init__(self, client: AsyncPostgrestClient):
+        self.client = client
+        self.customers = CustomersRepository(client)
+        self.loan_applications = LoanApplicationsRepository(client)
+        self.sessions = ConversationSessionsRepository(client)
+        self.messages = ConversationMessagesRepository(client)
+        self.knowledge_base = KnowledgeBaseRepository(client)
+    
+    async def aclose(self):
+        await self.client.aclose()
+
+# ============================================================================
+# GLOBAL INSTANCE
+# ============================================================================
+
+_repository: Optional[Repository] = None
+
+def get_repository() -> Repository:
+    """
+    Get or create the async repository (singleton pattern)
+    """
+    global _repository
+    
+    if _repository is None:
+        url = os.getenv("SUPABASE_URL")
+        key = os.getenv("SUPABASE_KEY")
+        
+        if not url or not key:
+            raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in .env")
+        
+        client = AsyncPostgrestClient(
+            url,
+            key,
+            max_connections=int(os.getenv("SUPABASE_MAX_CONNECTIONS", 20)),
+            timeout=float(os.getenv("SUPABASE_TIMEOUT", 10))
+        )
+        _repository = Repository(client)
+        print("✅ Async Supabase repository initialized")
+    
+    return _repository
+
+async def close_repository():
+    """Close pooled HTTP connections (call on shutdown)"""
+    global _repository
+    
+    if _repository is not None:
+        await _repository.aclose()
+        _repository = None
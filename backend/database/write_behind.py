@@ -0,0 +1,280 @@
+# ============================================================================
+# WRITE-BEHIND QUEUE - Batched background persistence of conversations
+# Path: backend/database/write_behind.py
+# ============================================================================
+
+from typing import Deque, Dict, List, Optional, Tuple
+from collections import OrderedDict, deque
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class WriteBehindQueue:
+    """
+    Buffers conversation_sessions / conversation_messages writes off the
+    request path and flushes them as multi-row inserts when the batch is
+    full or the flush interval elapses. Failed batches are retried; on
+    the last attempt the batch is bisected so only rows that fail on
+    their own are dropped.
+    """
+    
+    def __init__(
+        self,
+        batch_size: int = 50,
+        flush_interval: float = 0.5,
+        max_queue: int = 10000,
+        max_known_sessions: int = 100000,
+        max_attempts: int = 3
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.max_known_sessions = max_known_sessions
+        self.max_attempts = max_attempts
+        
+        # Session ids already persisted (or queued) - bounded, oldest dropped first
+        self._known_sessions: "OrderedDict[str, None]" = OrderedDict()
+        self._pending_sessions: Dict[str, int] = {}
+        # (row, attempts)
+        self._messages: Deque[Tuple[Dict, int]] = deque()
+        
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        
+        # Metrics
+        self.flushes = 0
+        self.rows_written = 0
+        self.sessions_written = 0
+        self.failures = 0
+        self.bisections = 0
+        self.dropped = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+    
+    # ------------------------------------------------------------------------
+    # Producer side (called on the request path - never blocks)
+    # ------------------------------------------------------------------------
+    
+    def enqueue_session(self, session_id: str):
+        """Queue session row unless it is already known"""
+        if session_id in self._known_sessions:
+            self._known_sessions.move_to_end(session_id)
+            return
+        
+        self._remember_session(session_id)
+        self._pending_sessions.setdefault(session_id, 0)
+    
+    def enqueue_message(self, session_id: str, sender: str, message: str):
+        """Queue conversation message row"""
+        if len(self._messages) >= self.max_queue:
+            self._messages.popleft()
+            self.dropped += 1
+        
+        self._messages.append(({
+            "session_id": session_id,
+            "sender": sender,
+            "message": message
+        }, 0))
+        
+        if len(self._messages) >= self.batch_size:
+            self._wakeup.set()
+    
+    def _remember_session(self, session_id: str):
+        self._known_sessions[session_id] = None
+        if len(self._known_sessions) > self.max_known_sessions:
+            self._known_sessions.popitem(last=False)
+    
+    # ------------------------------------------------------------------------
+    # Background writer
+    # ------------------------------------------------------------------------
+    
+    async def start(self):
+        """Start background flush task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            print("✅ Write-behind persistence started")
+    
+    async def stop(self):
+        """Stop background task and flush everything still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        # Drain remaining rows - never raise out of shutdown (the repository
+        # and HTTP clients still have to be closed after this)
+        try:
+            stalled = 0
+            while (self._pending_sessions or self._messages) and stalled < self.max_attempts:
+                stalled = 0 if await self.flush() else stalled + 1
+        except Exception as e:
+            print(f"⚠️  Write-behind drain failed: {e}")
+        
+        left = self.queue_depth()
+        if left:
+            self.dropped += left
+            print(f"⚠️  Write-behind persistence stopped - dropped {len(self._pending_sessions)} session(s) "
+                  f"and {len(self._messages)} message(s) that could not be written")
+            self._pending_sessions.clear()
+            self._messages.clear()
+        else:
+            print("✅ Write-behind persistence stopped (queue drained)")
+    
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"⚠️  Write-behind flush error: {e}")
+    
+    async def flush(self) -> int:
+        """Write one batch of sessions + messages; returns rows written"""
+        from database.repository import get_repository
+        
+        async with self._flush_lock:
+            if not self._pending_sessions and not self._messages:
+                return 0
+            
+            start = time.perf_counter()
+            try:
+                return await self._flush_batch(get_repository())
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                self.flushes += 1
+                self.last_flush_ms = elapsed_ms
+                self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+                self._total_flush_ms += elapsed_ms
+                
+                # More than one batch queued - keep going without waiting
+                if len(self._messages) >= self.batch_size:
+                    self._wakeup.set()
+    
+    async def _flush_batch(self, repo) -> int:
+        written = 0
+        
+        # Sessions first - messages reference them
+        if self._pending_sessions:
+            sessions = self._pending_sessions
+            self._pending_sessions = {}
+            try:
+                await repo.sessions.create_many(list(sessions))
+                self.sessions_written += len(sessions)
+                written += len(sessions)
+            except Exception as e:
+                self.failures += 1
+                print(f"⚠️  Could not persist {len(sessions)} session(s): {e}")
+                self._requeue_sessions(sessions)
+                # Messages would fail on the foreign key - retry next flush
+                return written
+        
+        batch: List[Tuple[Dict, int]] = []
+        while self._messages and len(batch) < self.batch_size:
+            batch.append(self._messages.popleft())
+        
+        if batch:
+            try:
+                await repo.messages.create_many([row for row, _ in batch])
+                self.rows_written += len(batch)
+                written += len(batch)
+            except Exception as e:
+                self.failures += 1
+                print(f"⚠️  Could not persist {len(batch)} message(s): {e}")
+                if any(attempts + 1 >= self.max_attempts for _, attempts in batch):
+                    # Last try - isolate the failing row(s) instead of dropping the batch
+                    isolated = await self._write_isolating(repo, [row for row, _ in batch])
+                    self.rows_written += isolated
+                    written += isolated
+                else:
+                    self._requeue_messages(batch)
+        
+        return written
+    
+    async def _write_isolating(self, repo, rows: List[Dict]) -> int:
+        """
+        Insert rows by bisecting the batch until the rows that fail on their
+        own are found (those are dropped); returns rows written
+        """
+        try:
+            await repo.messages.create_many(rows)
+            return len(rows)
+        except Exception as e:
+            if len(rows) == 1:
+                self.dropped += 1
+                print(f"⚠️  Dropping message for session {rows[0].get('session_id')}: {e}")
+                return 0
+        
+        self.bisections += 1
+        middle = len(rows) // 2
+        return await self._write_isolating(repo, rows[:middle]) + await self._write_isolating(repo, rows[middle:])
+    
+    def _requeue_sessions(self, sessions: Dict[str, int]):
+        given_up = set()
+        for session_id, attempts in sessions.items():
+            if attempts + 1 < self.max_attempts:
+                self._pending_sessions[session_id] = attempts + 1
+            else:
+                self.dropped += 1
+                self._known_sessions.pop(session_id, None)
+                given_up.add(session_id)
+        
+        if given_up:
+            # Their messages can never be written (foreign key) - count them as lost now
+            kept = deque(item for item in self._messages if item[0]["session_id"] not in given_up)
+            lost = len(self._messages) - len(kept)
+            self._messages = kept
+            self.dropped += lost
+            print(f"⚠️  Gave up on {len(given_up)} session(s) - dropped {lost} queued message(s)")
+    
+    def _requeue_messages(self, batch: List[Tuple[Dict, int]]):
+        # Put back at the front, preserving order
+        for row, attempts in reversed(batch):
+            if attempts + 1 < self.max_attempts:
+                self._messages.appendleft((row, attempts + 1))
+            else:
+                self.dropped += 1
+    
+    # ------------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------------
+    
+    def queue_depth(self) -> int:
+        return len(self._messages) + len(self._pending_sessions)
+    
+    def get_stats(self) -> Dict:
+        return {
+            "running": self._task is not None,
+            "queue_depth": self.queue_depth(),
+            "pending_messages": len(self._messages),
+            "pending_sessions": len(self._pending_sessions),
+            "known_sessions": len(self._known_sessions),
+            "flushes": self.flushes,
+            "messages_written": self.rows_written,
+            "sessions_written": self.sessions_written,
+            "failures": self.failures,
+            "bisections": self.bisections,
+            "dropped": self.dropped,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self._total_flush_ms / self.flushes, 2) if self.flushes else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 2)
+        }
+
+# Global write-behind queue instance
+persistence_queue = WriteBehindQueue(
+    batch_size=int(os.getenv("PERSIST_BATCH_SIZE", 50)),
+    flush_interval=float(os.getenv("PERSIST_FLUSH_INTERVAL", 0.5)),
+    max_queue=int(os.getenv("PERSIST_MAX_QUEUE", 10000))
+)
@@ -3,12 +3,16 @@
 # Path: backend/main.py
 # ============================================================================
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from typing import Optional, List, Dict
 from datetime import datetime
 from contextlib import asynccontextmanager
+import asyncio
+import json
 import os
 from dotenv import load_dotenv
 
@@ -27,9 +31,32 @@ async def lifespan(app: FastAPI):
     agent = LoanAgent()
     print("✅ Loan Agent initialized")
     
+    from database.write_behind import persistence_queue
+    await persistence_queue.start()
+    
+    # Expired sessions are evicted in the background, not only on /api/sessions/cleanup
+    from utils.session_manager import session_manager
+    await session_manager.start()
+    
+    # In-process BM25 + optional vector index (RAG_LOCAL_INDEX=exact|ivf)
+    try:
+        from rag.retriever import load_local_indexes
+        await load_local_indexes()
+    except Exception as e:
+        print(f"⚠️  Local knowledge indexes not loaded, using pgvector RPC only: {e}")
+    
     yield
     
     # Shutdown (cleanup if needed)
+    await session_manager.stop()
+    await persistence_queue.stop()
+    
+    from database.repository import close_repository
+    await close_repository()
+    
+    from utils.api_key_rotator import groq_key_rotator
+    if groq_key_rotator:
+        await groq_key_rotator.aclose()
     print("👋 Shutting down...")
 
 # Initialize FastAPI with lifespan
@@ -79,15 +106,19 @@ async def chat(request: ChatRequest):
     Chat with the AI agent
     Uses in-memory session storage for conversation history
     """
+    from utils.concurrency import chat_governor, AdmissionRejected
+    
     try:
         start_time = datetime.now()
         
-        # Process message through agent (agent handles session management)
-        result = await agent.invoke(
-            message=request.message,
-            session_id=request.session_id
-            # No need to pass conversation_history - agent gets it from memory
-        )
+        # Bounded concurrency; turns of one session run in order
+        async with chat_governor.admit(request.session_id):
+            # Process message through agent (agent handles session management)
+            result = await agent.invoke(
+                message=request.message,
+                session_id=request.session_id
+                # No need to pass conversation_history - agent gets it from memory
+            )
         
         # Calculate response time
         end_time = datetime.now()
@@ -98,9 +129,13 @@ async def chat(request: ChatRequest):
             "response": result.get("response"),
             "session_id": result.get("session_id"),
             "tools_used": result.get("tools_used", []),
+            "cached": result.get("cached", False),
+            "intent": result.get("intent"),
             "response_time_ms": response_time
         }
-        
+    
+    except AdmissionRejected as e:
+        return _busy_response(e)
     except Exception as e:
         print(f"❌ Chat endpoint error: {e}")
         return {
@@ -109,13 +144,133 @@ async def chat(request: ChatRequest):
             "response": "I apologize, but I encountered an error processing your request."
         }
 
+def _busy_response(rejection) -> JSONResponse:
+    """429 with Retry-After for requests turned away by admission control"""
+    return JSONResponse(
+        status_code=429,
+        headers={"Retry-After": str(rejection.retry_after)},
+        content={
+            "success": False,
+            "error": rejection.reason,
+            "retry_after": rejection.retry_after,
+            "response": "We're handling a lot of requests right now. Please try again in a moment."
+        }
+    )
+
+def _sse_event(event: str, data: Dict) -> str:
+    """Format a single Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Chat with the AI agent, streaming the run as Server-Sent Events
+    Events: session, token, tool_start, tool_end, done, error
+    """
+    from utils.concurrency import chat_governor, AdmissionRejected
+    
+    start_time = datetime.now()
+    
+    # Admit before the stream starts so overload can still be a plain 429
+    try:
+        ticket = await chat_governor.acquire(request.session_id)
+    except AdmissionRejected as e:
+        return _busy_response(e)
+    
+    async def event_generator():
+        try:
+            async for item in agent.invoke_stream(
+                message=request.message,
+                session_id=request.session_id
+            ):
+                data = item["data"]
+                
+                if item["event"] in ("done", "error"):
+                    end_time = datetime.now()
+                    data["response_time_ms"] = int((end_time - start_time).total_seconds() * 1000)
+                
+                yield _sse_event(item["event"], data)
+        
+        except Exception as e:
+            print(f"❌ Chat stream endpoint error: {e}")
+            yield _sse_event("error", {
+                "error": str(e),
+                "response": "I apologize, but I encountered an error processing your request."
+            })
+        finally:
+            ticket.release()
+    
+    return StreamingResponse(
+        event_generator(),
+        background=BackgroundTask(ticket.release),  # Also runs if the client disconnects early
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+@app.post("/api/prequalify/bulk")
+async def bulk_prequalify(file: UploadFile = File(...), format: Optional[str] = None):
+    """
+    Pre-qualify a partner lead file without the LLM
+    CSV or JSONL rows: pan, monthly_income, employment_type
+    (optional: loan_amount, tenure, existing_emi)
+    Streams NDJSON: one result per row as it completes, progress lines,
+    then a summary
+    """
+    from utils.prequalification import bulk_prequalifier, bulk_governor, detect_format, spool_upload
+    from utils.concurrency import AdmissionRejected
+    
+    try:
+        fmt = detect_format(file.filename, format)
+    except ValueError as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+    
+    # Limited number of concurrent jobs, no queueing
+    try:
+        ticket = await bulk_governor.acquire()
+    except AdmissionRejected as e:
+        return _busy_response(e)
+    
+    try:
+        # Stream from our own copy - the upload is closed once this handler returns
+        spool = await asyncio.to_thread(spool_upload, file.file)
+    except Exception as e:
+        ticket.release()
+        print(f"❌ Bulk pre-qualification upload error: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+    
+    async def ndjson_generator():
+        try:
+            async for line in bulk_prequalifier.run(spool, fmt):
+                yield line
+        finally:
+            ticket.release()
+    
+    return StreamingResponse(
+        ndjson_generator(),
+        background=BackgroundTask(ticket.release),  # Also runs if the client disconnects early
+        media_type="application/x-ndjson",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
 @app.get("/api/session/{session_id}")
 async def get_session(session_id: str):
     """Get session details and message history from memory"""
     try:
         from utils.session_manager import session_manager
         
-        session = session_manager.get_session(session_id)
+        session = await session_manager.get_session(session_id)
         
         if not session:
             return {
@@ -128,10 +283,11 @@ async def get_session(session_id: str):
             "session_id": session_id,
             "messages": session.get("messages", []),
             "customer_data": session.get("customer_data", {}),
+            "summary": session.get("summary", {}).get("text", ""),
             "created_at": session.get("created_at").isoformat(),
             "last_activity": session.get("last_activity").isoformat()
         }
-        
+    
     except Exception as e:
         print(f"❌ Get session error: {e}")
         return {
@@ -145,13 +301,13 @@ async def clear_session(request: SessionClearRequest):
     try:
         from utils.session_manager import session_manager
         
-        session_manager.clear_session(request.session_id)
+        await session_manager.clear_session(request.session_id)
         
         return {
             "success": True,
             "message": f"Session {request.session_id} cleared"
         }
-        
+    
     except Exception as e:
         print(f"❌ Clear session error: {e}")
         return {
@@ -165,14 +321,14 @@ async def cleanup_inactive_sessions():
     try:
         from utils.session_manager import session_manager
         
-        removed_count = session_manager.cleanup_inactive_sessions()
+        removed_count = await session_manager.cleanup_inactive_sessions()
         
         return {
             "success": True,
             "removed_sessions": removed_count,
-            "active_sessions": session_manager.get_active_sessions_count()
+            "active_sessions": await session_manager.get_active_sessions_count()
         }
-        
+    
     except Exception as e:
         print(f"❌ Cleanup error: {e}")
         return {
@@ -185,12 +341,16 @@ async def session_stats():
     """Get session statistics"""
     try:
         from utils.session_manager import session_manager
+        from agents.history import history_manager
+        
+        stats = await session_manager.get_stats()
         
         return {
             "success": True,
-            "active_sessions": session_manager.get_active_sessions_count()
+            **stats,
+            "history": history_manager.get_stats()
         }
-        
+    
     except Exception as e:
         print(f"❌ Stats error: {e}")
         return {
@@ -198,59 +358,323 @@ async def session_stats():
             "error": str(e)
         }
 
-@app.post("/api/embed-knowledge")
-async def embed_knowledge():
-    """
-    ONE-TIME: Embed knowledge base into pgvector
-    """
+@app.get("/api/persistence/stats")
+async def persistence_stats():
+    """Get write-behind persistence queue statistics"""
     try:
-        from rag.embeddings import GeminiEmbeddings
-        from database.supabase_client import get_supabase_client
-        import uuid
+        from database.write_behind import persistence_queue
         
-        print("\n📄 Reading knowledge base...")
+        return {
+            "success": True,
+            **persistence_queue.get_stats()
+        }
+    
+    except Exception as e:
+        print(f"❌ Persistence stats error: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+@app.get("/api/rag/stats")
+async def rag_stats():
+    """Get knowledge retriever cache statistics"""
+    try:
+        from rag.retriever import get_retriever
         
-        # Read knowledge base
-        with open("../knowledge_base.md", "r") as f:
-            content = f.read()
+        return {
+            "success": True,
+            **get_retriever().get_stats()
+        }
+    
+    except Exception as e:
+        print(f"❌ RAG stats error: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+@app.get("/api/tokens/stats")
+async def token_stats():
+    """Get prompt/output token breakdown aggregated over all agent turns"""
+    try:
+        from agents.token_accounting import token_profiler
         
-        # Split into chunks (simple chunking by paragraphs)
-        paragraphs = content.split("\n\n")
-        chunks = [p.strip() for p in paragraphs if p.strip() and len(p.strip()) > 50]
+        return {
+            "success": True,
+            **token_profiler.get_stats()
+        }
+    
+    except Exception as e:
+        print(f"❌ Token stats error: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+@app.get("/api/tokens/stats/{session_id}")
+async def session_token_stats(session_id: str):
+    """Get prompt/output token breakdown for one session"""
+    try:
+        from agents.token_accounting import token_profiler
         
-        print(f"✂️  Created {len(chunks)} chunks")
+        stats = token_profiler.get_session_stats(session_id)
         
-        # Initialize embedder
-        embedder = GeminiEmbeddings()
-        supabase = get_supabase_client()
+        if stats is None:
+            return {
+                "success": False,
+                "error": "No token usage recorded for this session"
+            }
         
-        # Clear existing embeddings
-        print("🗑️  Clearing old embeddings...")
-        supabase.table("knowledge_base_embeddings").delete().neq("id", "00000000-0000-0000-0000-000000000000").execute()
+        return {
+            "success": True,
+            "session_id": session_id,
+            **stats
+        }
+    
+    except Exception as e:
+        print(f"❌ Session token stats error: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+@app.get("/api/concurrency/stats")
+async def concurrency_stats():
+    """Get chat admission control statistics (in-flight, queue, wait times)"""
+    try:
+        from utils.concurrency import chat_governor
         
-        # Embed and store each chunk
-        for i, chunk in enumerate(chunks):
-            print(f"🔄 Embedding chunk {i+1}/{len(chunks)}")
-            
-            # Create embedding
-            embedding = embedder.embed_text(chunk)
-            
-            # Store in database
-            supabase.table("knowledge_base_embeddings").insert({
-                "id": str(uuid.uuid4()),
-                "content": chunk,
-                "embedding": embedding,
-                "metadata": {"chunk_index": i}
-            }).execute()
+        return {
+            "success": True,
+            **chat_governor.get_stats()
+        }
+    
+    except Exception as e:
+        print(f"❌ Concurrency stats error: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+@app.get("/api/keys/stats")
+async def key_scheduler_stats():
+    """Get per-key Groq rate-limit state (keys shown by label only)"""
+    try:
+        from utils.api_key_rotator import groq_key_rotator
         
-        print("✅ Knowledge base embedded successfully!")
+        if groq_key_rotator is None:
+            return {"success": True, "enabled": False}
         
         return {
             "success": True,
-            "chunks_embedded": len(chunks),
-            "message": "Knowledge base embedded successfully"
+            "enabled": True,
+            **groq_key_rotator.get_stats()
         }
+    
+    except Exception as e:
+        print(f"❌ Key stats error: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+@app.get("/api/executor-pool/stats")
+async def executor_pool_stats():
+    """Get agent executor pool statistics"""
+    try:
+        if agent is None:
+            raise HTTPException(status_code=503, detail="Agent not initialized")
+        
+        return {
+            "success": True,
+            **agent.executor_pool.get_stats()
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Executor pool stats error: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+@app.get("/api/response-cache/stats")
+async def response_cache_stats():
+    """Get semantic response cache statistics"""
+    try:
+        from agents.response_cache import response_cache
+        
+        if response_cache is None:
+            return {"success": True, "enabled": False}
+        
+        return {
+            "success": True,
+            "enabled": True,
+            **response_cache.get_stats()
+        }
+    
+    except Exception as e:
+        print(f"❌ Response cache stats error: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+@app.get("/api/intent-router/stats")
+async def intent_router_stats():
+    """Get deterministic intent router statistics"""
+    try:
+        from agents.intent_router import intent_router
         
+        if intent_router is None:
+            return {"success": True, "enabled": False}
+        
+        return {
+            "success": True,
+            "enabled": True,
+            **intent_router.get_stats()
+        }
+    
+    except Exception as e:
+        print(f"❌ Intent router stats error: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+@app.get("/api/prefetch/stats")
+async def prefetch_stats():
+    """Get speculative PAN lookup prefetch statistics"""
+    try:
+        from agents.prefetch import lookup_prefetcher
+        
+        return {
+            "success": True,
+            **lookup_prefetcher.get_stats()
+        }
+    
+    except Exception as e:
+        print(f"❌ Prefetch stats error: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+@app.get("/api/prequalify/stats")
+async def prequalify_stats():
+    """Get bulk pre-qualification statistics"""
+    try:
+        from utils.prequalification import bulk_prequalifier, bulk_governor
+        
+        return {
+            "success": True,
+            **bulk_prequalifier.get_stats(),
+            "jobs_running": bulk_governor.get_stats()["in_flight"]
+        }
+    
+    except Exception as e:
+        print(f"❌ Prequalify stats error: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+@app.get("/api/bureau-cache/stats")
+async def bureau_cache_stats():
+    """Get KYC / credit bureau cache statistics"""
+    try:
+        from utils.bureau_cache import bureau_cache
+        
+        return {
+            "success": True,
+            **bureau_cache.get_stats()
+        }
+    
+    except Exception as e:
+        print(f"❌ Bureau cache stats error: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+@app.get("/api/policy/stats")
+async def policy_stats():
+    """Get underwriting policy version, reload status and per-rule evaluation timing"""
+    try:
+        from utils.policy_engine import policy_engine
+        
+        return {
+            "success": True,
+            **policy_engine.get_stats()
+        }
+    
+    except Exception as e:
+        print(f"❌ Policy stats error: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+@app.post("/api/policy/reload")
+async def reload_policy():
+    """
+    Recompile the underwriting policy file now (it is also picked up
+    automatically within POLICY_RELOAD_INTERVAL seconds of a change)
+    An invalid policy is rejected and the active one stays in place
+    """
+    try:
+        from utils.policy_engine import policy_engine
+        
+        policy_engine.reload()
+        
+        return {
+            "success": True,
+            "version": policy_engine.policy.version,
+            "message": "Underwriting policy reloaded"
+        }
+    
+    except Exception as e:
+        print(f"❌ Policy reload error: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+@app.post("/api/embed-knowledge")
+async def embed_knowledge(dry_run: bool = False):
+    """
+    Embed knowledge base into pgvector incrementally
+    Only new/changed chunks are embedded; dry_run=true returns the diff only
+    """
+    try:
+        from rag.embeddings import embed_knowledge_base
+        
+        # Chunk knowledge base, embed new/changed chunks, drop removed ones
+        report = await embed_knowledge_base(dry_run=dry_run)
+        
+        if dry_run:
+            return {
+                "success": True,
+                **report,
+                "message": "Dry run - no changes applied"
+            }
+        
+        # Cached contexts, answers and the local indexes refer to the old chunks
+        from rag.retriever import get_retriever, load_local_indexes
+        from agents.response_cache import response_cache
+        get_retriever().invalidate_cache()
+        if response_cache is not None:
+            response_cache.invalidate()
+        await load_local_indexes()
+        
+        return {
+            "success": True,
+            **report,
+            "message": "Knowledge base embedded successfully"
+        }
+    
     except Exception as e:
         print(f"❌ Embedding error: {e}")
         return {
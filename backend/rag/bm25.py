@@ -0,0 +1,115 @@
+# ============================================================================
+# BM25 INDEX - In-memory lexical search over knowledge base chunks
+# Path: backend/rag/bm25.py
+# ============================================================================
+
+from typing import Dict, FrozenSet, List, Sequence, Tuple
+from collections import Counter
+import math
+import re
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a about am an and any are as at be can could do does for from get give have
+how i if in is it me much my need of on or please should tell the there this
+to us want was we what whats when where which will with would you your
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords"""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+def split_heading(content: str) -> Tuple[str, str]:
+    """
+    (heading path, body) of a chunk. The chunker puts the heading path
+    ("Section > Subsection") on the first line of every chunk that has one
+    """
+    heading, newline, body = content.partition("\n")
+    return (heading, body) if newline else ("", content)
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index (term -> [(doc, term frequency)])
+    Heading paths are scored with the body but do not count as coverage -
+    every chunk repeats the document title and its section names
+    """
+    
+    def __init__(self, rows: Sequence[Dict], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids = [row.get("id") for row in rows]
+        self.contents = [row.get("content", "") for row in rows]
+        self.metadatas = [row.get("metadata") or {} for row in rows]
+        
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.doc_lengths: List[int] = []
+        self.body_terms: List[FrozenSet[str]] = []
+        
+        for doc, content in enumerate(self.contents):
+            heading, body = split_heading(content)
+            body_terms = tokenize(body)
+            terms = tokenize(heading) + body_terms
+            self.doc_lengths.append(len(terms))
+            self.body_terms.append(frozenset(body_terms))
+            for term, tf in Counter(terms).items():
+                self.postings.setdefault(term, []).append((doc, tf))
+        
+        n = len(self.contents)
+        self.avg_doc_length = (sum(self.doc_lengths) / n) if n else 0.0
+        self._norm_length = self.avg_doc_length or 1.0
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+        # Unknown query terms count as maximally rare when scoring confidence
+        self.max_idf = math.log(1 + (n + 0.5) / 0.5) if n else 0.0
+    
+    def __len__(self) -> int:
+        return len(self.contents)
+    
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[int, float, float]]:
+        """
+        Returns [(doc, bm25 score, confidence)] best first
+        confidence = idf-weighted share of the query terms found in the doc
+        body (heading path excluded)
+        """
+        terms = set(tokenize(query))
+        if not terms or not self.contents:
+            return []
+        
+        scores: Dict[int, float] = {}
+        matched_idf: Dict[int, float] = {}
+        
+        for term in terms:
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc] / self._norm_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+                if term in self.body_terms[doc]:
+                    matched_idf[doc] = matched_idf.get(doc, 0.0) + idf
+        
+        total_idf = sum(self.idf.get(term, self.max_idf) for term in terms)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        
+        return [
+            (doc, score, matched_idf.get(doc, 0.0) / total_idf if total_idf else 0.0)
+            for doc, score in ranked
+        ]
+    
+    def to_result(self, doc: int, score: float) -> Dict:
+        return {
+            "id": self.ids[doc],
+            "content": self.contents[doc],
+            "metadata": self.metadatas[doc],
+            "similarity": score
+        }
+    
+    def get_stats(self) -> Dict:
+        return {
+            "documents": len(self),
+            "terms": len(self.postings),
+            "avg_doc_length": round(self.avg_doc_length, 1)
+        }
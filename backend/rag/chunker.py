@@ -0,0 +1,94 @@
+# ============================================================================
+# STREAMING CHUNKER - Heading-aware, token-sized chunks in one pass
+# Path: backend/rag/chunker.py
+# ============================================================================
+
+from typing import Deque, Iterable, Iterator, List, Tuple
+from collections import deque
+import io
+import re
+from utils.tokens import estimate_tokens
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*\S)\s*$")
+RULE_PATTERN = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+
+def iter_chunks(
+    lines: Iterable[str],
+    max_tokens: int = 128,
+    overlap_tokens: int = 24,
+    min_tokens: int = 5
+) -> Iterator[str]:
+    """
+    Split markdown into overlapping chunks while reading it line by line
+    
+    - Accepts any iterable of lines (open file, StringIO, generator)
+    - Chunks hold up to ~max_tokens of body text; consecutive chunks of the
+      same section share ~overlap_tokens
+    - Each chunk is prefixed with its heading path ("Section > Subsection")
+    - Runs in linear time: token counts are kept as a running sum over a
+      sliding window instead of being recomputed per chunk
+    """
+    headings: List[Tuple[int, str]] = []  # (level, title)
+    window: Deque[Tuple[str, int]] = deque()
+    window_tokens = 0
+    fresh = 0  # words added since last emitted chunk
+    
+    def render() -> str:
+        body = " ".join(word for word, _ in window).replace("\n ", "\n").strip()
+        if not headings:
+            return body
+        return f"{' > '.join(title for _, title in headings)}\n{body}"
+    
+    for line in lines:
+        heading = HEADING_PATTERN.match(line)
+        
+        if heading:
+            # Close current section
+            if fresh and window_tokens >= min_tokens:
+                yield render()
+            window.clear()
+            window_tokens = 0
+            fresh = 0
+            
+            level = len(heading.group(1))
+            while headings and headings[-1][0] >= level:
+                headings.pop()
+            headings.append((level, heading.group(2)))
+            continue
+        
+        if RULE_PATTERN.match(line):
+            continue
+        
+        words = line.split()
+        if not words:
+            continue
+        words[-1] += "\n"
+        
+        for word in words:
+            tokens = estimate_tokens(word)
+            window.append((word, tokens))
+            window_tokens += tokens
+            fresh += 1
+            
+            if window_tokens >= max_tokens:
+                yield render()
+                fresh = 0
+                # Slide window: keep only the overlap tail
+                while window and window_tokens > overlap_tokens:
+                    window_tokens -= window.popleft()[1]
+    
+    if fresh and window_tokens >= min_tokens:
+        yield render()
+
+def chunk_text(text: str, max_tokens: int = 128, overlap_tokens: int = 24) -> List[str]:
+    """
+    Chunk an in-memory string
+    """
+    return list(iter_chunks(io.StringIO(text), max_tokens, overlap_tokens))
+
+def chunk_file(path: str, max_tokens: int = 128, overlap_tokens: int = 24) -> List[str]:
+    """
+    Chunk a file without loading it into memory
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return list(iter_chunks(f, max_tokens, overlap_tokens))
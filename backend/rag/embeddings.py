@@ -4,8 +4,11 @@
 # ============================================================================
 
 import google.generativeai as genai
-from typing import List
+from google.api_core import exceptions as google_exceptions
+from typing import Dict, List, Optional
+import asyncio
 import os
+import random
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,6 +16,29 @@ load_dotenv()
 # Configure Gemini
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
+# Errors worth retrying with backoff (rate limits and transient server issues)
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+)
+
+class EmbeddingBatchResult:
+    """
+    Result of embed_batch - embeddings[i] is None when texts[i] failed
+    """
+    
+    def __init__(self, size: int):
+        self.embeddings: List[Optional[List[float]]] = [None] * size
+        self.failures: Dict[int, str] = {}
+        self.api_calls = 0
+        self.retries = 0
+    
+    @property
+    def succeeded(self) -> int:
+        return len(self.embeddings) - len(self.failures)
+
 class GeminiEmbeddings:
     """
     Wrapper for Google Gemini embeddings
@@ -48,107 +74,81 @@ class GeminiEmbeddings:
             print(f"❌ Query embedding error: {e}")
             return [0.0] * self.dimensions
     
-    def embed_batch(self, texts: List[str]) -> List[List[float]]:
-        """Embed multiple texts"""
-        embeddings = []
-        for i, text in enumerate(texts):
-            print(f"Embedding {i+1}/{len(texts)}")
-            emb = self.embed_text(text)
-            embeddings.append(emb)
-        return embeddings
+    async def embed_batch(
+        self,
+        texts: List[str],
+        batch_size: int = 100,
+        max_concurrency: int = 4,
+        max_retries: int = 5,
+        task_type: str = "retrieval_document"
+    ) -> EmbeddingBatchResult:
+        """
+        Embed many texts using Gemini batch requests
+        Up to `max_concurrency` batches are in flight; rate-limited or transient
+        failures are retried with exponential backoff. Texts that still fail are
+        reported in result.failures instead of being replaced with zero vectors.
+        """
+        result = EmbeddingBatchResult(len(texts))
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def run_batch(start: int):
+            batch = texts[start:start + batch_size]
+            
+            async with semaphore:
+                for attempt in range(max_retries + 1):
+                    try:
+                        result.api_calls += 1
+                        response = await asyncio.to_thread(
+                            genai.embed_content,
+                            model=self.model,
+                            content=batch,
+                            task_type=task_type
+                        )
+                        for offset, embedding in enumerate(response["embedding"]):
+                            result.embeddings[start + offset] = embedding
+                        return
+                    except RETRYABLE_ERRORS as e:
+                        if attempt == max_retries:
+                            error = f"Gave up after {max_retries} retries: {e}"
+                            break
+                        result.retries += 1
+                        delay = min(30.0, 2 ** attempt) + random.uniform(0, 1)
+                        print(f"⏳ Embedding batch at {start} throttled, retrying in {delay:.1f}s")
+                        await asyncio.sleep(delay)
+                    except Exception as e:
+                        error = str(e)
+                        break
+            
+            print(f"❌ Embedding batch {start}-{start + len(batch) - 1} failed: {error}")
+            for offset in range(len(batch)):
+                result.failures[start + offset] = error
+        
+        await asyncio.gather(*(run_batch(start) for start in range(0, len(texts), batch_size)))
+        
+        return result
 
 # ============================================================================
 # KNOWLEDGE BASE EMBEDDING
 # ============================================================================
 
-def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
+async def embed_knowledge_base(dry_run: bool = False):
     """
-    Split text into overlapping chunks
+    Embed knowledge base incrementally
+    Chunks the knowledge_base.md file and embeds only new/changed chunks
     """
-    # Split by sections (##)
-    sections = text.split("##")
-    
-    chunks = []
-    for section in sections:
-        section = section.strip()
-        if not section:
-            continue
-        
-        # If section is small enough, keep as one chunk
-        if len(section) <= chunk_size:
-            chunks.append(section)
-        else:
-            # Split large sections by words
-            words = section.split()
-            current_chunk = []
-            current_length = 0
-            
-            for word in words:
-                current_chunk.append(word)
-                current_length += len(word) + 1
-                
-                if current_length >= chunk_size:
-                    chunks.append(" ".join(current_chunk))
-                    # Keep overlap
-                    current_chunk = current_chunk[-overlap:] if len(current_chunk) > overlap else current_chunk
-                    current_length = sum(len(w) + 1 for w in current_chunk)
-            
-            if current_chunk:
-                chunks.append(" ".join(current_chunk))
-    
-    return chunks
-
-async def embed_knowledge_base():
-    """
-    One-time function to embed knowledge base
-    Chunks the knowledge_base.md file and stores embeddings
-    """
-    from database.supabase_client import get_supabase_client
-    import uuid
+    from rag.chunker import chunk_file
+    from rag.indexer import reindex_chunks
     
     print("📄 Reading knowledge base...")
     
-    # Read knowledge base
-    with open("../knowledge_base.md", "r", encoding="utf-8") as f:
-        content = f.read()
-    
-    # Chunk the content
-    chunks = chunk_text(content, chunk_size=500, overlap=50)
+    # Stream-chunk the file (heading-aware, token-sized, overlapping)
+    chunks = chunk_file("../knowledge_base.md")
     
     print(f"✂️  Created {len(chunks)} chunks")
     
-    # Initialize embedder
-    embedder = GeminiEmbeddings()
-    
-    # Get Supabase client
-    supabase = get_supabase_client()
-    
-    # Clear existing embeddings
-    print("🗑️  Clearing old embeddings...")
-    supabase.table("knowledge_base_embeddings").delete().neq("id", "00000000-0000-0000-0000-000000000000").execute()
-    
-    # Embed each chunk
-    for i, chunk in enumerate(chunks):
-        print(f"🔄 Embedding chunk {i+1}/{len(chunks)}")
-        
-        # Create embedding
-        embedding = embedder.embed_text(chunk)
-        
-        # Store in Supabase
-        try:
-            supabase.table("knowledge_base_embeddings").insert({
-                "id": str(uuid.uuid4()),
-                "content": chunk,
-                "embedding": embedding,
-                "metadata": {
-                    "chunk_index": i,
-                    "total_chunks": len(chunks)
-                }
-            }).execute()
-        except Exception as e:
-            print(f"❌ Error storing chunk {i}: {e}")
-            continue
+    report = await reindex_chunks(chunks, dry_run=dry_run)
     
-    print("✅ Knowledge base embedded successfully!")
+    if not dry_run:
+        print("✅ Knowledge base embedded successfully!")
     
-    return {"total_chunks": len(chunks)}
\ No newline at end of file
+    return report
@@ -0,0 +1,194 @@
+# ============================================================================
+# KNOWLEDGE BASE INDEXER - Incremental, content-hashed re-indexing
+# Path: backend/rag/indexer.py
+# ============================================================================
+
+from typing import Dict, List, Optional
+import hashlib
+import time
+import uuid
+from rag.embeddings import GeminiEmbeddings
+
+def content_hash(chunk: str) -> str:
+    """Stable identity of a chunk - SHA-256 of its text"""
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+def chunk_metadata(chunks: List[str], i: int) -> Dict:
+    """Metadata stored with chunk `i` of the document"""
+    return {
+        "chunk_index": i,
+        "total_chunks": len(chunks),
+        "content_hash": content_hash(chunks[i])
+    }
+
+class ReindexPlan:
+    """
+    Diff between the chunks we want and the rows already stored
+    """
+    
+    def __init__(self, chunks: List[str], existing_rows: List[Dict]):
+        self.chunks = chunks
+        
+        # Manifest: content hash -> stored row ids (rows from before hashing
+        # was introduced are hashed from their content)
+        manifest: Dict[str, List[str]] = {}
+        for row in existing_rows:
+            metadata = row.get("metadata") or {}
+            digest = metadata.get("content_hash") or content_hash(row.get("content", ""))
+            manifest.setdefault(digest, []).append(row["id"])
+        
+        # Desired chunks in document order, duplicates collapsed
+        self.desired: Dict[str, int] = {}
+        for i, chunk in enumerate(chunks):
+            self.desired.setdefault(content_hash(chunk), i)
+        
+        self.to_add: List[int] = [i for digest, i in self.desired.items() if digest not in manifest]
+        self.unchanged: int = len(self.desired) - len(self.to_add)
+        
+        # Kept rows whose chunk_index/total_chunks moved with the edit
+        metadatas = {row["id"]: row.get("metadata") or {} for row in existing_rows}
+        self.to_renumber: List[Dict] = []
+        for digest, i in self.desired.items():
+            if digest not in manifest:
+                continue
+            kept_id = manifest[digest][0]
+            stored = metadatas[kept_id]
+            metadata = {**stored, **chunk_metadata(chunks, i)}
+            if metadata != stored:
+                self.to_renumber.append({"id": kept_id, "metadata": metadata})
+        
+        # Removed chunks plus duplicate rows of kept chunks
+        self.to_delete: List[str] = []
+        self._deleted_previews: List[str] = []
+        contents = {row["id"]: row.get("content", "") for row in existing_rows}
+        for digest, ids in manifest.items():
+            stale = ids if digest not in self.desired else ids[1:]
+            self.to_delete.extend(stale)
+            self._deleted_previews.extend(contents[i] for i in stale)
+    
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.to_add or self.to_delete or self.to_renumber)
+    
+    def report(self, preview_chars: int = 80) -> Dict:
+        return {
+            "total_chunks": len(self.chunks),
+            "unique_chunks": len(self.desired),
+            "unchanged": self.unchanged,
+            "to_add": len(self.to_add),
+            "to_delete": len(self.to_delete),
+            "to_renumber": len(self.to_renumber),
+            "added_preview": [self.chunks[i][:preview_chars] for i in self.to_add],
+            "deleted_preview": [content[:preview_chars] for content in self._deleted_previews]
+        }
+
+async def plan_reindex(chunks: List[str]) -> ReindexPlan:
+    """Compare chunks against knowledge_base_embeddings (no writes)"""
+    from database.repository import get_repository
+    
+    existing_rows = await get_repository().knowledge_base.list_chunks()
+    return ReindexPlan(chunks, existing_rows)
+
+async def _swap_in(knowledge_base, rows: List[Dict], stale_ids: List[str], kept_metadata: List[Dict]) -> bool:
+    """
+    Stage new rows in batches, then swap them in with one reindex_knowledge
+    call. False (nothing changed) if the staging table or function is
+    missing; staged rows are discarded if anything fails
+    """
+    from database.repository import RepositoryError
+    
+    reindex_id = str(uuid.uuid4())
+    try:
+        await knowledge_base.stage_chunks(reindex_id, rows)
+        await knowledge_base.swap_chunks(reindex_id, stale_ids, kept_metadata)
+        return True
+    except Exception as e:
+        missing = isinstance(e, RepositoryError) and e.status_code == 404
+        try:
+            await knowledge_base.discard_staged(reindex_id)
+        except Exception as cleanup_error:
+            # Left for reindex_knowledge to purge after a day
+            if not missing:
+                print(f"⚠️  Could not discard staged rows of re-index {reindex_id}: {cleanup_error}")
+        if missing:
+            return False
+        raise
+
+async def reindex_chunks(
+    chunks: List[str],
+    dry_run: bool = False,
+    embedder: Optional[GeminiEmbeddings] = None
+) -> Dict:
+    """
+    Bring knowledge_base_embeddings in line with `chunks`
+    Only new/changed chunks are embedded. New rows are staged in batches,
+    then inserts, re-numbering of kept rows and deletions are applied in
+    one transaction by the reindex_knowledge function
+    (database/reindex_knowledge.sql), so retrieval sees either the old or
+    the new chunk set. Without the function the steps run one after
+    another (report["atomic"] = False).
+    Deletions are skipped if any chunk failed to embed.
+    """
+    from database.repository import get_repository
+    
+    start = time.perf_counter()
+    plan = await plan_reindex(chunks)
+    report = plan.report()
+    report["dry_run"] = dry_run
+    
+    print(f"🧮 Re-index plan: {plan.unchanged} unchanged, {len(plan.to_add)} to add, "
+          f"{len(plan.to_delete)} to delete, {len(plan.to_renumber)} to re-number")
+    
+    if dry_run or not plan.has_changes:
+        report.update({"chunks_embedded": 0, "chunks_renumbered": 0, "chunks_deleted": 0, "failed_chunks": []})
+        report["elapsed_seconds"] = round(time.perf_counter() - start, 2)
+        return report
+    
+    repo = get_repository()
+    embedder = embedder or GeminiEmbeddings()
+    
+    result = await embedder.embed_batch([chunks[i] for i in plan.to_add])
+    
+    if plan.to_add and result.succeeded == 0:
+        raise RuntimeError(f"All {len(plan.to_add)} new chunks failed to embed: {next(iter(result.failures.values()))}")
+    
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "content": chunks[i],
+            "embedding": embedding,
+            "metadata": chunk_metadata(chunks, i)
+        }
+        for i, embedding in zip(plan.to_add, result.embeddings)
+        if embedding is not None
+    ]
+    
+    stale_ids = plan.to_delete
+    if result.failures:
+        print(f"⚠️  {len(result.failures)} chunk(s) failed to embed - keeping old rows")
+        stale_ids = []
+    
+    atomic = await _swap_in(repo.knowledge_base, rows, stale_ids, plan.to_renumber)
+    if not atomic:
+        # Staging table / function not installed - 1. add new chunks  2. re-number  3. drop removed ones
+        print("⚠️  reindex_knowledge function or staging table missing - applying re-index non-atomically")
+        await repo.knowledge_base.insert_many(rows)
+        for row in plan.to_renumber:
+            await repo.knowledge_base.update_metadata(row["id"], row["metadata"])
+        await repo.knowledge_base.delete_by_ids(stale_ids)
+    
+    report.update({
+        "atomic": atomic,
+        "chunks_embedded": len(rows),
+        "chunks_renumbered": len(plan.to_renumber),
+        "chunks_deleted": len(stale_ids),
+        "failed_chunks": [
+            {"chunk_index": plan.to_add[pos], "error": error}
+            for pos, error in sorted(result.failures.items())
+        ],
+        "embedding_api_calls": result.api_calls,
+        "embedding_retries": result.retries,
+        "elapsed_seconds": round(time.perf_counter() - start, 2)
+    })
+    
+    return report
@@ -3,38 +3,203 @@
 # Path: backend/rag/retriever.py
 # ============================================================================
 
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+import os
+import re
+import threading
+import time
 from database.supabase_client import get_supabase_client
 from rag.embeddings import GeminiEmbeddings
+from rag.bm25 import BM25Index
+from rag.vector_index import ExactVectorIndex
+from utils.ttl_cache import TTLCache
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize query text for cache keys (case, whitespace, trailing punctuation)
+    """
+    query = re.sub(r"\s+", " ", query.lower()).strip()
+    return query.strip(" ?!.,;:")
 
 class KnowledgeRetriever:
     """
     Semantic search using Gemini embeddings + Supabase pgvector
+    (or an optional in-process vector index loaded at startup)
+    With a BM25 index loaded, lexical and vector scores are fused and
+    confident keyword lookups are answered without any network call
+    Query embeddings and formatted contexts are cached per normalized query
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        cache_size: int = 1024,
+        cache_ttl: float = 3600,
+        match_threshold: float = 0.5,
+        lexical_confidence: float = 0.85,
+        lexical_margin: float = 1.5,
+        vector_weight: float = 0.5,
+        candidate_pool: int = 10
+    ):
         self.embedder = GeminiEmbeddings()
         self.supabase = get_supabase_client()
+        self.match_threshold = match_threshold
+        self.lexical_confidence = lexical_confidence
+        self.lexical_margin = lexical_margin
+        self.vector_weight = vector_weight
+        self.candidate_pool = candidate_pool
+        
+        # Optional local index - when set, replaces the match_knowledge RPC
+        self.local_index: Optional[ExactVectorIndex] = None
+        # Optional lexical index - enables hybrid scoring and the fast path
+        self.bm25_index: Optional[BM25Index] = None
+        
+        self.embedding_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.context_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        
+        # Query routing counters
+        self._lexical_fast_path = 0
+        self._hybrid_queries = 0
+        self._vector_queries = 0
+        self._lexical_fallbacks = 0
+        
+        # Latency of uncached work, used to estimate savings
+        self._embed_calls = 0
+        self._embed_ms = 0.0
+        self._context_builds = 0
+        self._context_ms = 0.0
+    
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embed query, reusing cached embedding for the same normalized text
+        (the query itself is embedded - case and punctuation carry meaning)
+        Raises ValueError when the embedding call failed
+        """
+        key = normalize_query(query)
+        
+        embedding = self.embedding_cache.get(key)
+        if embedding is not None:
+            return embedding
+        
+        start = time.perf_counter()
+        embedding = self.embedder.embed_query(query)
+        self._embed_calls += 1
+        self._embed_ms += (time.perf_counter() - start) * 1000
+        
+        # Zero vector means the embedding call failed - searching with it
+        # would match nothing and look like an empty knowledge base
+        if not any(embedding):
+            raise ValueError("Query embedding failed")
+        
+        self.embedding_cache.set(key, embedding)
+        return embedding
+    
+    def set_local_index(self, index: Optional[ExactVectorIndex]):
+        """Swap in a local vector index (None = fall back to pgvector RPC)"""
+        self.local_index = index
+        self.invalidate_cache()
+    
+    def set_bm25_index(self, index: Optional[BM25Index]):
+        """Swap in a lexical index (None = vector-only retrieval)"""
+        self.bm25_index = index
+        self.invalidate_cache()
+    
+    def _search(self, query: str, top_k: int) -> Tuple[List[Dict], bool]:
+        """
+        Lexical fast path, hybrid or vector-only search
+        Returns (chunks, complete) - complete is False when the vector half
+        failed and only the BM25 ranking is returned (not worth caching);
+        raises when there is nothing to fall back to
+        """
+        bm25 = self.bm25_index
+        if bm25 is None:
+            self._vector_queries += 1
+            return self._vector_search(query, top_k), True
+        
+        lexical = bm25.search(query, max(top_k, self.candidate_pool))
+        
+        # Keyword lookup fully covered by a chunk - skip embedding + vector search
+        if self._lexical_match_is_clear(lexical):
+            self._lexical_fast_path += 1
+            return [bm25.to_result(doc, confidence) for doc, _, confidence in lexical[:top_k]], True
+        
+        try:
+            vector = self._vector_search(query, max(top_k, self.candidate_pool))
+        except Exception as e:
+            if not lexical:
+                raise
+            # Embedding / vector search down - keyword matches still help
+            self._lexical_fallbacks += 1
+            print(f"⚠️  Vector search failed, using BM25 ranking only: {e}")
+            return [bm25.to_result(doc, confidence) for doc, _, confidence in lexical[:top_k]], False
+        
+        if not lexical:
+            self._vector_queries += 1
+            return vector[:top_k], True
+        
+        self._hybrid_queries += 1
+        return self._fuse(bm25, lexical, vector, top_k), True
+    
+    def _lexical_match_is_clear(self, lexical: List) -> bool:
+        """
+        Top chunk covers the query and clearly outscores the runner-up
+        (near ties mean the words are common across sections - let the
+        embeddings decide)
+        """
+        if not lexical or lexical[0][2] < self.lexical_confidence:
+            return False
+        return len(lexical) == 1 or lexical[0][1] >= self.lexical_margin * lexical[1][1]
+    
+    def _fuse(self, bm25: BM25Index, lexical: List, vector: List[Dict], top_k: int) -> List[Dict]:
+        """
+        Weighted sum of max-normalized BM25 score and vector similarity
+        Chunks are matched by content (RPC rows may not carry ids)
+        """
+        best = lexical[0][1]
+        fused: Dict[str, Dict] = {}
+        
+        for doc, score, _ in lexical:
+            result = bm25.to_result(doc, 0.0)
+            result.update({"lexical_score": score / best, "vector_score": 0.0})
+            fused[result["content"]] = result
+        
+        for row in vector:
+            result = fused.setdefault(row["content"], {**row, "lexical_score": 0.0})
+            result["vector_score"] = row.get("similarity", 0.0)
+        
+        for result in fused.values():
+            result["similarity"] = (
+                self.vector_weight * result["vector_score"]
+                + (1 - self.vector_weight) * result["lexical_score"]
+            )
+        
+        return sorted(fused.values(), key=lambda r: r["similarity"], reverse=True)[:top_k]
+    
+    def _vector_search(self, query: str, top_k: int) -> List[Dict]:
+        """Vector search via local index or pgvector RPC (raises on failure)"""
+        query_embedding = self.embed_query(query)
+        
+        local_index = self.local_index
+        if local_index is not None:
+            return local_index.search(query_embedding, self.match_threshold, top_k)
+        
+        # Search using pgvector cosine similarity
+        result = self.supabase.rpc(
+            "match_knowledge",
+            {
+                "query_embedding": query_embedding,
+                "match_threshold": self.match_threshold,
+                "match_count": top_k
+            }
+        ).execute()
+        
+        return result.data if result.data else []
     
     def retrieve(self, query: str, top_k: int = 5) -> List[Dict]:
         """
         Semantic search: Find most relevant chunks
         """
-        # Embed the query
-        query_embedding = self.embedder.embed_query(query)
-        
         try:
-            # Search using pgvector cosine similarity
-            result = self.supabase.rpc(
-                "match_knowledge",
-                {
-                    "query_embedding": query_embedding,
-                    "match_threshold": 0.5,
-                    "match_count": top_k
-                }
-            ).execute()
-            
-            return result.data if result.data else []
+            return self._search(query, top_k)[0]
         except Exception as e:
             print(f"❌ Retrieval error: {e}")
             return []
@@ -43,8 +208,21 @@ class KnowledgeRetriever:
         """
         Get relevant context as formatted string
         """
-        chunks = self.retrieve(query, top_k)
+        key = (normalize_query(query), top_k)
+        
+        context = self.context_cache.get(key)
+        if context is not None:
+            return context
+        
+        start = time.perf_counter()
+        
+        try:
+            chunks, complete = self._search(query, top_k)
+        except Exception as e:
+            print(f"❌ Retrieval error: {e}")
+            return "No relevant information found in knowledge base."
         
+        # Not cached - a miss may be transient and must not stick for the TTL
         if not chunks:
             return "No relevant information found in knowledge base."
         
@@ -53,6 +231,14 @@ class KnowledgeRetriever:
             for i, chunk in enumerate(chunks)
         ])
         
+        # A BM25-only answer is served but not cached - vector search may be back next time
+        if not complete:
+            return context
+        
+        self._context_builds += 1
+        self._context_ms += (time.perf_counter() - start) * 1000
+        self.context_cache.set(key, context)
+        
         return context
     
     def search(self, query: str, top_k: int = 3) -> List[str]:
@@ -60,4 +246,90 @@ class KnowledgeRetriever:
         Simple search - returns just the content
         """
         chunks = self.retrieve(query, top_k)
-        return [chunk['content'] for chunk in chunks]
\ No newline at end of file
+        return [chunk['content'] for chunk in chunks]
+    
+    def invalidate_cache(self):
+        """Drop cached contexts (call after the knowledge base is re-embedded)"""
+        self.context_cache.clear()
+    
+    def get_stats(self) -> Dict:
+        """Cache hit/miss counters and estimated savings"""
+        avg_embed_ms = self._embed_ms / self._embed_calls if self._embed_calls else 0.0
+        avg_context_ms = self._context_ms / self._context_builds if self._context_builds else 0.0
+        
+        return {
+            "embedding_cache": self.embedding_cache.get_stats(),
+            "context_cache": self.context_cache.get_stats(),
+            "local_index": self.local_index.get_stats() if self.local_index is not None else None,
+            "bm25_index": self.bm25_index.get_stats() if self.bm25_index is not None else None,
+            "lexical_fast_path": self._lexical_fast_path,
+            "hybrid_queries": self._hybrid_queries,
+            "vector_queries": self._vector_queries,
+            "lexical_fallbacks": self._lexical_fallbacks,
+            "gemini_embed_calls": self._embed_calls,
+            "avg_embed_ms": round(avg_embed_ms, 2),
+            "avg_uncached_context_ms": round(avg_context_ms, 2),
+            "gemini_calls_saved": self.embedding_cache.hits + self.context_cache.hits + self._lexical_fast_path,
+            "estimated_ms_saved": round(
+                (self.embedding_cache.hits + self._lexical_fast_path) * avg_embed_ms
+                + self.context_cache.hits * avg_context_ms, 2
+            )
+        }
+
+# ============================================================================
+# SHARED INSTANCE
+# ============================================================================
+
+_retriever: Optional[KnowledgeRetriever] = None
+_retriever_lock = threading.Lock()
+
+def get_retriever() -> KnowledgeRetriever:
+    """
+    Get or create the process-wide retriever (singleton pattern)
+    """
+    global _retriever
+    
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                _retriever = KnowledgeRetriever(
+                    cache_size=int(os.getenv("RAG_CACHE_SIZE", 1024)),
+                    cache_ttl=float(os.getenv("RAG_CACHE_TTL", 3600)),
+                    lexical_confidence=float(os.getenv("RAG_LEXICAL_CONFIDENCE", 0.85)),
+                    lexical_margin=float(os.getenv("RAG_LEXICAL_MARGIN", 1.5)),
+                    vector_weight=float(os.getenv("RAG_VECTOR_WEIGHT", 0.5))
+                )
+    
+    return _retriever
+
+async def load_local_indexes():
+    """
+    Load knowledge base chunks once and build the in-process indexes:
+    - vector index selected by RAG_LOCAL_INDEX (off | exact | ivf)
+    - BM25 lexical index unless RAG_BM25=off
+    """
+    from database.repository import get_repository
+    from rag.vector_index import build_vector_index
+    
+    mode = os.getenv("RAG_LOCAL_INDEX", "off").lower()
+    use_bm25 = os.getenv("RAG_BM25", "on").lower() != "off"
+    if mode == "off" and not use_bm25:
+        return
+    
+    start = time.perf_counter()
+    rows = await get_repository().knowledge_base.list_chunks(include_embedding=mode != "off")
+    retriever = get_retriever()
+    
+    if mode != "off":
+        kwargs = {}
+        if mode == "ivf":
+            kwargs["nprobe"] = int(os.getenv("RAG_IVF_NPROBE", 8))
+            if os.getenv("RAG_IVF_NLIST"):
+                kwargs["nlist"] = int(os.getenv("RAG_IVF_NLIST"))
+        retriever.set_local_index(build_vector_index(rows, mode, **kwargs))
+    
+    if use_bm25:
+        retriever.set_bm25_index(BM25Index(rows))
+    
+    print(f"✅ Local knowledge indexes loaded ({len(rows)} chunks, vector={mode}, "
+          f"bm25={'on' if use_bm25 else 'off'}) in {(time.perf_counter() - start) * 1000:.0f} ms")
@@ -0,0 +1,161 @@
+# ============================================================================
+# LOCAL VECTOR INDEX - In-process nearest-neighbour search
+# Path: backend/rag/vector_index.py
+# ============================================================================
+
+from typing import Any, Dict, List, Optional, Sequence
+import json
+import numpy as np
+
+class ExactVectorIndex:
+    """
+    Brute-force cosine similarity over an in-memory NumPy matrix
+    Mirrors match_knowledge: similarity = 1 - cosine distance,
+    rows with similarity > match_threshold, best match_count first
+    """
+    
+    mode = "exact"
+    
+    def __init__(self, rows: Sequence[Dict]):
+        self.ids: List[Any] = [row.get("id") for row in rows]
+        self.contents: List[str] = [row.get("content", "") for row in rows]
+        self.metadatas: List[Dict] = [row.get("metadata") or {} for row in rows]
+        
+        vectors = np.array([_parse_embedding(row["embedding"]) for row in rows], dtype=np.float32)
+        if vectors.size == 0:
+            vectors = vectors.reshape(0, 0)
+        self.vectors = _normalize(vectors)
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def _candidates(self, query: np.ndarray) -> Optional[np.ndarray]:
+        """Row indices to score (None = all rows)"""
+        return None
+    
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        match_threshold: float = 0.5,
+        match_count: int = 5
+    ) -> List[Dict]:
+        if len(self) == 0 or match_count <= 0:
+            return []
+        
+        query = _normalize(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+        
+        candidates = self._candidates(query)
+        if candidates is None:
+            scores = self.vectors @ query
+            row_ids = None
+        else:
+            scores = self.vectors[candidates] @ query
+            row_ids = candidates
+        
+        if scores.shape[0] == 0:
+            return []
+        
+        # Top-k without a full sort
+        k = min(match_count, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        
+        results = []
+        for pos in top:
+            similarity = float(scores[pos])
+            if similarity <= match_threshold:
+                break
+            i = int(row_ids[pos]) if row_ids is not None else int(pos)
+            results.append({
+                "id": self.ids[i],
+                "content": self.contents[i],
+                "metadata": self.metadatas[i],
+                "similarity": similarity
+            })
+        
+        return results
+    
+    def get_stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "vectors": len(self),
+            "dimensions": int(self.vectors.shape[1]) if len(self) else 0
+        }
+
+class IVFVectorIndex(ExactVectorIndex):
+    """
+    Inverted-file ANN index: vectors are clustered with spherical k-means
+    and a query only scores the rows in its `nprobe` closest clusters
+    """
+    
+    mode = "ivf"
+    
+    def __init__(
+        self,
+        rows: Sequence[Dict],
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        iterations: int = 10,
+        seed: int = 0
+    ):
+        super().__init__(rows)
+        
+        n = len(self)
+        self.nlist = max(1, min(nlist or int(np.sqrt(n)), n)) if n else 0
+        self.nprobe = max(1, nprobe)
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        self.lists: List[np.ndarray] = []
+        
+        if n:
+            self._train(iterations, seed)
+    
+    def _train(self, iterations: int, seed: int):
+        rng = np.random.default_rng(seed)
+        centroids = self.vectors[rng.choice(len(self), self.nlist, replace=False)].copy()
+        
+        for _ in range(iterations):
+            assignment = np.argmax(self.vectors @ centroids.T, axis=1)
+            for c in range(self.nlist):
+                members = self.vectors[assignment == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = _normalize(centroids)
+        
+        assignment = np.argmax(self.vectors @ centroids.T, axis=1)
+        self.centroids = centroids
+        self.lists = [np.flatnonzero(assignment == c) for c in range(self.nlist)]
+    
+    def _candidates(self, query: np.ndarray) -> Optional[np.ndarray]:
+        if self.nprobe >= self.nlist:
+            return None
+        
+        nearest = np.argpartition(-(self.centroids @ query), self.nprobe - 1)[:self.nprobe]
+        return np.concatenate([self.lists[c] for c in nearest])
+    
+    def get_stats(self) -> Dict:
+        stats = super().get_stats()
+        stats.update({"nlist": self.nlist, "nprobe": self.nprobe})
+        return stats
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def _parse_embedding(value: Any) -> List[float]:
+    """pgvector columns come back from PostgREST as '[0.1,0.2,...]' strings"""
+    if isinstance(value, str):
+        return json.loads(value)
+    return list(value)
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def build_vector_index(rows: Sequence[Dict], mode: str = "exact", **kwargs) -> ExactVectorIndex:
+    """Build index of the requested mode ('exact' or 'ivf')"""
+    if mode == "exact":
+        return ExactVectorIndex(rows)
+    if mode == "ivf":
+        return IVFVectorIndex(rows, **kwargs)
+    raise ValueError(f"Unknown vector index mode: {mode}")
@@ -0,0 +1,55 @@
+# ============================================================================
+# TEST CONFIG - Import path and offline settings for the backend test suite
+# Path: backend/tests/conftest.py
+#
+# Usage (from backend/):
+#   python -m pytest -q
+# ============================================================================
+
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Modules build their clients at import time - give them dummy credentials and
+# unroutable endpoints so nothing in the suite talks to a real service
+os.environ.setdefault("GROQ_API_KEY", "test-groq-key")
+os.environ.setdefault("GOOGLE_API_KEY", "test-google-key")
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.e30.test")
+
+# Scripted LLM turns are free - don't let the free-tier key budget throttle them
+os.environ.setdefault("GROQ_RPM", "100000")
+os.environ.setdefault("GROQ_TPM", "100000000")
+
+# In-memory bureau / customer records (the mock bureau sleeps a second per call)
+KYC_RECORDS = {
+    "ABCDE1234F": {"pan_number": "ABCDE1234F", "full_name": "Asha Rao", "date_of_birth": "1988-04-12", "kyc_status": "VERIFIED"},
+    "FGHIJ5678K": {"pan_number": "FGHIJ5678K", "full_name": "Ravi Iyer", "date_of_birth": "1990-01-01", "kyc_status": "VERIFIED"},
+    "PENDG1234B": {"pan_number": "PENDG1234B", "full_name": "Meera Das", "date_of_birth": "1992-06-30", "kyc_status": "PENDING_AADHAAR_LINK"}
+}
+CREDIT_RECORDS = {"ABCDE1234F": {"score": 790}, "FGHIJ5678K": {"score": 680}, "PENDG1234B": {"score": 720}}
+
+@pytest.fixture
+def fake_lookups(monkeypatch):
+    """
+    KYC / credit / existing-customer lookups served from memory. Returns
+    the list of (kind, pan) lookups made
+    """
+    from agents import prefetch
+    
+    calls = []
+    
+    def lookup(kind, records):
+        async def fetch(pan):
+            calls.append((kind, pan))
+            return records.get(pan)
+        return fetch
+    
+    monkeypatch.setitem(prefetch.LOOKUPS, "kyc", lookup("kyc", KYC_RECORDS))
+    monkeypatch.setitem(prefetch.LOOKUPS, "credit", lookup("credit", CREDIT_RECORDS))
+    monkeypatch.setitem(prefetch.LOOKUPS, "customer", lookup("customer", {}))
+    return calls
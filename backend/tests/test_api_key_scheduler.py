@@ -0,0 +1,144 @@
+# ============================================================================
+# TESTS - Rate-limit-aware Groq key scheduler
+# Path: backend/tests/test_api_key_scheduler.py
+# ============================================================================
+
+import asyncio
+import functools
+
+import httpx
+import pytest
+
+import utils.api_key_rotator as api_key_rotator
+from utils.api_key_rotator import APIKeyScheduler, parse_reset_duration
+
+def run(coro):
+    return asyncio.run(coro)
+
+@pytest.mark.parametrize("value, seconds", [
+    ("2m59.56s", 179.56),
+    ("7.66s", 7.66),
+    ("120ms", 0.12),
+    ("1h", 3600),
+    ("12", 12)
+])
+def test_reset_durations_are_parsed(value, seconds):
+    assert parse_reset_duration(value) == pytest.approx(seconds)
+
+@pytest.mark.parametrize("value", ["soon", "", None])
+def test_unparseable_reset_durations_are_none(value):
+    assert parse_reset_duration(value) is None
+
+def test_least_loaded_key_is_leased():
+    scheduler = APIKeyScheduler(["key-one", "key-two"], rpm=100, tpm=10000)
+    
+    async def scenario():
+        first = await scheduler.acquire(estimated_tokens=4000)
+        second = await scheduler.acquire(estimated_tokens=100)
+        third = await scheduler.acquire(estimated_tokens=100)
+        return first.key, second.key, third.key
+    
+    # key-one has less token headroom after the large request
+    assert run(scenario()) == ("key-one", "key-two", "key-two")
+
+def test_rate_limited_and_excluded_keys_are_skipped():
+    scheduler = APIKeyScheduler(["key-one", "key-two", "key-three"])
+    scheduler.report_rate_limited("key-one", retry_after=30)
+    
+    lease = run(scheduler.acquire(exclude=["key-two"]))
+    
+    assert lease.key == "key-three"
+    assert scheduler.get_stats()["healthy_keys"] == 2
+    assert scheduler.get_stats()["keys"][0]["cooldown_seconds"] > 29
+
+def test_exhausted_key_waits_for_refill():
+    scheduler = APIKeyScheduler(["only-key"], rpm=600)  # one request per 0.1s
+    
+    async def scenario():
+        for _ in range(600):
+            (await scheduler.acquire()).release()
+        lease = await scheduler.acquire()
+        lease.release()
+        return scheduler.get_stats()
+    
+    stats = run(scenario())
+    assert stats["waits"] == 1
+    assert 0.05 <= stats["total_wait_seconds"] <= 0.5
+    assert stats["keys"][0]["in_flight"] == 0
+
+def test_least_bad_key_is_used_after_max_wait():
+    scheduler = APIKeyScheduler(["key-one", "key-two"], max_wait=0.1)
+    scheduler.report_rate_limited("key-one", retry_after=60)
+    scheduler.report_rate_limited("key-two", retry_after=30)
+    
+    assert run(scheduler.acquire()).key == "key-two"
+    assert scheduler.get_stats()["waits"] == 1
+
+def test_response_headers_sync_the_buckets():
+    scheduler = APIKeyScheduler(["key-one", "key-two"], tpm=6000)
+    
+    scheduler.observe_headers("key-one", 200, httpx.Headers({
+        "x-ratelimit-limit-tokens": "12000",
+        "x-ratelimit-remaining-tokens": "300",
+        "x-ratelimit-remaining-requests": "500",
+        "x-ratelimit-reset-requests": "1h"
+    }))
+    scheduler.observe_headers("key-two", 200, httpx.Headers({
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "2m"
+    }))
+    
+    one, two = scheduler.get_stats()["keys"]
+    assert one["tokens_per_minute"] == 12000
+    assert 300 <= one["tokens_available"] < 400
+    assert one["daily_requests_remaining"] == 500 and one["healthy"]
+    assert two["daily_requests_remaining"] == 0 and not two["healthy"]
+    assert scheduler.get_key() == "key-one"
+
+def test_429_response_starts_a_cooldown():
+    scheduler = APIKeyScheduler(["key-one"], cooldown=20)
+    
+    scheduler.observe_headers("key-one", 429, httpx.Headers({"retry-after": "7"}))
+    
+    key = scheduler.get_stats()["keys"][0]
+    assert key["rate_limited"] == 1 and not key["healthy"]
+    assert 6 < key["cooldown_seconds"] <= 7
+
+def test_lease_debits_every_call_after_the_reservation():
+    scheduler = APIKeyScheduler(["only-key"], rpm=10, tpm=1000)
+    
+    with run(scheduler.acquire(estimated_tokens=100)) as lease:
+        lease.report_call(150)  # first call: only the 50-token underestimate
+        lease.report_call(200)
+    
+    key = scheduler.get_stats()["keys"][0]
+    assert key["llm_calls"] == 2 and key["in_flight"] == 0
+    assert 8 <= key["requests_available"] < 8.5
+    assert 650 <= key["tokens_available"] < 700
+
+def test_no_keys_is_an_error():
+    with pytest.raises(ValueError):
+        APIKeyScheduler(["", None])
+
+def test_http_client_stops_sdk_retries_of_429s_only(monkeypatch):
+    def respond(request):
+        status = int(request.url.path.strip("/"))
+        return httpx.Response(status, headers={"retry-after": "5"} if status == 429 else {})
+    
+    monkeypatch.setattr(
+        api_key_rotator.httpx, "AsyncClient",
+        functools.partial(httpx.AsyncClient, transport=httpx.MockTransport(respond))
+    )
+    scheduler = APIKeyScheduler(["key-one"])
+    
+    async def scenario():
+        client = scheduler.http_async_client("key-one")
+        unavailable = await client.get("https://api.groq.test/503")
+        limited = await client.get("https://api.groq.test/429")
+        await scheduler.aclose()
+        return unavailable, limited
+    
+    unavailable, limited = run(scenario())
+    assert "x-should-retry" not in unavailable.headers
+    assert limited.headers["x-should-retry"] == "false"
+    assert scheduler.is_cooling_down("key-one")
@@ -0,0 +1,158 @@
+# ============================================================================
+# TESTS - PAN-keyed bureau cache with request coalescing
+# Path: backend/tests/test_bureau_cache.py
+# ============================================================================
+
+import asyncio
+
+import pytest
+
+from utils.bureau_cache import BureauCache
+
+class FakeBureau:
+    """KYC / credit fetchers that count calls and can be made to fail"""
+    
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.calls = []
+        self.down = False
+        self.records = {"ABCDE1234F": {"score": 790}}
+    
+    def fetcher(self, kind):
+        async def fetch(pan):
+            self.calls.append((kind, pan))
+            await asyncio.sleep(self.delay)
+            if self.down:
+                raise ConnectionError("bureau unavailable")
+            return self.records.get(pan)
+        return fetch
+
+def make_cache(bureau, **kwargs):
+    return BureauCache(
+        fetchers={"kyc": bureau.fetcher("kyc"), "credit": bureau.fetcher("credit")},
+        ttls={"kyc": 3600, "credit": 60},
+        **kwargs
+    )
+
+@pytest.fixture
+def bureau():
+    return FakeBureau()
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_results_are_cached_per_pan_and_kind(bureau):
+    cache = make_cache(bureau)
+    
+    async def scenario():
+        first = await cache.fetch_credit_score("abcde1234f")
+        second = await cache.fetch_credit_score("ABCDE1234F")
+        await cache.verify_kyc("ABCDE1234F")
+        return first, second
+    
+    first, second = run(scenario())
+    assert first == second == {"score": 790}
+    assert bureau.calls == [("credit", "ABCDE1234F"), ("kyc", "ABCDE1234F")]
+    assert cache.get_stats()["credit"]["bureau_calls"] == 1
+
+def test_concurrent_lookups_share_one_bureau_call(bureau):
+    cache = make_cache(bureau)
+    
+    async def scenario():
+        return await asyncio.gather(*(cache.verify_kyc("ABCDE1234F") for _ in range(10)))
+    
+    results = run(scenario())
+    stats = cache.get_stats()["kyc"]
+    assert results == [{"score": 790}] * 10
+    assert len(bureau.calls) == 1
+    assert stats["coalesced"] == 9 and stats["in_flight"] == 0
+
+def test_not_found_is_cached_for_the_negative_ttl(bureau):
+    cache = make_cache(bureau, negative_ttl=0.05)
+    
+    async def scenario():
+        assert await cache.verify_kyc("ZZZZZ9999Z") is None
+        assert await cache.verify_kyc("ZZZZZ9999Z") is None
+        await asyncio.sleep(0.06)
+        bureau.records["ZZZZZ9999Z"] = {"score": 700}
+        return await cache.verify_kyc("ZZZZZ9999Z")
+    
+    assert run(scenario()) == {"score": 700}
+    assert len(bureau.calls) == 2
+    assert cache.get_stats()["kyc"]["negative_hits"] == 1
+
+def test_errors_reach_every_waiter_and_are_not_cached(bureau):
+    cache = make_cache(bureau)
+    bureau.down = True
+    
+    async def scenario():
+        results = await asyncio.gather(
+            *(cache.verify_kyc("ABCDE1234F") for _ in range(3)),
+            return_exceptions=True
+        )
+        bureau.down = False
+        return results, await cache.verify_kyc("ABCDE1234F")
+    
+    failures, recovered = run(scenario())
+    assert all(isinstance(result, ConnectionError) for result in failures)
+    assert recovered == {"score": 790}
+    assert cache.get_stats()["kyc"]["errors"] == 1
+    assert len(bureau.calls) == 2
+
+def test_cancelled_caller_does_not_cancel_the_shared_call(bureau):
+    cache = make_cache(bureau)
+    
+    async def scenario():
+        first = asyncio.create_task(cache.verify_kyc("ABCDE1234F"))
+        second = asyncio.create_task(cache.verify_kyc("ABCDE1234F"))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+    
+    assert run(scenario()) == {"score": 790}
+    assert len(bureau.calls) == 1
+
+def test_unstored_lookups_coalesce_but_are_not_cached(bureau):
+    cache = make_cache(bureau)
+    
+    async def scenario():
+        bulk = await asyncio.gather(*(cache.verify_kyc("ABCDE1234F", store=False) for _ in range(3)))
+        assert len(bureau.calls) == 1
+        return bulk, await cache.verify_kyc("ABCDE1234F", store=False)
+    
+    bulk, again = run(scenario())
+    stats = cache.get_stats()["kyc"]
+    assert bulk == [{"score": 790}] * 3 and again == {"score": 790}
+    assert len(bureau.calls) == 2
+    assert stats["size"] == 0 and stats["uncached_calls"] == 2
+
+def test_storing_caller_joining_an_unstored_call_caches_it(bureau):
+    cache = make_cache(bureau)
+    
+    async def scenario():
+        bulk = asyncio.create_task(cache.verify_kyc("ABCDE1234F", store=False))
+        await asyncio.sleep(0)
+        chat = await cache.verify_kyc("ABCDE1234F")
+        await bulk
+        # Cached by the chat lookup, so the bulk lookup now hits
+        return chat, await cache.verify_kyc("ABCDE1234F", store=False)
+    
+    chat, bulk = run(scenario())
+    assert chat == bulk == {"score": 790}
+    assert len(bureau.calls) == 1
+    assert cache.get_stats()["kyc"]["coalesced"] == 1
+
+def test_invalidate_forces_a_fresh_call(bureau):
+    cache = make_cache(bureau)
+    
+    async def scenario():
+        await cache.verify_kyc("ABCDE1234F")
+        await cache.fetch_credit_score("ABCDE1234F")
+        cache.invalidate("abcde1234f")
+        await cache.verify_kyc("ABCDE1234F")
+        cache.invalidate()
+        await cache.fetch_credit_score("ABCDE1234F")
+    
+    run(scenario())
+    assert bureau.calls.count(("kyc", "ABCDE1234F")) == 2
+    assert bureau.calls.count(("credit", "ABCDE1234F")) == 2
@@ -0,0 +1,199 @@
+# ============================================================================
+# TESTS - SSE chat streaming (agent event stream and /api/chat/stream)
+# Path: backend/tests/test_chat_stream.py
+# ============================================================================
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+
+import agents.loan_agent as loan_agent_module
+import main
+from agents.loan_agent import INTERRUPTED_MARKER, LoanAgent
+from database.write_behind import WriteBehindQueue
+from tests.test_executor_pool import ScriptedLLM, call
+from utils.concurrency import chat_governor
+from utils.session_manager import session_manager
+
+class StreamingScriptedLLM(ScriptedLLM):
+    """ScriptedLLM that streams text replies word by word"""
+    
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        reply = self.script.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        if reply.tool_calls:
+            chunks = [AIMessageChunk(content="", tool_call_chunks=[
+                {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": 0}
+                for c in reply.tool_calls
+            ])]
+        else:
+            words = reply.content.split(" ")
+            chunks = [AIMessageChunk(content=w if i == 0 else f" {w}") for i, w in enumerate(words)]
+        for chunk in chunks:
+            if run_manager and chunk.content:
+                run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+@pytest.fixture(scope="module")
+def agent():
+    return LoanAgent()
+
+@pytest.fixture
+def scripted(agent, monkeypatch):
+    """Every pooled executor replays the same tool call and answer"""
+    def script(*replies):
+        for key in list(agent.executor_pool._executors):
+            llm = StreamingScriptedLLM(script=list(replies))
+            monkeypatch.setitem(agent.executor_pool._executors, key, agent._build_executor(llm))
+    return script
+
+def collect(agent, message, session_id=None):
+    async def run():
+        return [event async for event in agent.invoke_stream(message, session_id)]
+    return asyncio.run(run())
+
+def parse_sse(body):
+    frames = []
+    for frame in body.strip().split("\n\n"):
+        event, data = frame.split("\n")
+        frames.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return frames
+
+def test_stream_sends_session_tools_tokens_then_done(agent, scripted):
+    scripted(
+        call("calculate_emi_tool", loan_amount=500000, interest_rate=12, tenure=36),
+        AIMessage(content="Your EMI is 16607 per month")
+    )
+    
+    events = collect(agent, "Can you help me plan my loan?")
+    kinds = [event["event"] for event in events]
+    
+    assert kinds[0] == "session"
+    assert kinds.index("tool_start") < kinds.index("tool_end") < kinds.index("token")
+    assert kinds[-1] == "done"
+    
+    tokens = "".join(e["data"]["content"] for e in events if e["event"] == "token")
+    done = events[-1]["data"]
+    assert tokens == "Your EMI is 16607 per month"
+    assert done["response"] == tokens
+    assert done["tools_used"] == ["calculate_emi_tool"]
+    assert done["session_id"] == events[0]["data"]["session_id"]
+
+def test_stream_turn_is_kept_in_session_history(agent, scripted):
+    scripted(AIMessage(content="Happy to help"))
+    
+    events = collect(agent, "Can you help me plan my loan?")
+    session_id = events[0]["data"]["session_id"]
+    
+    messages = asyncio.run(session_manager.get_messages(session_id))
+    assert [(m["role"], m["content"]) for m in messages] == [
+        ("user", "Can you help me plan my loan?"),
+        ("assistant", "Happy to help")
+    ]
+
+def test_stream_failure_ends_with_error_event(agent, scripted):
+    scripted(RuntimeError("LLM unavailable"))
+    
+    events = collect(agent, "Can you help me plan my loan?")
+    
+    assert [event["event"] for event in events] == ["session", "error"]
+    assert events[-1]["data"]["error"] == "LLM unavailable"
+
+@pytest.fixture
+def queue(monkeypatch):
+    queue = WriteBehindQueue()
+    monkeypatch.setattr(loan_agent_module, "persistence_queue", queue)
+    return queue
+
+def test_disconnected_stream_is_recorded_as_interrupted(agent, scripted, queue):
+    scripted(AIMessage(content="Your EMI would be about 16607 per month"))
+    
+    async def run():
+        stream = agent.invoke_stream("Can you help me plan my loan?")
+        session_id = (await anext(stream))["data"]["session_id"]
+        tokens = [await anext(stream), await anext(stream)]
+        await stream.aclose()  # client went away mid-answer
+        return session_id, tokens, await session_manager.get_messages(session_id)
+    
+    session_id, tokens, messages = asyncio.run(run())
+    
+    assert [e["event"] for e in tokens] == ["token", "token"]
+    assert [m["role"] for m in messages] == ["user", "assistant"]
+    assert messages[-1]["content"] == f"Your EMI\n\n{INTERRUPTED_MARKER}"
+    assert [row["sender"] for row, _ in queue._messages] == ["user", "agent"]
+    assert queue.get_stats()["pending_sessions"] == 1
+
+def test_cancelled_stream_is_recorded_as_interrupted(agent, scripted, queue):
+    scripted(AIMessage(content="Happy to help"))
+    
+    async def run():
+        session_ids = []
+        
+        async def consume():
+            async for event in agent.invoke_stream("Can you help me plan my loan?"):
+                if event["event"] == "session":
+                    session_ids.append(event["data"]["session_id"])
+                    await asyncio.sleep(10)  # cancelled while the client waits
+        
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.01)  # the loop's async generator finalizer closes the stream
+        return await session_manager.get_messages(session_ids[0])
+    
+    messages = asyncio.run(run())
+    
+    assert [(m["role"], m["content"]) for m in messages] == [
+        ("user", "Can you help me plan my loan?"),
+        ("assistant", INTERRUPTED_MARKER)
+    ]
+    assert len(queue._messages) == 2
+
+def test_completed_stream_is_not_marked_interrupted(agent, scripted, queue):
+    scripted(AIMessage(content="Happy to help"))
+    
+    collect(agent, "Can you help me plan my loan?")
+    
+    assert [row["message"] for row, _ in queue._messages] == ["Can you help me plan my loan?", "Happy to help"]
+
+class FakeAgent:
+    def __init__(self, fail=False):
+        self.fail = fail
+    
+    async def invoke_stream(self, message, session_id=None):
+        yield {"event": "session", "data": {"session_id": "s1"}}
+        yield {"event": "token", "data": {"content": "Hi"}}
+        if self.fail:
+            raise RuntimeError("boom")
+        yield {"event": "done", "data": {"response": "Hi", "session_id": "s1", "tools_used": []}}
+
+@pytest.fixture
+def client(monkeypatch):
+    def make(agent):
+        monkeypatch.setattr(main, "agent", agent)
+        return TestClient(main.app)
+    return make
+
+def test_endpoint_frames_events_as_sse(client):
+    response = client(FakeAgent()).post("/api/chat/stream", json={"message": "hello"})
+    
+    assert response.headers["content-type"].startswith("text/event-stream")
+    frames = parse_sse(response.text)
+    assert [event for event, _ in frames] == ["session", "token", "done"]
+    assert "response_time_ms" in frames[-1][1]
+    assert chat_governor.get_stats()["in_flight"] == 0
+
+def test_endpoint_reports_errors_in_band_and_releases_admission(client):
+    response = client(FakeAgent(fail=True)).post("/api/chat/stream", json={"message": "hello"})
+    
+    frames = parse_sse(response.text)
+    assert [event for event, _ in frames] == ["session", "token", "error"]
+    assert frames[-1][1]["error"] == "boom"
+    assert chat_governor.get_stats()["in_flight"] == 0
@@ -0,0 +1,99 @@
+# ============================================================================
+# TESTS - Streaming markdown chunker
+# Path: backend/tests/test_chunker.py
+# ============================================================================
+
+import itertools
+
+import rag.chunker as chunker
+from rag.bm25 import split_heading
+from rag.chunker import chunk_file, chunk_text, iter_chunks
+from utils.tokens import estimate_tokens
+
+def section(words, prefix="word"):
+    return " ".join(f"{prefix}{i}" for i in range(words))
+
+DOCUMENT = f"""# Loan Guide
+
+## Fees
+{section(200, "fee")}
+
+---
+
+### Foreclosure
+{section(30, "close")}
+
+## Eligibility
+{section(40, "elig")}
+"""
+
+def body_tokens(chunk):
+    return sum(estimate_tokens(word) for word in split_heading(chunk)[1].split())
+
+def test_chunks_carry_their_heading_path():
+    headings = [split_heading(chunk)[0] for chunk in chunk_text(DOCUMENT)]
+    
+    assert headings[0] == "Loan Guide > Fees"
+    assert "Loan Guide > Fees > Foreclosure" in headings
+    assert headings[-1] == "Loan Guide > Eligibility"
+
+def test_chunks_respect_the_token_budget():
+    longest_word = max(estimate_tokens(word) for word in DOCUMENT.split())
+    
+    # A chunk closes on the word that reaches the budget
+    for chunk in chunk_text(DOCUMENT, max_tokens=64, overlap_tokens=16):
+        assert body_tokens(chunk) < 64 + longest_word
+
+def test_consecutive_chunks_of_a_section_overlap():
+    fees = [split_heading(c)[1].split() for c in chunk_text(DOCUMENT, 64, 16) if c.startswith("Loan Guide > Fees\n")]
+    
+    assert len(fees) > 2
+    for previous, current in zip(fees, fees[1:]):
+        assert current[0] in previous
+        assert current.index(previous[-1]) > 0
+
+def test_sections_do_not_bleed_into_each_other():
+    for chunk in chunk_text(DOCUMENT):
+        heading, body = split_heading(chunk)
+        if heading.endswith("Eligibility"):
+            assert "fee" not in body and "close" not in body
+
+def test_rules_and_tiny_sections_are_dropped():
+    chunks = chunk_text("# Title\n\n---\n\n## Empty\nok\n\n## Body\n" + section(20))
+    
+    assert all("---" not in chunk for chunk in chunks)
+    assert [split_heading(chunk)[0] for chunk in chunks] == ["Title > Body"]
+
+def test_chunks_stream_before_the_input_is_exhausted():
+    consumed = []
+    
+    def lines():
+        for i in itertools.count():
+            consumed.append(i)
+            yield f"line{i} " + section(10) + "\n"
+    
+    first = next(iter_chunks(lines(), max_tokens=64))
+    
+    assert first
+    assert len(consumed) < 20
+
+def test_each_word_is_measured_once(monkeypatch):
+    calls = []
+    
+    def counting(word):
+        calls.append(word)
+        return estimate_tokens(word)
+    
+    monkeypatch.setattr(chunker, "estimate_tokens", counting)
+    
+    text = "# Big\n" + "\n".join(section(50) for _ in range(200))
+    chunks = chunk_text(text, max_tokens=64, overlap_tokens=32)
+    
+    assert len(chunks) > 100
+    assert len(calls) == 50 * 200
+
+def test_file_and_string_chunking_agree(tmp_path):
+    path = tmp_path / "kb.md"
+    path.write_text(DOCUMENT, encoding="utf-8")
+    
+    assert chunk_file(str(path)) == chunk_text(DOCUMENT)
@@ -0,0 +1,138 @@
+# ============================================================================
+# TESTS - Admission control and per-session ordering
+# Path: backend/tests/test_concurrency.py
+# ============================================================================
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import utils.concurrency as concurrency
+from utils.concurrency import AdmissionRejected, ConcurrencyGovernor
+
+def run(coro):
+    return asyncio.run(coro)
+
+async def turn(governor, session_id, log, name, hold=0.02):
+    async with governor.admit(session_id):
+        log.append(f"{name} start")
+        await asyncio.sleep(hold)
+        log.append(f"{name} end")
+
+def test_in_flight_requests_are_capped():
+    async def scenario():
+        governor = ConcurrencyGovernor(max_in_flight=2, max_queue=10)
+        peak = 0
+        
+        async def request():
+            nonlocal peak
+            async with governor.admit():
+                peak = max(peak, governor.get_stats()["in_flight"])
+                await asyncio.sleep(0.01)
+        
+        await asyncio.gather(*(request() for _ in range(6)))
+        return peak, governor.get_stats()
+    
+    peak, stats = run(scenario())
+    assert peak == 2
+    assert stats["admitted"] == 6 and stats["in_flight"] == 0
+
+def test_requests_beyond_the_queue_are_rejected_with_retry_after():
+    async def scenario():
+        governor = ConcurrencyGovernor(max_in_flight=1, max_queue=1)
+        held = await governor.acquire()
+        queued = asyncio.create_task(governor.acquire())
+        await asyncio.sleep(0)
+        
+        with pytest.raises(AdmissionRejected) as rejected:
+            await governor.acquire()
+        
+        held.release()
+        (await queued).release()
+        return rejected.value, governor.get_stats()
+    
+    rejection, stats = run(scenario())
+    assert "queue is full" in rejection.reason
+    assert rejection.retry_after >= 1
+    assert stats["rejected"] == 1 and stats["admitted"] == 2
+
+def test_turns_of_one_session_run_in_order():
+    async def scenario():
+        governor = ConcurrencyGovernor(max_in_flight=8)
+        log = []
+        await asyncio.gather(*(turn(governor, "s1", log, f"t{i}") for i in range(3)))
+        return log, governor.get_stats()
+    
+    log, stats = run(scenario())
+    assert log == ["t0 start", "t0 end", "t1 start", "t1 end", "t2 start", "t2 end"]
+    assert stats["active_session_locks"] == 0
+
+def test_different_sessions_run_concurrently():
+    async def scenario():
+        governor = ConcurrencyGovernor(max_in_flight=8)
+        log = []
+        await asyncio.gather(turn(governor, "s1", log, "a"), turn(governor, "s2", log, "b"))
+        return log
+    
+    assert run(scenario())[:2] == ["a start", "b start"]
+
+def test_queue_timeout_rejects_and_frees_the_session_lock():
+    async def scenario():
+        governor = ConcurrencyGovernor(max_in_flight=4, queue_timeout=0.05)
+        held = await governor.acquire("s1")
+        
+        with pytest.raises(AdmissionRejected, match="timed out"):
+            await governor.acquire("s1")
+        
+        held.release()
+        held.release()  # second release is a no-op
+        (await governor.acquire("s1")).release()
+        return governor.get_stats()
+    
+    stats = run(scenario())
+    assert stats["timeouts"] == 1
+    assert stats["in_flight"] == 0 and stats["queued"] == 0
+    assert stats["active_session_locks"] == 0
+
+def test_cancelled_waiter_leaves_no_state_behind():
+    async def scenario():
+        governor = ConcurrencyGovernor(max_in_flight=1)
+        held = await governor.acquire("s1")
+        waiter = asyncio.create_task(governor.acquire("s2"))
+        await asyncio.sleep(0)
+        
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        
+        held.release()
+        return governor.get_stats()
+    
+    stats = run(scenario())
+    assert stats["queued"] == 0 and stats["in_flight"] == 0
+    assert stats["active_session_locks"] == 0
+
+def test_queue_wait_is_measured():
+    async def scenario():
+        governor = ConcurrencyGovernor(max_in_flight=1)
+        log = []
+        await asyncio.gather(*(turn(governor, None, log, str(i), hold=0.05) for i in range(2)))
+        return governor.get_stats()
+    
+    stats = run(scenario())
+    assert stats["max_queue_wait_ms"] >= 40
+    assert stats["p95_queue_wait_ms"] > 0
+
+def test_chat_endpoints_answer_429_when_full(monkeypatch):
+    governor = ConcurrencyGovernor(max_in_flight=1, max_queue=0)
+    run(governor.acquire())  # the only slot stays taken
+    monkeypatch.setattr(concurrency, "chat_governor", governor)
+    client = TestClient(main.app)
+    
+    for path in ("/api/chat", "/api/chat/stream"):
+        response = client.post(path, json={"message": "hello"})
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == str(response.json()["retry_after"])
+    assert governor.get_stats()["rejected"] == 2
@@ -0,0 +1,112 @@
+# ============================================================================
+# TESTS - Batched, concurrent Gemini embedding (embed_content mocked)
+# Path: backend/tests/test_embeddings.py
+# ============================================================================
+
+import asyncio
+import threading
+import time
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+import rag.embeddings as embeddings
+from rag.embeddings import GeminiEmbeddings
+
+class FakeGemini:
+    """embed_content stand-in: one vector per text, scripted errors per batch"""
+    
+    def __init__(self, errors=None, delay=0.0):
+        self.errors = errors or {}
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+    
+    def embed_content(self, model, content, task_type):
+        with self._lock:
+            self.calls.append(list(content))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            pending = self.errors.get(content[0])
+            if pending:
+                raise pending.pop(0)
+            return {"embedding": [[float(len(text)), 1.0] for text in content]}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+@pytest.fixture
+def gemini(monkeypatch):
+    def install(**kwargs):
+        fake = FakeGemini(**kwargs)
+        monkeypatch.setattr(embeddings.genai, "embed_content", fake.embed_content)
+        return fake
+    return install
+
+@pytest.fixture
+def backoffs(monkeypatch):
+    """Backoff delays requested by embed_batch (not actually slept)"""
+    delays = []
+    real_sleep = asyncio.sleep
+    
+    async def sleep(delay, *args, **kwargs):
+        delays.append(delay)
+        await real_sleep(0)
+    
+    monkeypatch.setattr(embeddings.asyncio, "sleep", sleep)
+    return delays
+
+def embed(texts, **kwargs):
+    return asyncio.run(GeminiEmbeddings().embed_batch(texts, **kwargs))
+
+TEXTS = [f"chunk number {i}" for i in range(25)]
+
+def test_texts_are_sent_in_batches_and_kept_in_order(gemini):
+    fake = gemini()
+    
+    result = embed(TEXTS, batch_size=10)
+    
+    assert sorted(len(call) for call in fake.calls) == [5, 10, 10]
+    assert result.api_calls == 3
+    assert result.failures == {}
+    assert result.embeddings == [[float(len(text)), 1.0] for text in TEXTS]
+
+def test_concurrency_is_bounded(gemini):
+    fake = gemini(delay=0.05)
+    
+    embed(TEXTS, batch_size=2, max_concurrency=3)
+    
+    assert fake.max_in_flight == 3
+
+def test_rate_limits_are_retried_with_backoff(gemini, backoffs):
+    throttled = [google_exceptions.ResourceExhausted("quota"), google_exceptions.ServiceUnavailable("busy")]
+    gemini(errors={TEXTS[10]: throttled})
+    
+    result = embed(TEXTS, batch_size=10)
+    
+    assert result.failures == {}
+    assert result.retries == 2
+    assert result.api_calls == 5
+    assert len(backoffs) == 2 and backoffs[0] <= 2 <= backoffs[1]
+
+def test_failed_batches_are_reported_not_zero_filled(gemini, backoffs):
+    gemini(errors={TEXTS[10]: [google_exceptions.InvalidArgument("bad request")]})
+    
+    result = embed(TEXTS, batch_size=10)
+    
+    assert sorted(result.failures) == list(range(10, 20))
+    assert result.embeddings[10:20] == [None] * 10
+    assert result.succeeded == 15
+    assert backoffs == []
+
+def test_retries_give_up_after_max_retries(gemini, backoffs):
+    gemini(errors={TEXTS[0]: [google_exceptions.ResourceExhausted("quota") for _ in range(3)]})
+    
+    result = embed(TEXTS[:5], max_retries=2)
+    
+    assert "Gave up after 2 retries" in result.failures[0]
+    assert result.api_calls == 3
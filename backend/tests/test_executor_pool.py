@@ -0,0 +1,155 @@
+# ============================================================================
+# TESTS - Executor pool failover (scripted LLM, no Groq calls)
+# Path: backend/tests/test_executor_pool.py
+# ============================================================================
+
+import asyncio
+from typing import Any, List
+
+import pytest
+from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.tools import tool
+
+from agents.executor_pool import ExecutorPool
+from utils.api_key_rotator import APIKeyScheduler
+
+class RateLimited(Exception):
+    status_code = 429
+
+class ScriptedLLM(BaseChatModel):
+    """Returns (or raises) the scripted replies in order, one per LLM call"""
+    
+    script: List[Any]
+    
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+    
+    def bind_tools(self, tools, **kwargs):
+        return self
+    
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        reply = self.script.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+def call(name, **args):
+    return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": f"call_{name}"}])
+
+SAVED = []
+
+@tool
+def save_application_tool(amount: int) -> str:
+    """Save a loan application"""
+    SAVED.append(amount)
+    return "saved"
+
+PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a loan assistant"),
+    ("human", "{input}"),
+    MessagesPlaceholder(variable_name="agent_scratchpad")
+])
+
+def build_executor(llm) -> AgentExecutor:
+    agent = create_tool_calling_agent(llm=llm, tools=[save_application_tool], prompt=PROMPT)
+    return AgentExecutor(agent=agent, tools=[save_application_tool])
+
+@pytest.fixture
+def pool():
+    """Two-key pool; script_keys() gives each key's executor its own script"""
+    SAVED.clear()
+    scheduler = APIKeyScheduler(["key-one", "key-two"], rpm=1000, tpm=1_000_000)
+    pool = ExecutorPool(build_executor, scheduler)
+    
+    def script_keys(*scripts):
+        for key, script in zip(scheduler.get_all_keys(), scripts):
+            pool._executors[key] = build_executor(ScriptedLLM(script=list(script)))
+    
+    pool.script_keys = script_keys
+    return pool
+
+def test_rate_limit_before_any_tool_fails_over(pool):
+    pool.script_keys(
+        [RateLimited("rate_limit_exceeded")],
+        [call("save_application_tool", amount=500000), AIMessage(content="Saved!")]
+    )
+    
+    result = asyncio.run(pool.ainvoke({"input": "apply"}))
+    
+    assert result["output"] == "Saved!"
+    assert SAVED == [500000]
+    assert pool.get_stats()["failovers"] == 1
+
+def test_rate_limit_after_a_tool_ran_is_not_retried(pool):
+    retry_script = [call("save_application_tool", amount=500000), AIMessage(content="Saved again")]
+    pool.script_keys(
+        [call("save_application_tool", amount=500000), RateLimited("rate_limit_exceeded")],
+        retry_script
+    )
+    
+    with pytest.raises(RateLimited):
+        asyncio.run(pool.ainvoke({"input": "apply"}))
+    
+    # The application was saved exactly once and the other key never ran
+    assert SAVED == [500000]
+    assert len(retry_script) == 2
+    assert pool.get_stats()["failovers"] == 0
+    assert pool.get_stats()["unsafe_failovers_skipped"] == 1
+
+def test_single_key_waits_out_its_cooldown_and_retries():
+    SAVED.clear()
+    scheduler = APIKeyScheduler(["only-key"], rpm=1000, tpm=1_000_000, cooldown=0.1)
+    pool = ExecutorPool(build_executor, scheduler)
+    pool._executors["only-key"] = build_executor(ScriptedLLM(script=[
+        RateLimited("rate_limit_exceeded"),
+        call("save_application_tool", amount=300000),
+        AIMessage(content="Saved!")
+    ]))
+    
+    result = asyncio.run(pool.ainvoke({"input": "apply"}))
+    
+    assert result["output"] == "Saved!"
+    assert SAVED == [300000]
+    assert pool.get_stats()["rate_limit_retries"] == 1
+    assert pool.get_stats()["failovers"] == 0
+    assert scheduler.get_stats()["total_wait_seconds"] >= 0.05
+
+def test_rate_limit_on_every_key_is_retried_then_raised(pool):
+    pool.rate_limit_retries = 1
+    pool.scheduler.cooldown = 0.05
+    pool.script_keys(
+        [RateLimited("rate_limit_exceeded"), RateLimited("rate_limit_exceeded")],
+        [RateLimited("rate_limit_exceeded")]
+    )
+    
+    with pytest.raises(RateLimited):
+        asyncio.run(pool.ainvoke({"input": "apply"}))
+    
+    assert pool.get_stats()["failovers"] == 1
+    assert pool.get_stats()["rate_limit_retries"] == 1
+
+def test_sdk_retries_stay_on_for_transient_errors(pool):
+    assert pool._create_llm("key-one").max_retries == 2
+
+def test_every_llm_call_of_a_turn_is_debited_from_the_key():
+    SAVED.clear()
+    scheduler = APIKeyScheduler(["only-key"], rpm=6, tpm=1_000_000)
+    pool = ExecutorPool(build_executor, scheduler)
+    pool._executors["only-key"] = build_executor(ScriptedLLM(script=[
+        call("save_application_tool", amount=100000),
+        call("save_application_tool", amount=200000),
+        AIMessage(content="Both saved")
+    ]))
+    
+    asyncio.run(pool.ainvoke({"input": "apply twice"}, estimated_tokens=50))
+    
+    key = scheduler.get_stats()["keys"][0]
+    assert key["leases"] == 1
+    assert key["llm_calls"] == 3
+    # Three requests out of six per minute (plus a moment of refill)
+    assert 3 <= key["requests_available"] < 3.5
@@ -0,0 +1,173 @@
+# ============================================================================
+# TESTS - Conversation history windows and pinned facts
+# Path: backend/tests/test_history.py
+# ============================================================================
+
+import asyncio
+
+import pytest
+
+import agents.history as history
+from agents.history import HistoryManager, extract_facts
+from utils.session_manager import InMemorySessionBackend
+
+@pytest.fixture
+def store(monkeypatch):
+    """Fresh session store wired to a fresh history manager"""
+    store = InMemorySessionBackend(max_sessions=3)
+    monkeypatch.setattr(history, "session_manager", store)
+    store.history = HistoryManager(keep_turns=2)
+    store.add_eviction_listener(store.history.forget)
+    return store
+
+async def chat(store, session_id, *messages):
+    for message in messages:
+        await store.history.build(session_id)
+        await store.add_message(session_id, "user", message)
+        await store.add_message(session_id, "assistant", f"Noted: {message}")
+    return await store.history.build(session_id)
+
+def test_window_keeps_recent_turns_and_summarizes_older_ones(store):
+    async def run():
+        session_id = await store.create_session()
+        return await chat(store, session_id, "I need a loan.", "My income is 85000.", "Tenure 36 months.")
+    
+    chat_history = asyncio.run(run())
+    
+    assert "Summary of the earlier conversation" in chat_history[0].content
+    assert [m.content for m in chat_history[1:]] == [
+        "My income is 85000.", "Noted: My income is 85000.", "Tenure 36 months.", "Noted: Tenure 36 months."
+    ]
+
+def test_clear_session_drops_window_and_its_bytes(store):
+    async def run():
+        session_id = await store.create_session()
+        await chat(store, session_id, "Hello")
+        cached = store.history.get_stats()["window_bytes"]
+        assert cached > 0 and (await store.get_stats())["cache_bytes"] == cached
+        
+        await store.clear_session(session_id)
+        return session_id
+    
+    session_id = asyncio.run(run())
+    assert session_id not in store.history._windows
+    assert store.history.get_stats()["window_bytes"] == 0
+    assert asyncio.run(store.get_stats())["cache_bytes"] == 0
+
+def test_lru_evicted_session_loses_its_window(store):
+    async def run():
+        sessions = [await store.create_session() for _ in range(3)]
+        for session_id in sessions:
+            await chat(store, session_id, "Hello")
+        await store.create_session()  # fourth session evicts the oldest
+        return sessions
+    
+    oldest, *kept = asyncio.run(run())
+    assert list(store.history._windows) == kept
+    assert asyncio.run(store.get_stats())["lru_evictions"] == 1
+
+def test_window_bytes_count_toward_the_memory_cap(store):
+    async def run():
+        first = await store.create_session()
+        await chat(store, first, "Hello")
+        without_window = store._sizes[first] - store._cached[first]
+        
+        # Cap that fits the bare sessions but not their windows too
+        store.max_bytes = 2 * without_window + store._cached[first] // 2
+        second = await store.create_session()
+        await chat(store, second, "Hello")
+        return first, second
+    
+    first, second = asyncio.run(run())
+    assert first not in store.sessions and first not in store.history._windows
+    assert second in store.sessions
+
+def test_extract_facts():
+    assert extract_facts("I'm salaried, income is 85k and I need 5 lakh for 3 years") == {
+        "employment_type": "Salaried",
+        "monthly_income": 85000.0,
+        "loan_amount": 500000.0,
+        "tenure_months": 36
+    }
+
+def test_pinned_facts_survive_folding(store):
+    async def run():
+        session_id = await store.create_session()
+        await store.history.observe_user_message(session_id, "My PAN is ABCDE1234F and I earn 85000 a month")
+        return await chat(
+            store, session_id,
+            "My PAN is ABCDE1234F and I earn 85000 a month.", "What rates do you offer?", "And the fees?"
+        )
+    
+    context = asyncio.run(run())[0].content
+    assert "- PAN: ABCDE1234F" in context
+    assert "- Monthly income: ₹85,000" in context
+    assert "Customer: My PAN is ABCDE1234F" in context
+
+def test_emi_statement_does_not_replace_pinned_loan_amount(store):
+    async def run():
+        session_id = await store.create_session()
+        await store.history.observe_user_message(session_id, "I need a loan of 5 lakh")
+        await store.history.observe_user_message(session_id, "I have an existing loan EMI of 10000")
+        return (await store.get_session(session_id))["customer_data"]
+    
+    customer_data = asyncio.run(run())
+    assert customer_data["loan_amount"] == 500000.0
+    assert customer_data["existing_emi"] == 10000.0
+
+def test_history_tokens_plateau_over_a_long_session(store):
+    store.history = HistoryManager(token_budget=400, keep_turns=3, summary_tokens=120)
+    
+    async def run():
+        session_id = await store.create_session()
+        sizes = []
+        for turn in range(40):
+            await chat(store, session_id, f"Turn {turn}: can we revisit the repayment schedule once more?")
+            sizes.append(store.history.max_history_tokens)
+        return sizes
+    
+    sizes = asyncio.run(run())
+    assert sizes[20] == sizes[-1]
+    assert sizes[-1] <= 400
+    assert store.history.get_stats()["messages_folded"] > 60
+
+def test_oversized_messages_are_evicted_to_stay_in_budget(store):
+    store.history = HistoryManager(token_budget=300, keep_turns=4, summary_tokens=100)
+    
+    async def run():
+        session_id = await store.create_session()
+        return await chat(store, session_id, "word " * 150, "word " * 150, "short question")
+    
+    chat_history = asyncio.run(run())
+    assert chat_history[-1].content == "Noted: short question"
+    assert store.history.max_history_tokens <= 300
+
+def test_summary_is_stored_on_the_session(store):
+    async def run():
+        session_id = await store.create_session()
+        await chat(store, session_id, "I need a loan.", "My income is 85000.", "Tenure 36 months.")
+        
+        # Another worker (fresh manager, no cached window) resumes from the stored summary
+        store.history = HistoryManager(keep_turns=2)
+        rebuilt = await store.history.build(session_id)
+        return await store.get_history_summary(session_id), rebuilt
+    
+    summary, rebuilt = asyncio.run(run())
+    assert summary["covered"] == 2
+    assert "Customer: I need a loan." in summary["text"]
+    assert summary["text"] in rebuilt[0].content
+    assert store.history.get_stats()["messages_converted"] == 4
+
+def test_extract_facts_variants():
+    assert extract_facts("pan: abcde1234f, no existing EMI") == {"pan": "ABCDE1234F", "existing_emi": 0.0}
+    assert extract_facts("I am self employed, looking for ₹2.5 lakh over 24 months") == {
+        "employment_type": "Self-Employed",
+        "loan_amount": 250000.0,
+        "tenure_months": 24
+    }
+    assert extract_facts("I have an existing loan EMI of 10000") == {"existing_emi": 10000.0}
+    assert extract_facts("I need a loan of 5 lakh, my current EMI is 8000") == {
+        "loan_amount": 500000.0,
+        "existing_emi": 8000.0
+    }
+    assert extract_facts("Thanks, that helps!") == {}
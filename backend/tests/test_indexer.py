@@ -0,0 +1,181 @@
+# ============================================================================
+# TESTS - Incremental knowledge base re-indexing
+# Path: backend/tests/test_indexer.py
+# ============================================================================
+
+import asyncio
+
+import pytest
+
+import database.repository as repository
+from rag.embeddings import EmbeddingBatchResult
+from rag.indexer import ReindexPlan, reindex_chunks
+
+class FakeKnowledgeBase:
+    """
+    knowledge_base_embeddings in memory. `snapshots` records what a reader
+    could see after every individual request
+    """
+    
+    def __init__(self, has_swap_function=True, fail_swap=None):
+        self.rows = {}
+        self.staged = {}
+        self.has_swap_function = has_swap_function
+        self.fail_swap = fail_swap
+        self.snapshots = []
+    
+    def _snapshot(self):
+        self.snapshots.append(sorted(row["content"] for row in self.rows.values()))
+    
+    async def list_chunks(self, include_embedding=False):
+        return [
+            {"id": row["id"], "content": row["content"], "metadata": dict(row["metadata"])}
+            for row in self.rows.values()
+        ]
+    
+    async def stage_chunks(self, reindex_id, rows):
+        if not self.has_swap_function:
+            raise repository.RepositoryError("POST /knowledge_base_staging failed (404)", 404)
+        self.staged.setdefault(reindex_id, []).extend(dict(row) for row in rows)
+    
+    async def discard_staged(self, reindex_id):
+        self.staged.pop(reindex_id, None)
+    
+    async def swap_chunks(self, reindex_id, stale_ids, kept_metadata):
+        if self.fail_swap:
+            raise self.fail_swap
+        for row in self.staged.pop(reindex_id, []):
+            self.rows[row["id"]] = row
+        for row in kept_metadata:
+            self.rows[row["id"]]["metadata"] = row["metadata"]
+        for chunk_id in stale_ids:
+            del self.rows[chunk_id]
+        self._snapshot()
+    
+    async def insert_many(self, rows):
+        for row in rows:
+            self.rows[row["id"]] = dict(row)
+        self._snapshot()
+    
+    async def update_metadata(self, chunk_id, metadata):
+        self.rows[chunk_id]["metadata"] = metadata
+        self._snapshot()
+    
+    async def delete_by_ids(self, ids):
+        for chunk_id in ids:
+            del self.rows[chunk_id]
+        self._snapshot()
+
+class FakeRepository:
+    def __init__(self, **kwargs):
+        self.knowledge_base = FakeKnowledgeBase(**kwargs)
+
+class FakeEmbedder:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.embedded = []
+    
+    async def embed_batch(self, texts):
+        result = EmbeddingBatchResult(len(texts))
+        for i, text in enumerate(texts):
+            if text in self.fail:
+                result.failures[i] = "quota"
+            else:
+                result.embeddings[i] = [float(len(text)), 1.0]
+                self.embedded.append(text)
+        return result
+
+@pytest.fixture
+def repo(monkeypatch):
+    repo = FakeRepository()
+    monkeypatch.setattr(repository, "get_repository", lambda: repo)
+    return repo
+
+def reindex(chunks, embedder=None, **kwargs):
+    return asyncio.run(reindex_chunks(chunks, embedder=embedder or FakeEmbedder(), **kwargs))
+
+def stored(repo):
+    """(chunk_index, total_chunks, content) of every stored row, in document order"""
+    return sorted(
+        (row["metadata"]["chunk_index"], row["metadata"]["total_chunks"], row["content"])
+        for row in repo.knowledge_base.rows.values()
+    )
+
+def test_only_changed_chunks_are_embedded(repo):
+    reindex(["alpha", "beta", "gamma"])
+    
+    embedder = FakeEmbedder()
+    report = reindex(["alpha", "beta v2", "gamma"], embedder=embedder)
+    
+    assert embedder.embedded == ["beta v2"]
+    assert report["to_add"] == 1
+    assert report["to_delete"] == 1
+    assert stored(repo) == [(0, 3, "alpha"), (1, 3, "beta v2"), (2, 3, "gamma")]
+
+def test_swap_is_atomic(repo):
+    reindex(["alpha", "beta", "gamma"])
+    repo.knowledge_base.snapshots.clear()
+    
+    report = reindex(["alpha", "beta v2", "gamma", "delta"])
+    
+    # Staged rows are invisible; readers never see old and new versions side by side
+    assert report["atomic"] is True
+    assert repo.knowledge_base.snapshots == [["alpha", "beta v2", "delta", "gamma"]]
+    assert repo.knowledge_base.staged == {}
+
+def test_failed_swap_discards_staged_rows(monkeypatch):
+    repo = FakeRepository(fail_swap=repository.RepositoryError("POST /rpc/reindex_knowledge failed (500)", 500))
+    monkeypatch.setattr(repository, "get_repository", lambda: repo)
+    
+    with pytest.raises(repository.RepositoryError):
+        reindex(["alpha", "beta"])
+    
+    assert repo.knowledge_base.rows == {}
+    assert repo.knowledge_base.staged == {}
+
+def test_kept_chunks_are_renumbered_when_positions_shift(repo):
+    reindex(["alpha", "beta", "gamma"])
+    
+    report = reindex(["intro", "alpha", "gamma"])
+    
+    assert report["to_renumber"] == 1
+    assert report["chunks_renumbered"] == 1
+    assert stored(repo) == [(0, 3, "intro"), (1, 3, "alpha"), (2, 3, "gamma")]
+
+def test_dry_run_reports_without_writing(repo):
+    reindex(["alpha", "beta"])
+    repo.knowledge_base.snapshots.clear()
+    
+    embedder = FakeEmbedder()
+    report = reindex(["alpha", "beta v2"], embedder=embedder, dry_run=True)
+    
+    assert report["dry_run"] is True
+    assert report["added_preview"] == ["beta v2"]
+    assert report["deleted_preview"] == ["beta"]
+    assert embedder.embedded == []
+    assert repo.knowledge_base.snapshots == []
+
+def test_failed_embeddings_keep_old_rows(repo):
+    reindex(["alpha", "beta"])
+    
+    report = reindex(["alpha", "beta v2", "gamma"], embedder=FakeEmbedder(fail={"gamma"}))
+    
+    assert report["chunks_deleted"] == 0
+    assert [content for _, _, content in stored(repo)] == ["alpha", "beta", "beta v2"]
+
+def test_missing_function_falls_back_to_separate_requests(monkeypatch):
+    repo = FakeRepository(has_swap_function=False)
+    monkeypatch.setattr(repository, "get_repository", lambda: repo)
+    reindex(["alpha", "beta", "gamma"])
+    
+    report = reindex(["beta v2", "alpha", "gamma"])
+    
+    assert report["atomic"] is False
+    assert stored(repo) == [(0, 3, "beta v2"), (1, 3, "alpha"), (2, 3, "gamma")]
+
+def test_plan_backfills_hashes_of_legacy_rows():
+    rows = [{"id": "r1", "content": "alpha", "metadata": {"chunk_index": 0, "total_chunks": 1}}]
+    plan = ReindexPlan(["alpha"], rows)
+    
+    assert plan.to_add == [] and plan.to_delete == []
+    assert plan.to_renumber[0]["metadata"]["content_hash"]
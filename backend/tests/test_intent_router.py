@@ -0,0 +1,90 @@
+# ============================================================================
+# TESTS - Deterministic intent routing
+# Path: backend/tests/test_intent_router.py
+# ============================================================================
+
+import asyncio
+import json
+
+import pytest
+
+from agents.intent_router import IntentRouter, parse_bare_pan, parse_emi_request
+from utils.policy_engine import DEFAULT_POLICY_PATH, CompiledPolicy, policy_engine
+from utils.session_manager import session_manager
+
+def route(message):
+    async def run():
+        session_id = await session_manager.create_session()
+        return await IntentRouter().route(message, session_id)
+    
+    return asyncio.run(run())
+
+def test_emi_request_is_parsed():
+    assert parse_emi_request("EMI for 5 lakh at 12% for 3 years") == {
+        "loan_amount": 500000.0, "interest_rate": 12.0, "tenure": 36
+    }
+    assert parse_emi_request("EMI for 5 lakh at 12% for 3 years, am I eligible?") is None
+
+def test_pan_route_uses_policy_minimum_credit_score(fake_lookups, monkeypatch):
+    # FGHIJ5678K scores 680 - above the shipped minimum of 650
+    assert "below our minimum" not in route("FGHIJ5678K")["response"]
+    
+    with open(DEFAULT_POLICY_PATH, encoding="utf-8") as f:
+        stricter = json.load(f)
+    for rule in stricter["rules"]:
+        if rule["field"] == "credit_score":
+            rule["min"] = 700
+    monkeypatch.setattr(policy_engine, "_policy", CompiledPolicy(stricter))
+    
+    routed = route("FGHIJ5678K")
+    assert routed["intent"] == "pan_submission"
+    assert "credit score is 680, which is below our minimum requirement of 700" in routed["response"]
+
+@pytest.mark.parametrize("message, pan", [
+    ("ABCDE1234F", "ABCDE1234F"),
+    ("my pan is abcde1234f.", "ABCDE1234F"),
+    ("PAN: FGHIJ5678K", "FGHIJ5678K"),
+    ("36months", None),
+    ("5lakh2024", None),
+    ("GOODPAN123", None),
+    ("ABCDE1234", None)
+])
+def test_only_pan_formatted_tokens_are_pan_submissions(message, pan):
+    assert parse_bare_pan(message) == pan
+
+def test_short_reply_does_not_trigger_bureau_lookups(fake_lookups):
+    assert route("36months") is None
+    assert fake_lookups == []
+
+def test_unknown_pan_asks_to_double_check(fake_lookups):
+    routed = route("ZZZZZ9999Z")
+    assert "couldn't find PAN ZZZZZ9999Z" in routed["response"]
+
+def test_pan_mid_conversation_is_left_to_the_agent(fake_lookups):
+    async def run():
+        router = IntentRouter()
+        
+        answered = await session_manager.create_session()
+        await session_manager.add_message(answered, "user", "I need a personal loan")
+        await session_manager.add_message(answered, "assistant", "Sure! Could you share your PAN?")
+        await session_manager.add_message(answered, "user", "ABCDE1234F")
+        
+        pinned = await session_manager.create_session()
+        await session_manager.update_customer_data(pinned, {"loan_amount": 500000.0, "tenure_months": 36})
+        
+        return await router.route("ABCDE1234F", answered), await router.route("ABCDE1234F", pinned), router
+    
+    after_reply, with_facts, router = asyncio.run(run())
+    assert after_reply is None and with_facts is None
+    assert fake_lookups == []
+    assert router.get_stats()["fallthrough"] == 2
+
+def test_pan_as_the_opening_message_is_routed(fake_lookups):
+    async def run():
+        session_id = await session_manager.create_session()
+        await session_manager.add_message(session_id, "user", "ABCDE1234F")
+        return await IntentRouter().route("ABCDE1234F", session_id)
+    
+    routed = asyncio.run(run())
+    assert routed["intent"] == "pan_submission"
+    assert "How much loan amount do you need?" in routed["response"]
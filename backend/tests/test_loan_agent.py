@@ -0,0 +1,81 @@
+# ============================================================================
+# TESTS - Loan agent turn handling (LLM replaced by a canned executor result)
+# Path: backend/tests/test_loan_agent.py
+# ============================================================================
+
+import asyncio
+
+import pytest
+from langchain_core.agents import AgentAction
+
+import agents.loan_agent as loan_agent_module
+from agents.loan_agent import LoanAgent
+from agents.response_cache import SemanticResponseCache, is_cacheable_question
+from database.write_behind import WriteBehindQueue
+
+QUESTION = "What documents are needed for a personal loan?"
+ANSWER = "You need PAN, Aadhaar and your last three salary slips."
+
+@pytest.fixture(scope="module")
+def agent():
+    return LoanAgent()
+
+@pytest.fixture
+def response_cache(monkeypatch, agent):
+    cache = SemanticResponseCache(threshold=0.9)
+    monkeypatch.setattr(loan_agent_module, "response_cache", cache)
+    
+    async def embed(message):
+        return [1.0, 0.0, 0.0] if is_cacheable_question(message) else None
+    
+    monkeypatch.setattr(agent, "_embed_cacheable", embed)
+    return cache
+
+@pytest.fixture
+def knowledge_answer(monkeypatch, agent):
+    """Executor run that answered from retrieve_knowledge_tool"""
+    calls = []
+    
+    async def ainvoke(inputs, estimated_tokens=0, config=None):
+        calls.append(inputs)
+        step = (AgentAction(tool="retrieve_knowledge_tool", tool_input={"query": inputs["input"]}, log=""), "docs")
+        return {"output": ANSWER, "intermediate_steps": [step]}
+    
+    monkeypatch.setattr(agent.executor_pool, "ainvoke", ainvoke)
+    return calls
+
+def test_answer_without_history_is_cached_and_reused(agent, response_cache, knowledge_answer):
+    first = asyncio.run(agent.invoke(QUESTION))
+    assert not first.get("cached")
+    assert response_cache.stores == 1
+    
+    second = asyncio.run(agent.invoke(QUESTION))
+    assert second["cached"] is True
+    assert second["response"] == ANSWER
+    assert len(knowledge_answer) == 1
+
+def test_answer_generated_with_session_history_is_not_cached(agent, response_cache, knowledge_answer):
+    session_id = asyncio.run(agent.invoke("Hello, I am Asha"))["session_id"]
+    
+    result = asyncio.run(agent.invoke(QUESTION, session_id))
+    
+    assert knowledge_answer[-1]["chat_history"], "second turn should carry the first one"
+    assert result["response"] == ANSWER
+    assert response_cache.stores == 0
+
+def test_failed_turn_persists_the_user_message(agent, monkeypatch):
+    queue = WriteBehindQueue()
+    monkeypatch.setattr(loan_agent_module, "persistence_queue", queue)
+    
+    async def ainvoke(inputs, estimated_tokens=0, config=None):
+        raise RuntimeError("LLM unavailable")
+    
+    monkeypatch.setattr(agent.executor_pool, "ainvoke", ainvoke)
+    
+    result = asyncio.run(agent.invoke("Hello, I need a loan"))
+    
+    assert result["error"] == "LLM unavailable"
+    assert [(row["sender"], row["message"]) for row, _ in queue._messages] == [
+        ("user", "Hello, I need a loan"),
+        ("agent", result["response"])
+    ]
@@ -0,0 +1,84 @@
+# ============================================================================
+# TESTS - Declarative underwriting policy
+# Path: backend/tests/test_policy_engine.py
+# ============================================================================
+
+import copy
+import json
+
+import pytest
+
+from utils.policy_engine import DEFAULT_POLICY_PATH, CompiledPolicy, PolicyEngine
+
+with open(DEFAULT_POLICY_PATH, encoding="utf-8") as f:
+    DEFINITION = json.load(f)
+
+def definition(**changes):
+    policy = copy.deepcopy(DEFINITION)
+    policy.update(changes)
+    return policy
+
+def without_rule(field):
+    return definition(rules=[rule for rule in DEFINITION["rules"] if rule["field"] != field])
+
+def write(path, policy):
+    path.write_text(json.dumps(policy), encoding="utf-8")
+
+def test_decision_evaluator_reports_failed_rules():
+    policy = CompiledPolicy(DEFINITION)
+    evaluate = policy.evaluators["decision"]
+    
+    results, failed, interest_rate, monthly_emi, dti_ratio = evaluate(30, 30000, "Self-Employed", 640, 500000, 0, 36)
+    
+    assert results == {"age_check": True, "income_check": False, "credit_score_check": False, "dti_check": False}
+    assert failed == ["Minimum income ₹40,000", "Credit score below 650", f"DTI ratio {dti_ratio:.1f}% exceeds 50%"]
+    assert interest_rate == 15.0
+    assert policy.min_income("Salaried") == 25000
+    assert evaluate(30, 30000, "Salaried", 780, 100000, 0, 36)[1] == []
+
+def test_rule_timing_is_sampled():
+    policy = CompiledPolicy(DEFINITION, timing_every=4)
+    for _ in range(8):
+        policy.evaluators["rules"](30, 50000, "Salaried", 700, 200000, 0, 24)
+    
+    assert policy.evaluations == 8
+    assert [rule.timed for rule in policy.rules] == [2] * len(policy.rules)
+
+@pytest.mark.parametrize("bad", [
+    without_rule("credit_score"),
+    without_rule("monthly_income"),
+    definition(credit_bands=[]),
+    definition(rules=[{"name": "age_check", "field": "age", "min": 21}]),
+    {"version": "broken"}
+])
+def test_invalid_definition_raises_value_error(bad):
+    with pytest.raises(ValueError):
+        CompiledPolicy(bad)
+
+def test_reload_with_bad_policy_keeps_active_version(tmp_path):
+    path = tmp_path / "underwriting.json"
+    write(path, definition(version="good"))
+    engine = PolicyEngine(str(path), check_interval=0)
+    
+    write(path, definition(version="no-credit-rule", rules=without_rule("credit_score")["rules"]))
+    with pytest.raises(ValueError, match="credit_score"):
+        engine.reload()
+    
+    assert engine.policy.version == "good"
+    assert engine.reload_errors == 1
+    assert "credit_score" in engine.get_stats()["last_error"]
+
+def test_changed_file_is_picked_up_on_next_check(tmp_path):
+    path = tmp_path / "underwriting.json"
+    write(path, DEFINITION)
+    engine = PolicyEngine(str(path), check_interval=0.0001)
+    
+    changed = definition(version="2099.1")
+    changed["rules"][2]["min"] = 700
+    write(path, changed)
+    engine._mtime = None  # same-second writes can share an mtime
+    engine._next_check = 0
+    
+    assert engine.policy.version == "2099.1"
+    assert engine.policy.min_credit_score == 700
+    assert engine.reloads == 1
@@ -0,0 +1,135 @@
+# ============================================================================
+# TESTS - Speculative KYC / credit / customer lookups
+# Path: backend/tests/test_prefetch.py
+# ============================================================================
+
+import asyncio
+import json
+import time
+
+import pytest
+
+import agents.prefetch as prefetch
+from agents.prefetch import LookupPrefetcher
+from tools.loan_tools import verify_kyc_tool
+
+class SlowLookups:
+    """Lookups that take `delay` seconds; failures scripted per kind"""
+    
+    def __init__(self, monkeypatch, delay=0.05):
+        self.delay = delay
+        self.calls = []
+        self.fail = set()
+        for kind in ("kyc", "credit", "customer"):
+            monkeypatch.setitem(prefetch.LOOKUPS, kind, self._lookup(kind))
+    
+    def _lookup(self, kind):
+        async def lookup(pan):
+            self.calls.append((kind, pan))
+            await asyncio.sleep(self.delay)
+            if kind in self.fail:
+                raise ConnectionError(f"{kind} bureau down")
+            return {"kind": kind, "pan": pan}
+        return lookup
+
+@pytest.fixture
+def lookups(monkeypatch):
+    return SlowLookups(monkeypatch)
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_pan_in_message_starts_every_lookup(lookups):
+    async def scenario():
+        prefetcher = LookupPrefetcher()
+        pan = prefetcher.prefetch_message("Sure, my pan is abcde1234f")
+        await asyncio.sleep(0)
+        return pan, prefetcher.get_stats()
+    
+    pan, stats = run(scenario())
+    assert pan == "ABCDE1234F"
+    assert sorted(lookups.calls) == [("credit", pan), ("customer", pan), ("kyc", pan)]
+    assert stats["prefetched"] == 3
+
+def test_no_pan_or_disabled_starts_nothing(lookups):
+    async def scenario():
+        assert LookupPrefetcher().prefetch_message("I need a loan of 5 lakh") is None
+        assert LookupPrefetcher(enabled=False).prefetch_message("PAN ABCDE1234F") is None
+        await asyncio.sleep(0)
+    
+    run(scenario())
+    assert lookups.calls == []
+
+def test_tool_fetch_awaits_the_running_lookup(lookups):
+    async def scenario():
+        prefetcher = LookupPrefetcher()
+        prefetcher.prefetch("ABCDE1234F")
+        await asyncio.sleep(0.03)  # LLM still deciding
+        
+        start = time.perf_counter()
+        record = await prefetcher.fetch("kyc", "abcde1234f")
+        waited = time.perf_counter() - start
+        
+        again = await prefetcher.fetch("kyc", "ABCDE1234F")
+        return record, again, waited, prefetcher.get_stats()
+    
+    record, again, waited, stats = run(scenario())
+    assert record == again == {"kind": "kyc", "pan": "ABCDE1234F"}
+    assert waited < lookups.delay
+    assert lookups.calls.count(("kyc", "ABCDE1234F")) == 2  # each prefetch serves one call
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["avg_head_start_ms"] >= 25
+
+def test_stale_or_failed_prefetch_is_looked_up_again(lookups):
+    async def scenario():
+        prefetcher = LookupPrefetcher(ttl=0.01)
+        lookups.fail.add("credit")
+        prefetcher.prefetch("ABCDE1234F")
+        await asyncio.sleep(0.1)
+        lookups.fail.clear()
+        
+        kyc = await prefetcher.fetch("kyc", "ABCDE1234F")
+        credit = await prefetcher.fetch("credit", "ABCDE1234F")
+        return kyc, credit, prefetcher.get_stats()
+    
+    kyc, credit, stats = run(scenario())
+    assert kyc["kind"] == "kyc" and credit["kind"] == "credit"
+    assert stats["hits"] == 0 and stats["misses"] == 2
+
+def test_cancelled_tool_call_does_not_cancel_the_lookup(lookups):
+    async def scenario():
+        prefetcher = LookupPrefetcher()
+        prefetcher.prefetch("ABCDE1234F")
+        task, _ = prefetcher._tasks[("kyc", "ABCDE1234F")]
+        
+        caller = asyncio.create_task(prefetcher.fetch("kyc", "ABCDE1234F"))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        await asyncio.sleep(lookups.delay)
+        return task
+    
+    task = run(scenario())
+    assert task.done() and not task.cancelled()
+
+def test_tracked_lookups_are_bounded(lookups):
+    async def scenario():
+        prefetcher = LookupPrefetcher(max_entries=4)
+        for pan in ("ABCDE1234F", "FGHIJ5678K", "PENDG1234B"):
+            prefetcher.prefetch(pan)
+        await asyncio.sleep(lookups.delay * 2)
+        return prefetcher.get_stats()
+    
+    assert run(scenario())["tracked_lookups"] == 4
+
+def test_kyc_tool_uses_the_prefetched_lookup(fake_lookups, monkeypatch):
+    prefetcher = LookupPrefetcher()
+    monkeypatch.setattr(prefetch, "lookup_prefetcher", prefetcher)
+    
+    async def scenario():
+        prefetcher.prefetch_message("My PAN is ABCDE1234F")
+        return await verify_kyc_tool.ainvoke({"pan": "ABCDE1234F"})
+    
+    result = json.loads(run(scenario()))
+    assert result["verified"] is True
+    assert fake_lookups.count(("kyc", "ABCDE1234F")) == 1
+    assert prefetcher.get_stats()["hits"] == 1
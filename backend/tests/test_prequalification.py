@@ -0,0 +1,107 @@
+# ============================================================================
+# TESTS - Bulk pre-qualification pipeline
+# Path: backend/tests/test_prequalification.py
+# ============================================================================
+
+import asyncio
+import io
+import json
+
+import pytest
+
+import utils.prequalification as prequalification
+from utils.bureau_cache import BureauCache
+from utils.prequalification import BulkPrequalifier, parse_lead
+
+KYC = {
+    "GOODP1234A": {"kyc_status": "VERIFIED", "full_name": "Asha Rao", "date_of_birth": "1988-04-12"},
+    "PENDG1234B": {"kyc_status": "PENDING_AADHAAR_LINK", "full_name": "Ravi Iyer", "date_of_birth": "1990-01-01"},
+}
+CREDIT = {"GOODP1234A": {"score": 790}, "PENDG1234B": {"score": 700}}
+
+@pytest.fixture(autouse=True)
+def fast_bureau(monkeypatch):
+    """In-memory bureau instead of the one-second mock lookups"""
+    async def kyc(pan):
+        return KYC.get(pan)
+    
+    async def credit(pan):
+        return CREDIT.get(pan)
+    
+    cache = BureauCache(fetchers={"kyc": kyc, "credit": credit}, ttls={"kyc": 60, "credit": 60})
+    monkeypatch.setattr(prequalification, "bureau_cache", cache)
+
+def run_job(prequalifier: BulkPrequalifier, content: str, fmt: str):
+    async def collect():
+        return [json.loads(line) async for line in prequalifier.run(io.BytesIO(content.encode()), fmt)]
+    
+    # A hung stream fails the test instead of the suite
+    return asyncio.run(asyncio.wait_for(collect(), timeout=10))
+
+def test_statuses_and_summary():
+    content = (
+        "pan,monthly_income,employment_type,loan_amount\n"
+        "GOODP1234A,85000,salaried,500000\n"
+        "PENDG1234B,85000,salaried,500000\n"
+        "NOPAN0000Z,85000,salaried,500000\n"
+        ",85000,salaried,500000\n"
+    )
+    lines = run_job(BulkPrequalifier(concurrency=2), content, "csv")
+    
+    statuses = {line["row"]: line["status"] for line in lines if line["type"] == "result"}
+    assert statuses == {1: "pre_approved", 2: "kyc_failed", 3: "not_found", 4: "invalid"}
+    assert lines[-1]["type"] == "summary"
+    assert lines[-1]["processed"] == 4
+
+def test_bulk_lookups_leave_the_shared_cache_alone():
+    content = "pan,monthly_income,employment_type,loan_amount\nGOODP1234A,85000,salaried,500000\n"
+    run_job(BulkPrequalifier(), content, "csv")
+    
+    stats = prequalification.bureau_cache.get_stats()
+    assert stats["kyc"]["size"] == stats["credit"]["size"] == 0
+    assert stats["kyc"]["uncached_calls"] == stats["credit"]["uncached_calls"] == 1
+
+def test_raising_row_is_reported_and_stream_finishes(monkeypatch):
+    real_decision = prequalification.underwriting_decision
+    
+    def flaky_decision(*args):
+        if args[4] == 123456:
+            raise ZeroDivisionError("float division by zero")
+        return real_decision(*args)
+    
+    monkeypatch.setattr(prequalification, "underwriting_decision", flaky_decision)
+    
+    # More rows than workers - every worker has to survive the failing rows
+    rows = [f'{{"pan": "GOODP1234A", "monthly_income": 90000, "employment_type": "Salaried", "loan_amount": {amount}}}'
+            for amount in (123456, 300000, 123456, 400000, 123456, 500000)]
+    lines = run_job(BulkPrequalifier(concurrency=2), "\n".join(rows), "jsonl")
+    
+    results = {line["row"]: line for line in lines if line["type"] == "result"}
+    assert len(results) == 6
+    assert [results[row]["status"] for row in (1, 3, 5)] == ["error"] * 3
+    assert "ZeroDivisionError" in results[1]["reason"]
+    assert [results[row]["status"] for row in (2, 4, 6)] == ["pre_approved"] * 3
+    assert lines[-1] == {**lines[-1], "type": "summary", "processed": 6, "error": 3}
+
+@pytest.mark.parametrize("tenure", [0.5, 0, -12, "12.5"])
+def test_non_whole_or_non_positive_tenure_is_invalid(tenure):
+    with pytest.raises(ValueError, match="tenure"):
+        parse_lead({"pan": "GOODP1234A", "monthly_income": 50000, "employment_type": "Salaried", "tenure": tenure})
+
+def test_fractional_tenure_row_is_invalid_not_fatal():
+    content = '{"pan": "GOODP1234A", "monthly_income": 90000, "employment_type": "Salaried", "tenure": 0.5}\n'
+    lines = run_job(BulkPrequalifier(concurrency=1), content, "jsonl")
+    
+    assert lines[0]["status"] == "invalid"
+    assert lines[-1]["type"] == "summary"
+
+def test_tenure_defaults_to_36_months():
+    lead = parse_lead({"pan": "goodp1234a", "monthly_income": "50,000", "employment_type": "self employed"})
+    assert lead == {
+        "pan": "GOODP1234A",
+        "monthly_income": 50000.0,
+        "employment_type": "Self-Employed",
+        "loan_amount": None,
+        "tenure": 36,
+        "existing_emi": 0
+    }
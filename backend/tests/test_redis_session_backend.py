@@ -0,0 +1,70 @@
+# ============================================================================
+# TESTS - Redis session backend (fakeredis with Lua support)
+# Path: backend/tests/test_redis_session_backend.py
+# ============================================================================
+
+import asyncio
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from utils.redis_session_backend import RedisSessionBackend
+
+def backend():
+    return RedisSessionBackend(ttl_minutes=1, client=fakeredis.FakeAsyncRedis(decode_responses=True))
+
+async def age(store, session_id, seconds):
+    """Pretend the session was last active `seconds` ago"""
+    await store.client.zadd(store.active_key, {session_id: time.time() - seconds})
+
+def test_messages_and_customer_data_round_trip():
+    async def run():
+        store = backend()
+        session_id = await store.create_session()
+        await store.add_message(session_id, "user", "Hi")
+        await store.update_customer_data(session_id, {"pan": "ABCDE1234F", "monthly_income": 85000})
+        return await store.get_messages(session_id), await store.get_customer_data(session_id)
+    
+    messages, customer = asyncio.run(run())
+    assert [m["content"] for m in messages] == ["Hi"]
+    assert customer == {"pan": "ABCDE1234F", "monthly_income": 85000}
+
+def test_cleanup_removes_idle_sessions():
+    async def run():
+        store = backend()
+        idle, live = await store.create_session(), await store.create_session()
+        await age(store, idle, 120)
+        
+        removed = await store.cleanup_inactive_sessions()
+        return removed, await store.get_session(idle), await store.get_session(live)
+    
+    removed, idle, live = asyncio.run(run())
+    assert removed == 1
+    assert idle is None
+    assert live is not None
+
+def test_cleanup_keeps_session_touched_after_the_scan():
+    async def run():
+        store = backend()
+        session_id = await store.create_session()
+        await store.add_message(session_id, "user", "Still here")
+        await age(store, session_id, 120)
+        
+        # The session gets a new message between the index scan and the delete
+        scan = store.client.zrangebyscore
+        
+        async def scan_then_touch(*args, **kwargs):
+            expired = await scan(*args, **kwargs)
+            await store.add_message(session_id, "user", "Another message")
+            return expired
+        
+        store.client.zrangebyscore = scan_then_touch
+        removed = await store.cleanup_inactive_sessions()
+        return removed, await store.get_messages(session_id)
+    
+    removed, messages = asyncio.run(run())
+    assert removed == 0
+    assert [m["content"] for m in messages] == ["Still here", "Another message"]
@@ -0,0 +1,145 @@
+# ============================================================================
+# TESTS - Async PostgREST repository (HTTP mocked with httpx.MockTransport)
+# Path: backend/tests/test_repository.py
+# ============================================================================
+
+import asyncio
+import functools
+import json
+import time
+
+import httpx
+import pytest
+
+import database.repository as repository
+from database.repository import AsyncPostgrestClient, Repository, RepositoryError
+
+class FakePostgrest:
+    """Records requests; `respond(request)` decides the reply"""
+    
+    def __init__(self):
+        self.requests = []
+        self.respond = lambda request: httpx.Response(200, json=[])
+    
+    async def __call__(self, request):
+        self.requests.append(request)
+        reply = self.respond(request)
+        if asyncio.iscoroutine(reply):
+            reply = await reply
+        return reply
+
+@pytest.fixture
+def server(monkeypatch):
+    server = FakePostgrest()
+    transport = httpx.MockTransport(server)
+    monkeypatch.setattr(repository.httpx, "AsyncClient", functools.partial(httpx.AsyncClient, transport=transport))
+    return server
+
+@pytest.fixture
+def repo(server):
+    return Repository(AsyncPostgrestClient("https://db.example.supabase.co", "service-key"))
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_select_builds_postgrest_query(server, repo):
+    server.respond = lambda request: httpx.Response(200, json=[{"id": "c1", "pan_number": "ABCDE1234F"}])
+    
+    customer = run(repo.customers.get_by_pan("ABCDE1234F"))
+    
+    request = server.requests[0]
+    assert customer["id"] == "c1"
+    assert request.method == "GET"
+    assert request.url.path == "/rest/v1/customers"
+    assert request.url.params["pan_number"] == "eq.ABCDE1234F"
+    assert request.url.params["limit"] == "1"
+    assert request.headers["apikey"] == "service-key"
+    assert request.headers["authorization"] == "Bearer service-key"
+
+def test_missing_row_is_none(server, repo):
+    assert run(repo.customers.get_by_pan("ZZZZZ9999Z")) is None
+
+def test_bulk_insert_is_one_request_without_representation(server, repo):
+    server.respond = lambda request: httpx.Response(201)
+    rows = [{"session_id": "s1", "sender": "user", "message": f"m{i}"} for i in range(3)]
+    
+    run(repo.messages.create_many(rows))
+    
+    assert len(server.requests) == 1
+    request = server.requests[0]
+    assert request.method == "POST"
+    assert request.headers["prefer"] == "return=minimal"
+    assert json.loads(request.content) == rows
+
+def test_session_upsert_ignores_duplicates(server, repo):
+    server.respond = lambda request: httpx.Response(201)
+    
+    run(repo.sessions.create_many(["s1", "s2"]))
+    
+    assert server.requests[0].headers["prefer"] == "return=minimal,resolution=ignore-duplicates"
+
+def test_errors_raise_with_status(server, repo):
+    server.respond = lambda request: httpx.Response(409, json={"message": "duplicate key value"})
+    
+    with pytest.raises(RepositoryError, match="duplicate key value") as error:
+        run(repo.customers.create({"pan_number": "ABCDE1234F"}))
+    assert error.value.status_code == 409
+
+def test_list_chunks_pages_past_row_limit(server, repo):
+    rows = [{"id": f"{i:03d}", "content": f"chunk {i}", "metadata": {}} for i in range(5)]
+    
+    def respond(request):
+        offset = int(request.url.params.get("offset", 0))
+        limit = int(request.url.params["limit"])
+        return httpx.Response(200, json=rows[offset:offset + limit])
+    
+    server.respond = respond
+    
+    assert run(repo.knowledge_base.list_chunks(page_size=2)) == rows
+    assert [r.url.params.get("offset") for r in server.requests] == [None, "2", "4"]
+
+def test_delete_by_ids_batches_in_filters(server, repo):
+    run(repo.knowledge_base.delete_by_ids(["a", "b", "c"], batch_size=2))
+    
+    assert [r.url.params["id"] for r in server.requests] == ["in.(a,b)", "in.(c)"]
+
+def test_requests_overlap_on_the_event_loop(server, repo):
+    async def slow(request):
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json=[])
+    
+    server.respond = slow
+    
+    async def lookups():
+        start = time.perf_counter()
+        await asyncio.gather(*(repo.customers.get_by_pan(f"ABCDE{i:04d}F") for i in range(5)))
+        return time.perf_counter() - start
+    
+    # Five 200 ms round trips share the loop instead of running back to back
+    assert run(lookups()) < 0.6
+
+def test_reindex_stages_rows_in_batches_and_swaps_by_id(server, repo):
+    rows = [
+        {"id": f"row-{i}", "content": f"chunk {i}", "embedding": [0.1] * 768, "metadata": {"chunk_index": i}}
+        for i in range(450)
+    ]
+    
+    async def scenario():
+        await repo.knowledge_base.stage_chunks("run-1", rows)
+        await repo.knowledge_base.swap_chunks("run-1", ["old-1"], [{"id": "kept-1", "metadata": {"chunk_index": 0}}])
+    
+    run(scenario())
+    
+    *stages, swap = server.requests
+    assert [len(json.loads(request.content)) for request in stages] == [200, 200, 50]
+    assert all(request.url.path == "/rest/v1/knowledge_base_staging" for request in stages)
+    assert json.loads(stages[0].content)[0]["reindex_id"] == "run-1"
+    
+    # The swap carries ids only - never the embeddings
+    assert swap.url.path == "/rest/v1/rpc/reindex_knowledge"
+    assert json.loads(swap.content) == {
+        "reindex_id": "run-1",
+        "stale_ids": ["old-1"],
+        "kept_metadata": [{"id": "kept-1", "metadata": {"chunk_index": 0}}]
+    }
+    assert len(swap.content) < 200
@@ -0,0 +1,97 @@
+# ============================================================================
+# TESTS - Semantic response cache for generic product questions
+# Path: backend/tests/test_response_cache.py
+# ============================================================================
+
+import pytest
+
+import agents.response_cache as response_cache_module
+from agents.response_cache import SemanticResponseCache, is_cacheable_question
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+    
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache_module.time, "time", clock)
+    return clock
+
+@pytest.mark.parametrize("message", [
+    "What documents are needed for a personal loan?",
+    "how is the interest rate decided",
+    "Explain the prepayment charges",
+    "Is there a processing fee?"
+])
+def test_generic_questions_are_cacheable(message):
+    assert is_cacheable_question(message)
+
+@pytest.mark.parametrize("message", [
+    "What is my EMI?",
+    "Can I get a loan of 5 lakh?",
+    "My PAN is ABCDE1234F",
+    "Thanks, that helps",
+    "",
+    "What " + "about the fees " * 20 + "?"
+])
+def test_personal_or_non_questions_are_not_cacheable(message):
+    assert not is_cacheable_question(message)
+
+def test_similar_question_hits_and_dissimilar_misses(clock):
+    cache = SemanticResponseCache(threshold=0.9)
+    cache.store("What documents are needed?", [1.0, 0.0, 0.0], "PAN and Aadhaar", ["retrieve_knowledge_tool"])
+    
+    hit = cache.lookup([10.0, 1.0, 0.0])  # cosine ~0.995, scale doesn't matter
+    miss = cache.lookup([1.0, 1.0, 0.0])  # cosine ~0.707
+    
+    assert hit["answer"] == "PAN and Aadhaar"
+    assert hit["matched_question"] == "What documents are needed?"
+    assert hit["tools_used"] == ["retrieve_knowledge_tool"]
+    assert hit["similarity"] > 0.99
+    assert miss is None
+    assert cache.get_stats()["hit_rate"] == 0.5
+
+def test_best_match_is_returned(clock):
+    cache = SemanticResponseCache(threshold=0.5)
+    cache.store("fees", [1.0, 0.0], "fee answer", [])
+    cache.store("rates", [0.0, 1.0], "rate answer", [])
+    
+    assert cache.lookup([0.2, 1.0])["answer"] == "rate answer"
+    assert cache.lookup([1.0, 0.2])["answer"] == "fee answer"
+
+def test_expired_answer_is_dropped(clock):
+    cache = SemanticResponseCache(ttl=60)
+    cache.store("fees", [1.0, 0.0], "fee answer", [])
+    
+    clock.now += 61
+    
+    assert cache.lookup([1.0, 0.0]) is None
+    assert cache.get_stats()["entries"] == 0
+
+def test_oldest_unused_answer_is_evicted(clock):
+    cache = SemanticResponseCache(threshold=0.99, max_entries=2)
+    cache.store("a", [1.0, 0.0, 0.0], "A", [])
+    cache.store("b", [0.0, 1.0, 0.0], "B", [])
+    cache.lookup([1.0, 0.0, 0.0])  # "a" becomes most recently used
+    cache.store("c", [0.0, 0.0, 1.0], "C", [])
+    
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    assert cache.lookup([1.0, 0.0, 0.0])["answer"] == "A"
+    assert cache.lookup([0.0, 0.0, 1.0])["answer"] == "C"
+    assert cache.get_stats()["evictions"] == 1
+
+def test_invalidate_and_zero_vectors(clock):
+    cache = SemanticResponseCache()
+    cache.store("zero", [0.0, 0.0], "never stored", [])
+    assert cache.get_stats()["stores"] == 0
+    assert cache.lookup([0.0, 0.0]) is None
+    
+    cache.store("fees", [1.0, 0.0], "fee answer", [])
+    cache.invalidate()
+    
+    assert cache.lookup([1.0, 0.0]) is None
+    assert cache.get_stats()["invalidations"] == 1
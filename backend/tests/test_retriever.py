@@ -0,0 +1,138 @@
+# ============================================================================
+# TESTS - Knowledge retriever routing and caching (no network)
+# Path: backend/tests/test_retriever.py
+# ============================================================================
+
+import os
+
+import pytest
+
+from rag.bm25 import BM25Index, split_heading
+from rag.chunker import chunk_file
+from rag.retriever import KnowledgeRetriever
+from tests.conftest import BACKEND_DIR
+
+KNOWLEDGE_BASE = os.path.join(BACKEND_DIR, "..", "knowledge_base.md")
+
+@pytest.fixture(scope="module")
+def knowledge_rows():
+    return [{"id": i, "content": chunk} for i, chunk in enumerate(chunk_file(KNOWLEDGE_BASE))]
+
+@pytest.fixture
+def retriever(knowledge_rows):
+    """Retriever over the real knowledge base with a recording vector search"""
+    retriever = KnowledgeRetriever()
+    retriever.set_bm25_index(BM25Index(knowledge_rows))
+    retriever.vector_queries = []
+    
+    def vector_search(query, top_k):
+        retriever.vector_queries.append(query)
+        return []
+    
+    retriever._vector_search = vector_search
+    return retriever
+
+def test_split_heading():
+    assert split_heading("Fees > Processing\n2% of the loan") == ("Fees > Processing", "2% of the loan")
+    assert split_heading("2% of the loan") == ("", "2% of the loan")
+
+def test_heading_terms_rank_but_do_not_count_as_coverage():
+    index = BM25Index([
+        {"content": "Company Information > Fees\nProcessing fee is 2%"},
+        {"content": "Products\nPersonal loans up to ten lakh"}
+    ])
+    
+    doc, score, confidence = index.search("company")[0]
+    assert doc == 0 and score > 0
+    assert confidence == 0.0
+    assert index.search("processing fee")[0][2] == 1.0
+
+@pytest.mark.parametrize("query", [
+    "what is the interest rate?",
+    "how do I apply for a loan",
+    "tell me about the company",
+    "processing fee",
+    "eligibility criteria",
+    "sanction letter format"
+])
+def test_ambiguous_keyword_queries_use_vector_search(retriever, query):
+    retriever.retrieve(query)
+    
+    assert retriever.vector_queries == [query]
+    assert retriever.get_stats()["lexical_fast_path"] == 0
+
+def test_clear_keyword_lookup_takes_fast_path(retriever):
+    results = retriever.retrieve("foreclosure charges", top_k=1)
+    
+    assert retriever.vector_queries == []
+    assert retriever.get_stats()["lexical_fast_path"] == 1
+    assert "No foreclosure charges" in results[0]["content"]
+
+class FlakyEmbedder:
+    """Zero vector (what GeminiEmbeddings returns on errors) until healthy"""
+    
+    def __init__(self):
+        self.healthy = False
+        self.queries = []
+    
+    def embed_query(self, query):
+        self.queries.append(query)
+        return [0.1, 0.2, 0.3] if self.healthy else [0.0, 0.0, 0.0]
+
+@pytest.fixture
+def vector_retriever(monkeypatch):
+    """Vector-only retriever with a fake embedder and pgvector search"""
+    retriever = KnowledgeRetriever()
+    retriever.embedder = FlakyEmbedder()
+    
+    def vector_search(query, top_k):
+        retriever.embed_query(query)
+        return [{"content": "Processing fee is 2% of the loan amount", "similarity": 0.9}]
+    
+    monkeypatch.setattr(retriever, "_vector_search", vector_search)
+    return retriever
+
+class StaticIndex:
+    """Local vector index that returns fixed rows"""
+    
+    def search(self, embedding, threshold, top_k):
+        return [{"content": "Vector match: processing fee is 2% of the loan amount", "similarity": 0.9}]
+    
+    def get_stats(self):
+        return {}
+
+def test_failed_embedding_falls_back_to_bm25_and_is_not_cached(knowledge_rows):
+    retriever = KnowledgeRetriever()
+    retriever.embedder = FlakyEmbedder()
+    retriever.set_bm25_index(BM25Index(knowledge_rows))
+    retriever.local_index = StaticIndex()
+    
+    with pytest.raises(ValueError):
+        retriever.embed_query("Processing fee?")
+    
+    degraded = retriever.get_context("processing fee")
+    assert degraded != "No relevant information found in knowledge base."
+    assert "Vector match" not in degraded
+    assert retriever.get_stats()["lexical_fallbacks"] == 1
+    assert retriever.get_stats()["context_cache"]["size"] == 0
+    
+    retriever.embedder.healthy = True
+    assert retriever.embed_query("Processing fee?") == [0.1, 0.2, 0.3]
+    assert "Vector match" in retriever.get_context("processing fee")
+    assert retriever.get_stats()["hybrid_queries"] == 1
+
+def test_failed_embedding_does_not_poison_context_cache(vector_retriever):
+    assert vector_retriever.get_context("What is the processing fee?") == (
+        "No relevant information found in knowledge base."
+    )
+    
+    vector_retriever.embedder.healthy = True
+    assert "Processing fee is 2%" in vector_retriever.get_context("What is the processing fee?")
+
+def test_original_query_is_embedded_and_cache_keyed_on_normalized_form(vector_retriever):
+    vector_retriever.embedder.healthy = True
+    
+    vector_retriever.embed_query("What is the Processing Fee?")
+    vector_retriever.embed_query("what is the processing fee")
+    
+    assert vector_retriever.embedder.queries == ["What is the Processing Fee?"]
@@ -0,0 +1,184 @@
+# ============================================================================
+# TESTS - In-memory session store (expiry, LRU/byte caps, compact records)
+# Path: backend/tests/test_session_manager.py
+# ============================================================================
+
+import asyncio
+import random
+import sys
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import utils.session_manager as session_module
+from benchmarks import session_memory
+from utils.session_manager import InMemorySessionBackend, Message
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+    
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(session_module.time, "time", clock)
+    return clock
+
+def run(coro):
+    return asyncio.run(coro)
+
+async def create(store, count):
+    return [await store.create_session() for _ in range(count)]
+
+def test_session_count_cap_evicts_least_recently_used(clock):
+    store = InMemorySessionBackend(max_sessions=3)
+    
+    async def scenario():
+        first, second, third = await create(store, 3)
+        await store.touch_session(first)
+        fourth = await store.create_session()
+        return first, second, third, fourth
+    
+    first, second, third, fourth = run(scenario())
+    assert list(store.sessions) == [third, first, fourth]
+    assert run(store.get_stats())["lru_evictions"] == 1
+
+def test_byte_cap_evicts_until_under(clock):
+    store = InMemorySessionBackend(max_bytes=4000)
+    
+    async def scenario():
+        first, second = await create(store, 2)
+        await store.add_message(first, "user", "x" * 1000)
+        await store.add_message(second, "user", "y" * 1000)
+        await store.add_message(second, "assistant", "z" * 1500)
+        return first, second
+    
+    first, second = run(scenario())
+    stats = run(store.get_stats())
+    assert list(store.sessions) == [second]
+    assert stats["approx_bytes"] <= 4000
+    assert stats["approx_bytes"] == store._sizes[second]
+
+def test_expired_session_is_dropped_on_access(clock):
+    store = InMemorySessionBackend(ttl_minutes=30)
+    session_id = run(store.create_session())
+    
+    clock.now += 31 * 60
+    
+    assert run(store.get_session(session_id)) is None
+    assert run(store.get_stats())["expired_evictions"] == 1
+    assert run(store.get_stats())["approx_bytes"] == 0
+
+def test_cleanup_only_looks_at_expired_front(clock):
+    store = InMemorySessionBackend(ttl_minutes=30)
+    
+    async def scenario():
+        old = await create(store, 3)
+        clock.now += 20 * 60
+        recent = await create(store, 2)
+        await store.touch_session(old[0])  # activity moves it behind the recent ones
+        clock.now += 15 * 60
+        removed = await store.cleanup_inactive_sessions()
+        return old, recent, removed
+    
+    old, recent, removed = run(scenario())
+    assert removed == 2
+    assert list(store.sessions) == [*recent, old[0]]
+
+def test_background_task_evicts_expired_sessions(clock):
+    store = InMemorySessionBackend(ttl_minutes=1, eviction_interval=0.01)
+    
+    async def scenario():
+        await create(store, 2)
+        await store.start()
+        clock.now += 120
+        await asyncio.sleep(0.05)
+        await store.stop()
+        return await store.get_active_sessions_count()
+    
+    assert run(scenario()) == 0
+    assert store._task is None
+
+def test_stats_endpoint_reports_memory_and_evictions(monkeypatch):
+    store = InMemorySessionBackend(max_sessions=1)
+    run(create(store, 2))
+    monkeypatch.setattr(session_module, "session_manager", store)
+    
+    stats = TestClient(main.app).get("/api/sessions/stats").json()
+    
+    assert stats["success"] is True
+    assert stats["active_sessions"] == 1
+    assert stats["lru_evictions"] == 1
+    assert stats["approx_bytes"] > 0 and stats["max_sessions"] == 1
+
+def test_message_records_read_like_dicts():
+    message = Message("".join(["assis", "tant"]), "Hello", 1_700_000_000.0)
+    
+    assert message.role is sys.intern("assistant")
+    assert message["content"] == message.get("content") == "Hello"
+    assert message.get("timestamp") == datetime.fromtimestamp(1_700_000_000.0).isoformat()
+    assert message.get("missing", "default") == "default"
+    with pytest.raises(KeyError):
+        message["missing"]
+    assert message.to_dict() == {"role": "assistant", "content": "Hello", "timestamp": message["timestamp"]}
+
+def test_cold_messages_are_compressed_and_read_back(clock):
+    store = InMemorySessionBackend(hot_messages=2, compress_min_bytes=64)
+    long_text = "The processing fee is 2% of the loan amount. " * 20
+    
+    async def scenario():
+        session_id = await store.create_session()
+        await store.add_message(session_id, "user", "hi")
+        for _ in range(4):
+            await store.add_message(session_id, "assistant", long_text)
+        return session_id, await store.get_messages(session_id)
+    
+    session_id, messages = run(scenario())
+    stats = run(store.get_stats())
+    
+    assert [m.compressed for m in messages] == [False, True, True, False, False]
+    assert all(m["content"] == long_text for m in messages[1:])
+    assert stats["compressed_messages"] == 2
+    assert stats["compression_saved_bytes"] > len(long_text)
+    assert stats["approx_bytes"] == store._sizes[session_id]
+
+def test_session_endpoint_format_is_unchanged(clock, monkeypatch):
+    store = InMemorySessionBackend(hot_messages=0, compress_min_bytes=1)
+    monkeypatch.setattr(session_module, "session_manager", store)
+    
+    async def scenario():
+        session_id = await store.create_session()
+        await store.add_message(session_id, "user", "I need a loan of 5 lakh " * 10)
+        await store.update_customer_data(session_id, {"pan": "ABCDE1234F"})
+        return session_id
+    
+    session_id = run(scenario())
+    body = TestClient(main.app).get(f"/api/session/{session_id}").json()
+    
+    assert body["success"] is True
+    assert body["messages"] == [{
+        "role": "user",
+        "content": "I need a loan of 5 lakh " * 10,
+        "timestamp": datetime.fromtimestamp(clock.now).isoformat()
+    }]
+    assert body["customer_data"] == {"pan": "ABCDE1234F"}
+    assert body["summary"] == ""
+    assert body["created_at"] == body["last_activity"] == datetime.fromtimestamp(clock.now).isoformat()
+
+def test_compact_sessions_use_less_memory_than_dicts():
+    sessions, turns = 200, 10
+    legacy, _ = session_memory.measure(
+        "legacy", lambda: session_memory.build_legacy(sessions, turns, random.Random(7)), sessions
+    )
+    compact, _ = session_memory.measure(
+        "compact",
+        lambda: asyncio.run(session_memory.build_compact(sessions, turns, random.Random(7), True)),
+        sessions
+    )
+    
+    assert compact < 0.8 * legacy
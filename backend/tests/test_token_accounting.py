@@ -0,0 +1,121 @@
+# ============================================================================
+# TESTS - Per-turn prompt token accounting and profiler
+# Path: backend/tests/test_token_accounting.py
+# ============================================================================
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+import agents.token_accounting as token_accounting
+import main
+from agents.loan_agent import LoanAgent
+from agents.token_accounting import TokenProfiler, TurnTokenUsage, tool_schema_tokens
+from tests.test_executor_pool import ScriptedLLM, call
+from utils.tokens import estimate_tokens
+
+HISTORY = [HumanMessage(content="I need a personal loan"), AIMessage(content="Sure, how much do you need?")]
+MESSAGE = "What would the EMI be for 5 lakh at 12% over 36 months?"
+
+@pytest.fixture(scope="module")
+def agent():
+    return LoanAgent()
+
+def run_turn(agent, *replies):
+    executor = agent._build_executor(ScriptedLLM(script=list(replies)))
+    usage = TurnTokenUsage(agent._tool_schema_tokens)
+    asyncio.run(executor.ainvoke(
+        {"input": MESSAGE, "chat_history": HISTORY},
+        config={"callbacks": [usage]}
+    ))
+    return usage
+
+def test_prompt_is_split_by_category(agent):
+    usage = run_turn(
+        agent,
+        call("calculate_emi_tool", loan_amount=500000, interest_rate=12, tenure=36),
+        AIMessage(content="Your EMI is ₹16,607")
+    )
+    
+    history_tokens = sum(estimate_tokens(m.content) for m in HISTORY)
+    
+    assert usage.iterations == 2
+    assert usage.input["system"] > usage.input["history"] > 0
+    assert usage.input["history"] == 2 * history_tokens
+    assert usage.input["input"] == 2 * estimate_tokens(MESSAGE)
+    assert usage.input["tools"] == 2 * tool_schema_tokens(agent.tools)
+    # Only the second call carries the tool call and its observation
+    assert usage.input["scratchpad"] > 0
+
+def test_single_call_turn_has_no_scratchpad(agent):
+    usage = run_turn(agent, AIMessage(content="Happy to help"))
+    
+    assert usage.iterations == 1
+    assert usage.input["scratchpad"] == 0
+    assert usage.to_dict()["estimated_input_tokens"] == sum(usage.input.values())
+
+def test_provider_usage_is_preferred_over_estimates():
+    usage = TurnTokenUsage()
+    reported = AIMessage(content="hi", usage_metadata={"input_tokens": 900, "output_tokens": 12, "total_tokens": 912})
+    asyncio.run(usage.on_llm_end(LLMResult(generations=[[ChatGeneration(message=reported)]])))
+    
+    legacy = LLMResult(
+        generations=[[ChatGeneration(message=AIMessage(content="ok"))]],
+        llm_output={"token_usage": {"prompt_tokens": 100, "completion_tokens": 3}}
+    )
+    asyncio.run(usage.on_llm_end(legacy))
+    
+    estimated = LLMResult(generations=[[ChatGeneration(message=AIMessage(content="a b c d"))]])
+    asyncio.run(usage.on_llm_end(estimated))
+    
+    assert usage.provider_input_tokens == 1000
+    assert usage.output_tokens == 12 + 3 + estimate_tokens("a b c d")
+
+def make_usage(system=100, history=50, output=10):
+    usage = TurnTokenUsage()
+    usage.iterations = 1
+    usage.input.update({"system": system, "history": history})
+    usage.output_tokens = output
+    return usage
+
+def test_profiler_aggregates_overall_and_per_session():
+    profiler = TokenProfiler(max_sessions=2)
+    profiler.record("s1", make_usage())
+    profiler.record("s1", make_usage(history=150))
+    profiler.record("s2", make_usage())
+    profiler.record("s3", TurnTokenUsage())  # no LLM call - not a turn
+    
+    overall = profiler.get_stats()
+    s1 = profiler.get_session_stats("s1")
+    
+    assert overall["turns"] == 3 and overall["tracked_sessions"] == 2
+    assert s1["turns"] == 2
+    assert s1["input_tokens"]["history"] == 200
+    assert s1["input_share"]["system"] == 0.5
+    assert s1["avg_input_tokens_per_turn"] == 200.0
+    assert s1["last_turn"]["input_tokens"]["history"] == 150
+    assert profiler.get_session_stats("s3") is None
+
+def test_profiler_keeps_most_recent_sessions():
+    profiler = TokenProfiler(max_sessions=2)
+    for session_id in ("s1", "s2", "s1", "s3"):
+        profiler.record(session_id, make_usage())
+    
+    assert profiler.get_session_stats("s2") is None
+    assert profiler.get_session_stats("s1")["turns"] == 2
+
+def test_stats_endpoints(monkeypatch):
+    profiler = TokenProfiler()
+    profiler.record("s1", make_usage())
+    monkeypatch.setattr(token_accounting, "token_profiler", profiler)
+    client = TestClient(main.app)
+    
+    overall = client.get("/api/tokens/stats").json()
+    session = client.get("/api/tokens/stats/s1").json()
+    
+    assert overall["success"] is True and overall["turns"] == 1
+    assert session["success"] is True and session["input_tokens"]["system"] == 100
+    assert client.get("/api/tokens/stats/unknown").json()["success"] is False
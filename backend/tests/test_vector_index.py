@@ -0,0 +1,107 @@
+# ============================================================================
+# TESTS - In-process vector indexes (exact and IVF)
+# Path: backend/tests/test_vector_index.py
+# ============================================================================
+
+import json
+
+import numpy as np
+import pytest
+
+from rag.retriever import KnowledgeRetriever
+from rag.vector_index import ExactVectorIndex, IVFVectorIndex, build_vector_index
+
+def make_rows(n=400, dims=32, clusters=8, seed=1):
+    """Vectors scattered around `clusters` random directions"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dims))
+    vectors = centers[rng.integers(clusters, size=n)] + 0.2 * rng.normal(size=(n, dims))
+    return [
+        {"id": i, "content": f"chunk {i}", "metadata": {"chunk_index": i}, "embedding": vector.tolist()}
+        for i, vector in enumerate(vectors)
+    ]
+
+def reference_search(rows, query, threshold, count):
+    """match_knowledge semantics: 1 - cosine distance > threshold, best first"""
+    query = np.asarray(query) / np.linalg.norm(query)
+    scored = []
+    for row in rows:
+        vector = np.asarray(row["embedding"])
+        scored.append((float(vector @ query / np.linalg.norm(vector)), row["id"]))
+    scored.sort(reverse=True)
+    return [row_id for similarity, row_id in scored[:count] if similarity > threshold]
+
+@pytest.fixture(scope="module")
+def rows():
+    return make_rows()
+
+@pytest.mark.parametrize("threshold,count", [(0.5, 5), (0.0, 20), (0.95, 10)])
+def test_exact_index_matches_match_knowledge(rows, threshold, count):
+    index = ExactVectorIndex(rows)
+    query = rows[7]["embedding"]
+    
+    results = index.search(query, threshold, count)
+    
+    assert [r["id"] for r in results] == reference_search(rows, query, threshold, count)
+    assert all(r["similarity"] > threshold for r in results)
+    assert results[0]["content"] == "chunk 7"
+    assert results[0]["metadata"] == {"chunk_index": 7}
+
+def test_threshold_is_exclusive():
+    index = ExactVectorIndex([
+        {"id": "a", "content": "a", "embedding": [1.0, 0.0]},
+        {"id": "b", "content": "b", "embedding": [0.0, 1.0]}
+    ])
+    
+    assert [r["id"] for r in index.search([1.0, 0.0], 0.0, 5)] == ["a"]
+
+def test_pgvector_string_embeddings_are_parsed(rows):
+    as_strings = [{**row, "embedding": json.dumps(row["embedding"])} for row in rows[:20]]
+    
+    index = ExactVectorIndex(as_strings)
+    
+    assert index.get_stats() == {"mode": "exact", "vectors": 20, "dimensions": 32}
+    assert index.search(rows[3]["embedding"], 0.5, 1)[0]["id"] == 3
+
+def test_empty_index_returns_nothing():
+    assert ExactVectorIndex([]).search([1.0, 0.0], 0.5, 5) == []
+    assert IVFVectorIndex([]).search([1.0, 0.0], 0.5, 5) == []
+
+def test_ivf_probing_every_list_is_exact(rows):
+    ivf = IVFVectorIndex(rows, nlist=16, nprobe=16)
+    exact = ExactVectorIndex(rows)
+    
+    for q in range(0, 400, 37):
+        query = rows[q]["embedding"]
+        assert ivf.search(query, 0.3, 10) == exact.search(query, 0.3, 10)
+
+def test_ivf_recall_on_clustered_data(rows):
+    ivf = IVFVectorIndex(rows, nlist=16, nprobe=4)
+    exact = ExactVectorIndex(rows)
+    
+    found = total = 0
+    for q in range(0, 400, 10):
+        query = rows[q]["embedding"]
+        expected = {r["id"] for r in exact.search(query, 0.5, 5)}
+        found += len(expected & {r["id"] for r in ivf.search(query, 0.5, 5)})
+        total += len(expected)
+    
+    assert found / total >= 0.95
+
+def test_build_vector_index_modes(rows):
+    assert build_vector_index(rows, "exact").mode == "exact"
+    assert build_vector_index(rows, "ivf", nprobe=2).get_stats()["nprobe"] == 2
+    with pytest.raises(ValueError):
+        build_vector_index(rows, "hnsw")
+
+def test_retriever_searches_local_index_instead_of_rpc(rows, monkeypatch):
+    retriever = KnowledgeRetriever()
+    retriever.set_local_index(ExactVectorIndex(rows))
+    monkeypatch.setattr(retriever, "embed_query", lambda query: rows[11]["embedding"])
+    
+    def no_rpc(*args, **kwargs):
+        raise AssertionError("match_knowledge RPC called with a local index loaded")
+    
+    monkeypatch.setattr(retriever.supabase, "rpc", no_rpc)
+    
+    assert retriever.retrieve("anything", top_k=3)[0]["id"] == 11
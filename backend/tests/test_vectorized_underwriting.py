@@ -0,0 +1,116 @@
+# ============================================================================
+# TESTS - Columnar (NumPy) underwriting vs the scalar rules
+# Path: backend/tests/test_vectorized_underwriting.py
+# ============================================================================
+
+import copy
+import random
+
+import numpy as np
+import pytest
+
+from benchmarks.underwriting_throughput import applicants
+from tests.test_policy_engine import DEFINITION
+from utils.calculations import calculate_emi
+from utils.policy_engine import CompiledPolicy
+from utils.underwriting import business_rules, underwriting_decision
+from utils.vectorized_underwriting import evaluate_batch, round2
+
+def rows_of(columns):
+    return list(zip(*(np.asarray(column).tolist() for column in columns)))
+
+def test_decisions_match_the_scalar_rules():
+    columns = applicants(5000, seed=7)
+    batch = evaluate_batch(*columns)
+    
+    expected = [underwriting_decision(*row) for row in rows_of(columns)]
+    
+    assert batch.decisions() == expected
+    assert 0 < batch.get_stats()["approved"] < len(batch)
+
+def test_boundary_values_match_the_scalar_rules():
+    # Each column sits on and either side of its policy threshold
+    grid = [
+        (age, income, employment, score, 500000, 36, existing)
+        for age in (20, 21, 22, 59, 60, 61)
+        for income in (24999, 25000, 39999, 40000)
+        for employment in ("Salaried", "Self-Employed", "Business Owner")
+        for score in (649, 650, 700, 750, 751, 800)
+        for existing in (0, 8000, 15000)
+    ]
+    batch = evaluate_batch(*zip(*grid))
+    
+    for row, values in enumerate(grid):
+        rules = business_rules(*values[:5], values[6], values[5])
+        assert batch.reasons(row, "rules") == rules["failed_rules"]
+        assert batch.monthly_emi[row] == rules["estimated_emi"]
+        assert batch.dti_ratio[row] == rules["dti_ratio"]
+        assert batch.interest_rate[row] == rules["interest_rate"]
+    assert batch.decisions() == [underwriting_decision(*values) for values in grid]
+
+def test_round2_matches_python_round():
+    rng = random.Random(3)
+    values = [rng.uniform(0, 100000) for _ in range(5000)]
+    values += [n / 1000 + 0.005 for n in range(0, 100000, 10)]  # half cents
+    
+    rounded = round2(np.array(values))
+    
+    assert rounded.tolist() == [round(value, 2) for value in values]
+
+def test_emi_matches_calculate_emi():
+    columns = applicants(2000, seed=11)
+    batch = evaluate_batch(*columns)
+    
+    expected = [
+        calculate_emi(amount, rate, tenure)
+        for amount, rate, tenure in zip(columns[4].tolist(), batch.interest_rate.tolist(), columns[5].tolist())
+    ]
+    
+    assert batch.monthly_emi.tolist() == expected
+
+def test_scalars_broadcast_to_every_row():
+    batch = evaluate_batch([25, 30, 70], 50000, "Salaried", 720, 300000)
+    
+    assert len(batch) == 3
+    assert batch.approved.tolist() == [True, True, False]
+    assert batch.columns["tenure"].tolist() == [36] * 3
+    assert batch.failed_rules() == [[], [], ["Age requirement not met (21-60)"]]
+    assert batch.get_stats()["failed"]["age_check"] == 1
+
+def test_rejected_rows_and_stats():
+    batch = evaluate_batch(
+        age=[30, 30, 19],
+        monthly_income=[60000, 10000, 60000],
+        employment_type=["Salaried", "Salaried", "Salaried"],
+        credit_score=[780, 780, 600],
+        loan_amount=[500000, 500000, 500000]
+    )
+    failed = batch.failed_rules()
+    stats = batch.get_stats()
+    
+    assert failed == [
+        [],
+        ["Minimum income ₹25,000", f"DTI ratio {batch.dti_ratio[1]:.1f}% exceeds 50%"],
+        ["Age requirement not met (21-60)", "Credit score below 650"]
+    ]
+    assert stats["rows"] == 3 and stats["approved"] == 1
+    assert sum(stats["failed"].values()) == sum(len(reasons) for reasons in failed)
+
+def test_invalid_tenure_is_rejected():
+    with pytest.raises(ValueError, match="whole number"):
+        evaluate_batch(30, 50000, "Salaried", 720, 300000, tenure=[36.5])
+    with pytest.raises(ValueError, match="positive"):
+        evaluate_batch(30, 50000, "Salaried", 720, 300000, tenure=[0])
+
+def test_explicit_policy_is_used():
+    definition = copy.deepcopy(DEFINITION)
+    for rule in definition["rules"]:
+        if rule["field"] == "credit_score":
+            rule["min"] = 800
+    policy = CompiledPolicy(definition)
+    
+    default = evaluate_batch(30, 60000, "Salaried", 780, 300000)
+    strict = evaluate_batch(30, 60000, "Salaried", 780, 300000, policy=policy)
+    
+    assert default.approved.tolist() == [True]
+    assert strict.approved.tolist() == [False]
@@ -0,0 +1,105 @@
+# ============================================================================
+# TESTS - Write-behind persistence queue
+# Path: backend/tests/test_write_behind.py
+# ============================================================================
+
+import asyncio
+
+import pytest
+
+import database.repository as repository
+from database.write_behind import WriteBehindQueue
+
+class FakeTable:
+    def __init__(self):
+        self.rows = []
+        self.calls = 0
+        self.down = False
+    
+    async def create_many(self, rows):
+        self.calls += 1
+        if self.down or any(isinstance(row, dict) and row["message"] == "BAD" for row in rows):
+            raise repository.RepositoryError("insert failed")
+        self.rows.extend(rows)
+
+class FakeRepository:
+    def __init__(self):
+        self.sessions = FakeTable()
+        self.messages = FakeTable()
+
+@pytest.fixture
+def repo(monkeypatch):
+    repo = FakeRepository()
+    monkeypatch.setattr(repository, "get_repository", lambda: repo)
+    return repo
+
+def queue_messages(queue, texts, session_id="s1"):
+    queue.enqueue_session(session_id)
+    for text in texts:
+        queue.enqueue_message(session_id, "user", text)
+
+def test_batches_are_written_in_order(repo):
+    queue = WriteBehindQueue(batch_size=2)
+    queue_messages(queue, ["a", "b", "c"])
+    
+    assert asyncio.run(queue.flush()) == 3
+    assert asyncio.run(queue.flush()) == 1
+    assert [row["message"] for row in repo.messages.rows] == ["a", "b", "c"]
+    assert repo.sessions.rows == ["s1"]
+
+def test_one_bad_row_does_not_drop_the_batch(repo):
+    texts = [f"message {i}" for i in range(10)]
+    texts[6] = "BAD"
+    queue = WriteBehindQueue(batch_size=50, max_attempts=3)
+    queue_messages(queue, texts)
+    
+    # Two plain retries, then the last attempt isolates the bad row
+    assert asyncio.run(queue.flush()) == 1
+    assert asyncio.run(queue.flush()) == 0
+    assert asyncio.run(queue.flush()) == 9
+    
+    assert [row["message"] for row in repo.messages.rows] == [t for t in texts if t != "BAD"]
+    stats = queue.get_stats()
+    assert stats["dropped"] == 1
+    assert stats["pending_messages"] == 0
+    assert stats["bisections"] > 0
+
+def test_outage_rows_are_retried_not_bisected(repo):
+    queue = WriteBehindQueue(max_attempts=3)
+    queue_messages(queue, ["a", "b"])
+    repo.messages.down = True
+    
+    asyncio.run(queue.flush())
+    repo.messages.down = False
+    asyncio.run(queue.flush())
+    
+    assert [row["message"] for row in repo.messages.rows] == ["a", "b"]
+    assert queue.get_stats()["bisections"] == 0
+
+def test_stop_survives_an_unbuildable_repository(monkeypatch):
+    def no_repository():
+        raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in .env")
+    
+    monkeypatch.setattr(repository, "get_repository", no_repository)
+    queue = WriteBehindQueue()
+    queue_messages(queue, ["a", "b"])
+    
+    asyncio.run(queue.stop())
+    
+    stats = queue.get_stats()
+    assert stats["queue_depth"] == 0
+    assert stats["dropped"] == 3  # one session + two messages
+
+def test_failed_session_insert_is_counted(repo):
+    queue = WriteBehindQueue(max_attempts=3)
+    queue_messages(queue, ["a", "b"])
+    repo.sessions.down = True
+    
+    asyncio.run(queue.stop())
+    
+    stats = queue.get_stats()
+    assert repo.sessions.calls == 3  # retried at shutdown before giving up
+    assert repo.messages.calls == 0
+    assert stats["failures"] == 3 and stats["flushes"] == 3
+    assert stats["dropped"] == 3
+    assert stats["queue_depth"] == 0
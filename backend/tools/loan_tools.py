@@ -6,16 +6,12 @@
 from langchain_core.tools import tool
 from typing import Optional, Dict, Any
 import json
-from mock_data.kyc_database import verify_kyc, calculate_age
-from mock_data.credit_database import fetch_credit_score
-from utils.calculations import (
-    calculate_emi, 
-    calculate_dti, 
-    calculate_interest_rate,
-    calculate_processing_fee
-)
-from database.supabase_client import get_supabase_client
-from rag.retriever import KnowledgeRetriever
+from mock_data.kyc_database import calculate_age
+from utils.calculations import calculate_emi
+from utils.policy_engine import policy_engine
+from utils.underwriting import eligibility, business_rules, underwriting_decision
+from database.repository import get_repository
+from rag.retriever import get_retriever
 import uuid
 
 # ============================================================================
@@ -35,7 +31,10 @@ async def verify_kyc_tool(pan: str) -> str:
         JSON string with KYC details or error
     """
     try:
-        record = await verify_kyc(pan.upper())
+        from agents.prefetch import lookup_prefetcher
+        
+        # Usually already running - started when the PAN appeared in the message
+        record = await lookup_prefetcher.fetch("kyc", pan)
         
         if not record:
             return json.dumps({
@@ -95,7 +94,9 @@ async def check_credit_score_tool(pan: str) -> str:
         JSON string with credit score details
     """
     try:
-        credit_record = await fetch_credit_score(pan.upper())
+        from agents.prefetch import lookup_prefetcher
+        
+        credit_record = await lookup_prefetcher.fetch("credit", pan)
         
         if not credit_record:
             return json.dumps({
@@ -105,19 +106,10 @@ async def check_credit_score_tool(pan: str) -> str:
         
         score = credit_record.get("score")
         
-        # Determine eligibility based on score
-        if score >= 750:
-            score_category = "Excellent"
-            eligible = True
-        elif score >= 700:
-            score_category = "Very Good"
-            eligible = True
-        elif score >= 650:
-            score_category = "Good"
-            eligible = True
-        else:
-            score_category = "Needs Improvement"
-            eligible = False
+        # Category from the policy's credit bands, eligibility from its minimum score
+        policy = policy_engine.policy
+        score_category = policy.score_category(score)
+        eligible = score >= policy.min_credit_score
         
         return json.dumps({
             "success": True,
@@ -129,8 +121,8 @@ async def check_credit_score_tool(pan: str) -> str:
                 "active_loans": credit_record.get("active_loans"),
                 "credit_history_years": credit_record.get("credit_history_years"),
                 "defaults": credit_record.get("defaults"),
-                "minimum_required": 650,
-                "meets_minimum": score >= 650
+                "minimum_required": policy.min_credit_score,
+                "meets_minimum": eligible
             }
         })
     except Exception as e:
@@ -153,18 +145,16 @@ async def check_existing_customer_tool(pan: str) -> str:
         JSON string with customer data if exists
     """
     try:
-        supabase = get_supabase_client()
+        from agents.prefetch import lookup_prefetcher
         
-        result = supabase.table("customers").select("*").eq("pan_number", pan.upper()).execute()
+        customer = await lookup_prefetcher.fetch("customer", pan)
         
-        if not result.data or len(result.data) == 0:
+        if not customer:
             return json.dumps({
                 "exists": False,
                 "message": "Customer not found. This is a new customer."
             })
         
-        customer = result.data[0]
-        
         return json.dumps({
             "exists": True,
             "data": {
@@ -199,31 +189,7 @@ def calculate_eligibility_tool(monthly_income: float, employment_type: str, exis
         JSON string with eligibility details
     """
     try:
-        multipliers = {
-            "Salaried": 10,
-            "Self-Employed": 5,
-            "Business Owner": 8
-        }
-        
-        multiplier = multipliers.get(employment_type, 5)
-        max_loan_amount = monthly_income * multiplier
-        
-        # Calculate affordable EMI (50% of income minus existing EMI)
-        affordable_emi = (monthly_income * 0.5) - existing_emi
-        
-        # Max loan based on affordable EMI (rough estimate)
-        max_loan_from_emi = affordable_emi * 30 if affordable_emi > 0 else 0
-        
-        eligible_amount = min(max_loan_amount, max_loan_from_emi)
-        
-        return json.dumps({
-            "max_eligible_amount": int(eligible_amount),
-            "monthly_income": monthly_income,
-            "employment_type": employment_type,
-            "existing_emi": existing_emi,
-            "affordable_new_emi": max(0, affordable_emi),
-            "calculation_basis": f"Based on {multiplier}x monthly income"
-        })
+        return json.dumps(eligibility(monthly_income, employment_type, existing_emi))
     except Exception as e:
         return json.dumps({"error": str(e)})
 
@@ -257,37 +223,9 @@ def check_business_rules_tool(
         JSON string with rule validation results
     """
     try:
-        rules = {
-            "age_check": 21 <= age <= 60,
-            "income_check": monthly_income >= (25000 if employment_type == "Salaried" else 40000),
-            "credit_score_check": credit_score >= 650
-        }
-        
-        # Calculate DTI
-        interest_rate = calculate_interest_rate(credit_score)
-        monthly_emi = calculate_emi(loan_amount, interest_rate, tenure)
-        dti_ratio = calculate_dti(existing_emi, monthly_emi, monthly_income)
-        rules["dti_check"] = dti_ratio <= 50
-        
-        failed_rules = []
-        if not rules["age_check"]:
-            failed_rules.append("Age must be between 21-60 years")
-        if not rules["income_check"]:
-            min_income = 25000 if employment_type == "Salaried" else 40000
-            failed_rules.append(f"Minimum income: ₹{min_income:,}")
-        if not rules["credit_score_check"]:
-            failed_rules.append("Minimum credit score: 650")
-        if not rules["dti_check"]:
-            failed_rules.append(f"DTI ratio {dti_ratio:.1f}% exceeds 50%")
-        
-        return json.dumps({
-            "all_rules_passed": len(failed_rules) == 0,
-            "rules_evaluation": rules,
-            "failed_rules": failed_rules,
-            "dti_ratio": dti_ratio,
-            "estimated_emi": monthly_emi,
-            "interest_rate": interest_rate
-        })
+        return json.dumps(business_rules(
+            age, monthly_income, employment_type, credit_score, loan_amount, existing_emi, tenure
+        ))
     except Exception as e:
         return json.dumps({"error": str(e)})
 
@@ -332,50 +270,9 @@ def make_underwriting_decision_tool(customer_data: str) -> str:
                 "error": f"Missing required fields: {', '.join(missing)}"
             })
         
-        failed_rules = []
-        
-        # Age check
-        if age < 21 or age > 60:
-            failed_rules.append("Age requirement not met (21-60)")
-        
-        # Income check
-        min_income = 25000 if employment_type == "Salaried" else 40000
-        if monthly_income < min_income:
-            failed_rules.append(f"Minimum income ₹{min_income:,}")
-        
-        # Credit score check
-        if credit_score < 650:
-            failed_rules.append("Credit score below 650")
-        
-        # DTI check
-        interest_rate = calculate_interest_rate(credit_score)
-        monthly_emi = calculate_emi(loan_amount, interest_rate, tenure)
-        dti_ratio = calculate_dti(existing_emi, monthly_emi, monthly_income)
-        
-        if dti_ratio > 50:
-            failed_rules.append(f"DTI ratio {dti_ratio:.1f}% exceeds 50%")
-        
-        # Decision
-        if failed_rules:
-            return json.dumps({
-                "approved": False,
-                "decision": "rejected",
-                "failed_rules": failed_rules,
-                "rejection_reason": "Application does not meet eligibility criteria"
-            })
-        
-        processing_fee = calculate_processing_fee(loan_amount)
-        
-        return json.dumps({
-            "approved": True,
-            "decision": "approved",
-            "sanctioned_amount": loan_amount,
-            "interest_rate": interest_rate,
-            "monthly_emi": monthly_emi,
-            "tenure": tenure,
-            "dti_ratio": dti_ratio,
-            "processing_fee": processing_fee
-        })
+        return json.dumps(underwriting_decision(
+            age, monthly_income, employment_type, credit_score, loan_amount, tenure, existing_emi
+        ))
     except Exception as e:
         return json.dumps({"error": str(e)})
 
@@ -396,7 +293,7 @@ async def create_or_update_customer_tool(customer_data: str) -> str:
     """
     try:
         data = json.loads(customer_data)
-        supabase = get_supabase_client()
+        repo = get_repository()
         
         # Filter to only customer table fields (not credit data)
         customer_fields = {
@@ -420,22 +317,22 @@ async def create_or_update_customer_tool(customer_data: str) -> str:
             return json.dumps({"success": False, "error": "PAN number is required"})
         
         # Check if exists
-        existing = supabase.table("customers").select("id").eq("pan_number", customer_fields["pan_number"]).execute()
+        existing_id = await repo.customers.get_id_by_pan(customer_fields["pan_number"])
         
-        if existing.data and len(existing.data) > 0:
+        if existing_id:
             # Update
-            result = supabase.table("customers").update(customer_fields).eq("pan_number", customer_fields["pan_number"]).execute()
+            await repo.customers.update_by_pan(customer_fields["pan_number"], customer_fields)
             return json.dumps({
                 "success": True,
-                "customer_id": existing.data[0]["id"],
+                "customer_id": existing_id,
                 "action": "updated"
             })
         else:
             # Create
-            result = supabase.table("customers").insert(customer_fields).execute()
+            created = await repo.customers.create(customer_fields)
             return json.dumps({
                 "success": True,
-                "customer_id": result.data[0]["id"],
+                "customer_id": created["id"],
                 "action": "created"
             })
     except Exception as e:
@@ -458,13 +355,13 @@ async def save_application_tool(application_data: str) -> str:
     """
     try:
         data = json.loads(application_data)
-        supabase = get_supabase_client()
+        repo = get_repository()
         
-        result = supabase.table("loan_applications").insert(data).execute()
+        application = await repo.loan_applications.create(data)
         
         return json.dumps({
             "success": True,
-            "application_id": result.data[0]["id"]
+            "application_id": application["id"]
         })
     except Exception as e:
         return json.dumps({"success": False, "error": str(e)})
@@ -486,7 +383,7 @@ def retrieve_knowledge_tool(query: str) -> str:
         Relevant information from knowledge base
     """
     try:
-        retriever = KnowledgeRetriever()
+        retriever = get_retriever()
         context = retriever.get_context(query, top_k=3)
         
         return json.dumps({
@@ -514,7 +411,7 @@ async def save_conversation_tool(session_id: str, stage: str, collected_data: st
         Success status
     """
     try:
-        supabase = get_supabase_client()
+        repo = get_repository()
         
         # Validate UUID format
         import uuid as uuid_lib
@@ -525,10 +422,7 @@ async def save_conversation_tool(session_id: str, stage: str, collected_data: st
         
         data_dict = json.loads(collected_data)
         
-        supabase.table("conversation_sessions").update({
-            "current_stage": stage,
-            "collected_data": data_dict
-        }).eq("id", session_id).execute()
+        await repo.sessions.update_state(session_id, stage, data_dict)
         
         return json.dumps({"success": True})
     except Exception as e:
@@ -550,11 +444,11 @@ async def get_application_history_tool(customer_id: str) -> str:
         JSON string with application history
     """
     try:
-        supabase = get_supabase_client()
+        repo = get_repository()
         
-        result = supabase.table("loan_applications").select("*").eq("customer_id", customer_id).order("created_at", desc=True).limit(5).execute()
+        applications = await repo.loan_applications.list_by_customer(customer_id, limit=5)
         
-        if not result.data or len(result.data) == 0:
+        if not applications:
             return json.dumps({
                 "has_history": False,
                 "message": "No previous applications"
@@ -562,8 +456,8 @@ async def get_application_history_tool(customer_id: str) -> str:
         
         return json.dumps({
             "has_history": True,
-            "total_applications": len(result.data),
-            "applications": result.data
+            "total_applications": len(applications),
+            "applications": applications
         })
     except Exception as e:
         return json.dumps({"has_history": False, "error": str(e)})
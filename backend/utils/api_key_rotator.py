@@ -1,42 +1,405 @@
 # ============================================================================
-# API KEY ROTATOR - Round-Robin Key Selection
+# API KEY SCHEDULER - Rate-limit-aware multi-key selection
 # Path: backend/utils/api_key_rotator.py
 # ============================================================================
 
-from typing import List
+from typing import Dict, List, Optional
+import asyncio
 import os
+import re
+import threading
+import time
+import httpx
 from dotenv import load_dotenv
 
 load_dotenv()
 
-class APIKeyRotator:
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Groq reset headers look like '2m59.56s', '7.66s' or '120ms' -> seconds"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = DURATION_PATTERN.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+class TokenBucket:
+    """
+    Continuously refilling bucket - capacity units per `period` seconds
+    Level may go negative (debt) when a request costs more than was left
+    """
+    
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = capacity
+        self.period = period
+        self.level = capacity
+        self.updated = time.monotonic()
+    
+    def _refill(self, now: float):
+        rate = self.capacity / self.period
+        self.level = min(self.capacity, self.level + (now - self.updated) * rate)
+        self.updated = now
+    
+    def available(self, now: float) -> float:
+        self._refill(now)
+        return self.level
+    
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= amount
+    
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available"""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing * self.period / self.capacity)
+    
+    def sync(self, capacity: Optional[float], remaining: Optional[float], now: float):
+        """Adopt the provider's view of the limit and what is left"""
+        if capacity:
+            self.capacity = capacity
+        if remaining is not None:
+            self.level = min(remaining, self.capacity)
+            self.updated = now
+
+class KeyState:
+    """Scheduling state of one API key"""
+    
+    def __init__(self, key: str, label: str, rpm: float, tpm: float):
+        self.key = key
+        self.label = label
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        
+        # Daily request quota reported by the provider (x-ratelimit-*-requests)
+        self.quota_remaining: Optional[int] = None
+        self.quota_reset_at = 0.0
+        
+        self.leases = 0
+        self.llm_calls = 0
+        self.responses = 0
+        self.rate_limited = 0
+    
+    def is_healthy(self, now: float) -> bool:
+        if now < self.cooldown_until:
+            return False
+        if self.quota_remaining == 0 and now < self.quota_reset_at:
+            return False
+        return True
+    
+    def headroom(self, now: float) -> float:
+        """Fraction of the tighter per-minute budget still available"""
+        return min(
+            self.requests.available(now) / self.requests.capacity,
+            self.tokens.available(now) / self.tokens.capacity
+        )
+
+class KeyLease:
+    """
+    A key checked out for one request - release() (or `with`) when done.
+    The request may make several LLM calls (an agent turn with tool calls):
+    acquire() reserves the first one, report_call() debits each call
+    """
+    
+    def __init__(self, scheduler: "APIKeyScheduler", state: KeyState, reserved_tokens: float = 0):
+        self._scheduler = scheduler
+        self._state = state
+        self._released = False
+        self.reserved_tokens = reserved_tokens
+        self.calls = 0
+    
+    @property
+    def key(self) -> str:
+        return self._state.key
+    
+    @property
+    def label(self) -> str:
+        return self._state.label
+    
+    def report_call(self, estimated_tokens: float):
+        """Debit one LLM call made under this lease from the key's buckets"""
+        self.calls += 1
+        if self.calls == 1:
+            # Already reserved by acquire() - only top up an underestimate
+            self._scheduler._charge(self._state, 0, max(0.0, estimated_tokens - self.reserved_tokens))
+        else:
+            self._scheduler._charge(self._state, 1, estimated_tokens)
+    
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._scheduler._release(self._state)
+    
+    def __enter__(self) -> "KeyLease":
+        return self
+    
+    def __exit__(self, *exc):
+        self.release()
+
+class APIKeyScheduler:
     """
-    Rotates through multiple API keys using round-robin
+    Picks the least-loaded healthy key for every request
+    - per-key token buckets for requests/minute and tokens/minute, debited
+      per LLM call (the provider only reports remaining requests per day,
+      so the requests/minute bucket is never corrected from headers)
+    - bucket levels corrected from x-ratelimit-* response headers
+    - cooldown after 429 (Retry-After, or reset header, or default)
+    Thread-safe; acquire() waits (async) instead of handing out an exhausted key
     """
     
-    def __init__(self, keys: List[str]):
+    def __init__(
+        self,
+        keys: List[str],
+        rpm: float = 30,
+        tpm: float = 6000,
+        cooldown: float = 20.0,
+        max_wait: float = 30.0
+    ):
+        keys = [k for k in keys if k]  # Filter out empty keys
         if not keys:
             raise ValueError("At least one API key is required")
-        self.keys = [k for k in keys if k]  # Filter out empty keys
-        if not self.keys:
-            raise ValueError("No valid API keys provided")
-        self.index = 0
+        
+        self.cooldown = cooldown
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._states: Dict[str, KeyState] = {
+            key: KeyState(key, f"key_{i + 1}", rpm, tpm)
+            for i, key in enumerate(keys)
+        }
+        self._http_clients: Dict[str, httpx.AsyncClient] = {}
+        
+        self.waits = 0
+        self.wait_seconds = 0.0
+    
+    # ------------------------------------------------------------------
+    # Selection
+    # ------------------------------------------------------------------
+    
+    def _pick(self, estimated_tokens: float, exclude: frozenset, now: float):
+        """
+        (state, 0) for the best key with budget, else (None, seconds to wait)
+        Must hold the lock
+        """
+        best = None
+        best_rank = None
+        soonest = None
+        
+        for state in self._states.values():
+            if state.key in exclude:
+                continue
+            
+            if not state.is_healthy(now):
+                ready = max(state.cooldown_until, state.quota_reset_at if state.quota_remaining == 0 else 0)
+                wait = ready - now
+            else:
+                wait = max(state.requests.wait_time(1, now), state.tokens.wait_time(estimated_tokens, now))
+            
+            if wait > 0:
+                soonest = wait if soonest is None else min(soonest, wait)
+                continue
+            
+            # Most headroom first, fewest in-flight requests as tie-break
+            rank = (state.headroom(now), -state.in_flight)
+            if best_rank is None or rank > best_rank:
+                best, best_rank = state, rank
+        
+        return best, soonest
+    
+    async def acquire(
+        self,
+        estimated_tokens: float = 0,
+        exclude: Optional[List[str]] = None
+    ) -> KeyLease:
+        """
+        Lease the least-loaded healthy key, waiting for budget if every key
+        is exhausted (up to max_wait, then the least-bad key is used anyway)
+        """
+        exclude = frozenset(exclude or [])
+        if len(exclude) >= len(self._states):
+            exclude = frozenset()
+        
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                state, wait = self._pick(estimated_tokens, exclude, now)
+                
+                if state is None and waited >= self.max_wait:
+                    state = self._least_bad(exclude, now)
+                
+                if state is not None:
+                    state.requests.take(1, now)
+                    state.tokens.take(estimated_tokens, now)
+                    state.in_flight += 1
+                    state.leases += 1
+                    if waited:
+                        self.waits += 1
+                        self.wait_seconds += waited
+                    return KeyLease(self, state, estimated_tokens)
+            
+            delay = min(wait or 0.1, self.max_wait - waited)
+            delay = max(delay, 0.05)
+            await asyncio.sleep(delay)
+            waited += delay
+    
+    def _least_bad(self, exclude: frozenset, now: float) -> KeyState:
+        candidates = [s for k, s in self._states.items() if k not in exclude] or list(self._states.values())
+        return min(candidates, key=lambda s: (s.cooldown_until, -s.headroom(now), s.in_flight))
+    
+    def _release(self, state: KeyState):
+        with self._lock:
+            state.in_flight = max(0, state.in_flight - 1)
+    
+    def _charge(self, state: KeyState, requests: float, tokens: float):
+        with self._lock:
+            now = time.monotonic()
+            state.llm_calls += 1
+            if requests:
+                state.requests.take(requests, now)
+            if tokens:
+                state.tokens.take(tokens, now)
+    
+    # ------------------------------------------------------------------
+    # Feedback from the provider
+    # ------------------------------------------------------------------
+    
+    def report_rate_limited(self, key: str, retry_after: Optional[float] = None):
+        """Put key in cooldown after a 429"""
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                return
+            state.rate_limited += 1
+            state.cooldown_until = max(state.cooldown_until, time.monotonic() + (retry_after or self.cooldown))
+        print(f"⏳ Groq {state.label} rate limited - cooling down {retry_after or self.cooldown:.1f}s")
+    
+    def observe_headers(self, key: str, status_code: int, headers: httpx.Headers):
+        """Sync buckets with x-ratelimit-* headers from a provider response"""
+        def number(name: str) -> Optional[float]:
+            try:
+                return float(headers[name]) if name in headers else None
+            except ValueError:
+                return None
+        
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                return
+            
+            now = time.monotonic()
+            state.responses += 1
+            
+            # Groq: *-tokens are per minute, *-requests are per day
+            state.tokens.sync(
+                number("x-ratelimit-limit-tokens"),
+                number("x-ratelimit-remaining-tokens"),
+                now
+            )
+            
+            remaining_requests = number("x-ratelimit-remaining-requests")
+            if remaining_requests is not None:
+                state.quota_remaining = int(remaining_requests)
+                reset = parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+                state.quota_reset_at = now + (reset or 0)
+        
+        if status_code == 429:
+            retry_after = number("retry-after") or parse_reset_duration(headers.get("x-ratelimit-reset-tokens"))
+            self.report_rate_limited(key, retry_after)
+    
+    def is_cooling_down(self, key: str) -> bool:
+        """True while `key` is in a rate-limit cooldown or out of daily quota"""
+        with self._lock:
+            state = self._states.get(key)
+            return state is not None and not state.is_healthy(time.monotonic())
+    
+    def http_async_client(self, key: str) -> httpx.AsyncClient:
+        """
+        Shared async HTTP client for `key` whose response hook feeds
+        rate-limit headers back into the scheduler and keeps the SDK from
+        retrying 429s
+        """
+        client = self._http_clients.get(key)
+        if client is None:
+            async def on_response(response: httpx.Response):
+                self.observe_headers(key, response.status_code, response.headers)
+                if response.status_code == 429:
+                    # The SDK would retry on the same, exhausted key - leave
+                    # 429s to the executor pool (other errors keep SDK retries)
+                    response.headers["x-should-retry"] = "false"
+            
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(60.0, connect=5.0),
+                event_hooks={"response": [on_response]}
+            )
+            self._http_clients[key] = client
+        return client
+    
+    async def aclose(self):
+        """Close the per-key HTTP clients"""
+        clients, self._http_clients = list(self._http_clients.values()), {}
+        for client in clients:
+            await client.aclose()
+    
+    # ------------------------------------------------------------------
+    # Compatibility + stats
+    # ------------------------------------------------------------------
     
     def get_key(self) -> str:
-        """Get next key in rotation"""
-        key = self.keys[self.index]
-        self.index = (self.index + 1) % len(self.keys)
-        return key
+        """Best key right now, without leasing it"""
+        with self._lock:
+            now = time.monotonic()
+            state, _ = self._pick(0, frozenset(), now)
+            return (state or self._least_bad(frozenset(), now)).key
     
     def get_all_keys(self) -> List[str]:
         """Get all available keys"""
-        return self.keys.copy()
+        return list(self._states)
     
     def get_count(self) -> int:
         """Get number of available keys"""
-        return len(self.keys)
+        return len(self._states)
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            now = time.monotonic()
+            keys = [
+                {
+                    "label": state.label,
+                    "healthy": state.is_healthy(now),
+                    "cooldown_seconds": round(max(0.0, state.cooldown_until - now), 1),
+                    "in_flight": state.in_flight,
+                    "requests_available": round(state.requests.available(now), 1),
+                    "tokens_available": round(state.tokens.available(now)),
+                    "tokens_per_minute": state.tokens.capacity,
+                    "daily_requests_remaining": state.quota_remaining,
+                    "leases": state.leases,
+                    "llm_calls": state.llm_calls,
+                    "responses": state.responses,
+                    "rate_limited": state.rate_limited
+                }
+                for state in self._states.values()
+            ]
+        
+        return {
+            "keys": keys,
+            "healthy_keys": sum(1 for k in keys if k["healthy"]),
+            "waits": self.waits,
+            "total_wait_seconds": round(self.wait_seconds, 2)
+        }
+
+# Round-robin predecessor - kept so existing imports keep working
+APIKeyRotator = APIKeyScheduler
 
-def load_groq_keys() -> APIKeyRotator:
+def load_groq_keys() -> APIKeyScheduler:
     """Load Groq API keys from environment"""
     keys = []
     
@@ -56,11 +419,17 @@ def load_groq_keys() -> APIKeyRotator:
         raise ValueError("No Groq API keys found in environment")
     
     print(f"✅ Loaded {len(keys)} Groq API key(s)")
-    return APIKeyRotator(keys)
+    return APIKeyScheduler(
+        keys,
+        rpm=float(os.getenv("GROQ_RPM", 30)),
+        tpm=float(os.getenv("GROQ_TPM", 6000)),
+        cooldown=float(os.getenv("GROQ_COOLDOWN", 20)),
+        max_wait=float(os.getenv("GROQ_MAX_WAIT", 30))
+    )
 
-# Global rotator instance
+# Global scheduler instance (name kept for existing imports)
 try:
     groq_key_rotator = load_groq_keys()
 except Exception as e:
     print(f"⚠️  Warning: Could not load Groq keys - {e}")
-    groq_key_rotator = None
\ No newline at end of file
+    groq_key_rotator = None
@@ -0,0 +1,135 @@
+# ============================================================================
+# BUREAU CACHE - Shared KYC / credit results with request coalescing
+# Path: backend/utils/bureau_cache.py
+# ============================================================================
+
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+import asyncio
+import os
+from dotenv import load_dotenv
+
+from mock_data.kyc_database import verify_kyc
+from mock_data.credit_database import fetch_credit_score
+from utils.ttl_cache import TTLCache
+
+load_dotenv()
+
+_MISSING = object()
+
+class BureauCache:
+    """
+    PAN-keyed cache in front of the (slow, billed per hit) bureau calls
+    - TTL per data type (KYC records change rarely, credit scores more often)
+    - "PAN not found" is cached too, for a shorter negative TTL
+    - concurrent lookups of the same PAN share one in-flight bureau call
+    - errors are never cached; every waiter of the failed call sees the error
+    - bulk callers pass store=False: they read the cache and join in-flight
+      calls, but their own calls are not cached, so a large lead file
+      cannot evict the entries interactive sessions depend on
+    """
+    
+    def __init__(
+        self,
+        fetchers: Dict[str, Callable[[str], Awaitable[Optional[Dict]]]],
+        ttls: Dict[str, float],
+        negative_ttl: float = 300,
+        maxsize: int = 10000
+    ):
+        self.fetchers = fetchers
+        self.negative_ttl = negative_ttl
+        self._caches = {kind: TTLCache(maxsize=maxsize, ttl=ttls[kind]) for kind in fetchers}
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        # In-flight calls whose result is cached (a storing caller started or joined them)
+        self._store_keys: Set[Tuple[str, str]] = set()
+        
+        self.bureau_calls = {kind: 0 for kind in fetchers}
+        self.coalesced = {kind: 0 for kind in fetchers}
+        self.negative_hits = {kind: 0 for kind in fetchers}
+        self.errors = {kind: 0 for kind in fetchers}
+        self.uncached_calls = {kind: 0 for kind in fetchers}
+    
+    async def get(self, kind: str, pan: str, store: bool = True) -> Optional[Dict]:
+        """
+        Bureau record for the PAN (None if the bureau has no record)
+        store=False: don't cache the result of a call this lookup starts
+        """
+        pan = pan.upper()
+        
+        cached = self._caches[kind].get(pan, _MISSING)
+        if cached is not _MISSING:
+            if cached is None:
+                self.negative_hits[kind] += 1
+            return cached
+        
+        key = (kind, pan)
+        if store:
+            self._store_keys.add(key)
+        
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced[kind] += 1
+        else:
+            self.bureau_calls[kind] += 1
+            task = asyncio.ensure_future(self.fetchers[kind](pan))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._store(kind, pan, done))
+        
+        # Shielded - one cancelled caller must not cancel the call the others share
+        return await asyncio.shield(task)
+    
+    def _store(self, kind: str, pan: str, task: asyncio.Task):
+        self._inflight.pop((kind, pan), None)
+        store = (kind, pan) in self._store_keys
+        self._store_keys.discard((kind, pan))
+        
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.errors[kind] += 1
+            return
+        
+        if not store:
+            self.uncached_calls[kind] += 1
+            return
+        
+        result = task.result()
+        self._caches[kind].set(pan, result, ttl=self.negative_ttl if result is None else None)
+    
+    async def verify_kyc(self, pan: str, store: bool = True) -> Optional[Dict]:
+        return await self.get("kyc", pan, store)
+    
+    async def fetch_credit_score(self, pan: str, store: bool = True) -> Optional[Dict]:
+        return await self.get("credit", pan, store)
+    
+    def invalidate(self, pan: Optional[str] = None):
+        """Drop cached results for one PAN, or everything"""
+        for cache in self._caches.values():
+            if pan is None:
+                cache.clear()
+            else:
+                cache.pop(pan.upper())
+    
+    def get_stats(self) -> Dict:
+        stats: Dict[str, Any] = {"negative_ttl_seconds": self.negative_ttl}
+        for kind, cache in self._caches.items():
+            stats[kind] = {
+                **cache.get_stats(),
+                "negative_hits": self.negative_hits[kind],
+                "coalesced": self.coalesced[kind],
+                "bureau_calls": self.bureau_calls[kind],
+                "errors": self.errors[kind],
+                "uncached_calls": self.uncached_calls[kind],
+                "in_flight": sum(1 for key in self._inflight if key[0] == kind)
+            }
+        return stats
+
+# Global bureau cache instance
+bureau_cache = BureauCache(
+    fetchers={"kyc": verify_kyc, "credit": fetch_credit_score},
+    ttls={
+        "kyc": float(os.getenv("BUREAU_KYC_TTL", 24 * 3600)),
+        "credit": float(os.getenv("BUREAU_CREDIT_TTL", 6 * 3600))
+    },
+    negative_ttl=float(os.getenv("BUREAU_NEGATIVE_TTL", 300)),
+    maxsize=int(os.getenv("BUREAU_CACHE_MAXSIZE", 10000))
+)
@@ -28,18 +28,10 @@ def calculate_dti(existing_emi: float, new_emi: float, monthly_income: float) ->
 
 def calculate_interest_rate(credit_score: int) -> float:
     """
-    Calculate interest rate based on credit score
-    """
-    if credit_score >= 750:
-        return 10.5
-    elif credit_score >= 700:
-        return 12.0
-    elif credit_score >= 650:
-        return 13.5
-    elif credit_score >= 600:
-        return 15.0
-    else:
-        return 18.0
+    Calculate interest rate based on credit score (credit bands of the underwriting policy)
+    """
+    from utils.policy_engine import policy_engine
+    return policy_engine.policy.interest_rate(credit_score)
 
 def calculate_processing_fee(loan_amount: float) -> float:
     """
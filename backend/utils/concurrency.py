@@ -0,0 +1,191 @@
+# ============================================================================
+# CONCURRENCY GOVERNOR - Admission control + per-session ordering
+# Path: backend/utils/concurrency.py
+# ============================================================================
+
+from typing import Dict, Optional
+from collections import deque
+from contextlib import asynccontextmanager
+import asyncio
+import math
+import os
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class AdmissionRejected(Exception):
+    """Raised when the wait queue is full or the queue wait timed out"""
+    
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionTicket:
+    """
+    Held while a request runs - release() frees the global slot and the
+    session lock (safe to call more than once)
+    """
+    
+    def __init__(self, governor: "ConcurrencyGovernor", session_id: Optional[str], started: float):
+        self._governor = governor
+        self._session_id = session_id
+        self._started = started
+        self._released = False
+    
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._governor._release(self._session_id, self._started)
+
+class ConcurrencyGovernor:
+    """
+    - global cap on in-flight requests, with a bounded FIFO wait queue
+    - requests beyond the queue are rejected immediately (-> 429 + Retry-After)
+    - turns of the same session run strictly one after another
+    """
+    
+    def __init__(self, max_in_flight: int = 16, max_queue: int = 64, queue_timeout: float = 30.0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._in_flight = 0
+        self._waiting = 0
+        
+        # session_id -> [lock, holders + waiters]
+        self._session_locks: Dict[str, list] = {}
+        
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._waits_ms = deque(maxlen=1000)
+        self._total_wait_ms = 0.0
+        self._max_wait_ms = 0.0
+        self._avg_service_s = 2.0  # EWMA, seeded with a typical agent turn
+    
+    def _retry_after(self) -> int:
+        """Seconds until the current backlog should have drained"""
+        backlog = self._waiting + self._in_flight
+        return max(1, math.ceil(self._avg_service_s * backlog / self.max_in_flight))
+    
+    async def acquire(self, session_id: Optional[str] = None) -> AdmissionTicket:
+        """
+        Wait for this session's previous turn, then for a global slot
+        Raises AdmissionRejected instead of queueing without bound
+        """
+        entry = self._session_locks.get(session_id) if session_id else None
+        must_wait = self._slots.locked() or (entry is not None and entry[0].locked())
+        
+        if must_wait and self._waiting >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected("Server busy - request queue is full", self._retry_after())
+        
+        start = time.perf_counter()
+        deadline = start + self.queue_timeout
+        session_locked = False
+        
+        if must_wait:
+            self._waiting += 1
+        
+        try:
+            if session_id:
+                entry = self._session_locks.setdefault(session_id, [asyncio.Lock(), 0])
+                entry[1] += 1
+                await self._wait(entry[0], deadline)
+                session_locked = True
+            
+            await self._wait(self._slots, deadline)
+        
+        except BaseException as e:
+            # Timed out, or cancelled while waiting (client went away)
+            if session_locked:
+                self._unlock_session(session_id)
+            elif session_id:
+                self._drop_session_ref(session_id)
+            
+            if not isinstance(e, asyncio.TimeoutError):
+                raise
+            self.timeouts += 1
+            self.rejected += 1
+            raise AdmissionRejected("Server busy - timed out waiting in queue", self._retry_after())
+        finally:
+            if must_wait:
+                self._waiting -= 1
+        
+        wait_ms = (time.perf_counter() - start) * 1000
+        self._waits_ms.append(wait_ms)
+        self._total_wait_ms += wait_ms
+        self._max_wait_ms = max(self._max_wait_ms, wait_ms)
+        self._in_flight += 1
+        self.admitted += 1
+        
+        return AdmissionTicket(self, session_id, time.perf_counter())
+    
+    async def _wait(self, primitive, deadline: float):
+        """
+        Acquire a lock/semaphore before the queue deadline
+        Uncontended acquires complete without yielding, so the capacity is
+        claimed before any other request can see it as free
+        """
+        if not primitive.locked():
+            await primitive.acquire()
+            return
+        await asyncio.wait_for(primitive.acquire(), max(0.0, deadline - time.perf_counter()))
+    
+    @asynccontextmanager
+    async def admit(self, session_id: Optional[str] = None):
+        """`async with governor.admit(session_id):` around a request"""
+        ticket = await self.acquire(session_id)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+    
+    def _drop_session_ref(self, session_id: str):
+        entry = self._session_locks.get(session_id)
+        if entry is not None:
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self._session_locks[session_id]
+    
+    def _unlock_session(self, session_id: str):
+        entry = self._session_locks.get(session_id)
+        if entry is not None:
+            entry[0].release()
+        self._drop_session_ref(session_id)
+    
+    def _release(self, session_id: Optional[str], started: float):
+        elapsed = time.perf_counter() - started
+        self._avg_service_s = 0.9 * self._avg_service_s + 0.1 * elapsed
+        self._in_flight -= 1
+        self._slots.release()
+        if session_id:
+            self._unlock_session(session_id)
+    
+    def get_stats(self) -> Dict:
+        waits = sorted(self._waits_ms)
+        p95 = waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0
+        return {
+            "in_flight": self._in_flight,
+            "queued": self._waiting,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "active_session_locks": len(self._session_locks),
+            "avg_queue_wait_ms": round(self._total_wait_ms / self.admitted, 2) if self.admitted else 0.0,
+            "p95_queue_wait_ms": round(p95, 2),
+            "max_queue_wait_ms": round(self._max_wait_ms, 2),
+            "avg_service_seconds": round(self._avg_service_s, 2)
+        }
+
+# Global governor for chat endpoints
+chat_governor = ConcurrencyGovernor(
+    max_in_flight=int(os.getenv("CHAT_MAX_IN_FLIGHT", 16)),
+    max_queue=int(os.getenv("CHAT_MAX_QUEUE", 64)),
+    queue_timeout=float(os.getenv("CHAT_QUEUE_TIMEOUT", 30))
+)
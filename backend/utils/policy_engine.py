@@ -0,0 +1,357 @@
+# ============================================================================
+# POLICY ENGINE - Declarative underwriting policy, compiled to closures
+# Path: backend/utils/policy_engine.py
+# ============================================================================
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from bisect import bisect_right
+from datetime import datetime
+import json
+import os
+import string
+import time
+from dotenv import load_dotenv
+
+from utils.calculations import calculate_emi, calculate_dti
+
+load_dotenv()
+
+DEFAULT_POLICY_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "policies", "underwriting.json")
+
+# Applicant / loan values a rule can check
+RULE_FIELDS = (
+    "age",
+    "monthly_income",
+    "credit_score",
+    "loan_amount",
+    "tenure",
+    "existing_emi",
+    "interest_rate",
+    "monthly_emi",
+    "dti_ratio"
+)
+
+FIELD_INDEX = {field: index for index, field in enumerate(RULE_FIELDS)}
+
+WORDINGS = ("rules", "decision")
+
+class Rule:
+    """
+    One compiled rule: an inclusive [min, max] range check on a field,
+    the minimum optionally depending on the employment type. Keeps its
+    own failure / timing counters (reset whenever the policy is reloaded)
+    """
+    
+    __slots__ = (
+        "name", "field", "min", "max", "min_by_employment", "check", "messages",
+        "failures", "timed", "elapsed_ns", "batch_rows", "batch_ns"
+    )
+    
+    def __init__(self, spec: Dict):
+        self.name = spec["name"]
+        self.field = spec["field"]
+        self.min = spec.get("min")
+        self.max = spec.get("max")
+        self.min_by_employment = dict(spec.get("min_by_employment") or {})
+        
+        if self.field not in RULE_FIELDS:
+            raise ValueError(f"Rule {self.name}: unknown field '{self.field}'")
+        if self.min is None and self.max is None:
+            raise ValueError(f"Rule {self.name}: needs a min and/or max")
+        if self.min_by_employment and self.min is None:
+            raise ValueError(f"Rule {self.name}: min_by_employment needs a default min")
+        
+        self.check = self._compile_check()
+        self.messages = {wording: self._compile_message(spec["messages"][wording]) for wording in WORDINGS}
+        
+        self.failures = 0
+        self.timed = 0
+        self.elapsed_ns = 0
+        self.batch_rows = 0
+        self.batch_ns = 0
+    
+    def min_for(self, employment_type: Optional[str]):
+        return self.min_by_employment.get(employment_type, self.min)
+    
+    def _compile_check(self) -> Callable[[Any, Optional[str]], bool]:
+        low, high, low_by = self.min, self.max, self.min_by_employment
+        
+        if low_by:
+            if high is None:
+                return lambda value, employment_type: value >= low_by.get(employment_type, low)
+            return lambda value, employment_type: low_by.get(employment_type, low) <= value <= high
+        if low is not None and high is not None:
+            return lambda value, employment_type: low <= value <= high
+        if low is not None:
+            return lambda value, employment_type: value >= low
+        return lambda value, employment_type: value <= high
+    
+    def _compile_message(self, template: str) -> Callable[[Any, Optional[str]], str]:
+        parsed = list(string.Formatter().parse(template))
+        fields = {name for _, name, _, _ in parsed if name}
+        unknown = fields - {"min", "max", "value"}
+        if unknown:
+            raise ValueError(f"Rule {self.name}: unknown message placeholder(s) {sorted(unknown)}")
+        
+        def bake(low) -> str:
+            """The template with min/max filled in and {value} left as a positional field"""
+            parts = []
+            for literal, name, spec, conversion in parsed:
+                parts.append(literal.replace("{", "{{").replace("}", "}}"))
+                if name == "value":
+                    parts.append("{0" + (f"!{conversion}" if conversion else "") + (f":{spec}" if spec else "") + "}")
+                elif name:
+                    limit = low if name == "min" else self.max
+                    if conversion:
+                        limit = {"r": repr, "s": str, "a": ascii}[conversion](limit)
+                    parts.append(format(limit, spec).replace("{", "{{").replace("}", "}}"))
+            return "".join(parts)
+        
+        # One text per employment-specific minimum, formatted here as far as possible
+        default = bake(self.min)
+        by_employment = {employment_type: bake(low) for employment_type, low in self.min_by_employment.items()}
+        
+        if "value" not in fields:
+            default = default.format()
+            by_employment = {employment_type: text.format() for employment_type, text in by_employment.items()}
+            if not by_employment:
+                return lambda value, employment_type: default
+            return lambda value, employment_type: by_employment.get(employment_type, default)
+        
+        if not by_employment:
+            return lambda value, employment_type: default.format(value)
+        return lambda value, employment_type: by_employment.get(employment_type, default).format(value)
+    
+    def get_stats(self, evaluations: int) -> Dict:
+        evaluations += self.batch_rows
+        return {
+            "name": self.name,
+            "field": self.field,
+            "evaluations": evaluations,
+            "failures": self.failures,
+            "failure_rate": round(self.failures / evaluations, 4) if evaluations else 0.0,
+            "avg_ns": round(self.elapsed_ns / self.timed) if self.timed else 0,
+            "timed_evaluations": self.timed,
+            "batch_rows": self.batch_rows,
+            "batch_ms": round(self.batch_ns / 1e6, 3)
+        }
+
+class CompiledPolicy:
+    """
+    A policy definition (see policies/underwriting.json) turned into
+    lookup tables and closures once, so evaluation does no parsing or
+    per-call branching on the definition. Rule timing is sampled - one
+    evaluation in `timing_every` is timed rule by rule (0 = never)
+    """
+    
+    def __init__(self, definition: Dict, timing_every: int = 64):
+        self.timing_every = timing_every
+        self._evaluations = [0]  # shared by the evaluators
+        try:
+            self._compile(definition)
+        except (KeyError, TypeError, IndexError) as e:
+            raise ValueError(f"Invalid underwriting policy: {type(e).__name__} {e}") from e
+    
+    def _compile(self, definition: Dict):
+        self.version = str(definition["version"])
+        
+        # Eligibility
+        eligibility = definition["eligibility"]
+        self.income_multipliers = dict(eligibility["income_multipliers"])
+        self.default_income_multiplier = eligibility["default_income_multiplier"]
+        self.max_emi_to_income = eligibility["max_emi_to_income"]
+        self.emi_to_loan_factor = eligibility["emi_to_loan_factor"]
+        
+        # Credit bands - best first, the last one (no min_score) catches everything below
+        bands = definition["credit_bands"]
+        if not bands or "min_score" in bands[-1] or any("min_score" not in band for band in bands[:-1]):
+            raise ValueError("credit_bands: every band but the last needs a min_score")
+        scores = [band["min_score"] for band in bands[:-1]]
+        if scores != sorted(scores, reverse=True):
+            raise ValueError("credit_bands must be ordered from the highest min_score down")
+        
+        self.band_thresholds = tuple(reversed(scores))  # ascending, for bisect / searchsorted
+        self.band_rates = tuple(float(band["interest_rate"]) for band in bands)
+        self.band_categories = tuple(band["category"] for band in bands)
+        
+        # Rules, in reporting order
+        self.rules: List[Rule] = [Rule(spec) for spec in definition["rules"]]
+        names = [rule.name for rule in self.rules]
+        if len(set(names)) != len(names):
+            raise ValueError("Rule names must be unique")
+        
+        self._income_rule = self._required_rule("monthly_income")
+        self.min_credit_score = self._required_rule("credit_score").min
+        
+        # wording -> evaluate(age, monthly_income, employment_type, credit_score, loan_amount, existing_emi, tenure)
+        #   -> (pass/fail per rule, failure texts, interest rate, monthly EMI, DTI ratio)
+        self.evaluators: Dict[str, Callable] = {wording: self._compile_evaluator(wording) for wording in WORDINGS}
+    
+    def _required_rule(self, field: str) -> Rule:
+        """First rule on `field` - eligibility and the credit checks read their limits from it"""
+        rule = next((rule for rule in self.rules if rule.field == field), None)
+        if rule is None:
+            raise ValueError(f"Policy needs a rule on '{field}'")
+        if rule.min is None:
+            raise ValueError(f"Rule {rule.name}: needs a min")
+        return rule
+    
+    def band(self, credit_score) -> int:
+        """Index into the credit bands for a score"""
+        return len(self.band_thresholds) - bisect_right(self.band_thresholds, credit_score)
+    
+    def interest_rate(self, credit_score) -> float:
+        return self.band_rates[self.band(credit_score)]
+    
+    def score_category(self, credit_score) -> str:
+        return self.band_categories[self.band(credit_score)]
+    
+    def min_income(self, employment_type: Optional[str]):
+        return self._income_rule.min_for(employment_type)
+    
+    def max_eligible(self, monthly_income: float, employment_type: str, existing_emi: float = 0) -> Tuple[float, float, Any]:
+        """(eligible amount, affordable EMI, income multiplier)"""
+        multiplier = self.income_multipliers.get(employment_type, self.default_income_multiplier)
+        max_loan_amount = monthly_income * multiplier
+        
+        affordable_emi = (monthly_income * self.max_emi_to_income) - existing_emi
+        max_loan_from_emi = affordable_emi * self.emi_to_loan_factor if affordable_emi > 0 else 0
+        
+        return min(max_loan_amount, max_loan_from_emi), affordable_emi, multiplier
+    
+    def _compile_evaluator(self, wording: str) -> Callable:
+        """
+        Evaluation function for this policy: a loop over the compiled rule
+        checks, with everything the definition decides looked up once here
+        """
+        steps = tuple((rule, rule.name, FIELD_INDEX[rule.field], rule.check, rule.messages[wording]) for rule in self.rules)
+        rates, thresholds, top = self.band_rates, self.band_thresholds, len(self.band_thresholds)
+        evaluations, timing_every = self._evaluations, self.timing_every
+        perf_counter_ns = time.perf_counter_ns
+        
+        def evaluate(age, monthly_income, employment_type, credit_score, loan_amount, existing_emi, tenure):
+            evaluations[0] = count = evaluations[0] + 1
+            interest_rate = rates[top - bisect_right(thresholds, credit_score)]
+            monthly_emi = calculate_emi(loan_amount, interest_rate, tenure)
+            dti_ratio = calculate_dti(existing_emi, monthly_emi, monthly_income)
+            
+            # Same order as RULE_FIELDS
+            values = (age, monthly_income, credit_score, loan_amount, tenure, existing_emi, interest_rate, monthly_emi, dti_ratio)
+            timed = timing_every and count % timing_every == 0
+            
+            results = {}
+            failed = []
+            for rule, name, index, check, message in steps:
+                value = values[index]
+                if timed:
+                    started = perf_counter_ns()
+                    passed = check(value, employment_type)
+                    rule.elapsed_ns += perf_counter_ns() - started
+                    rule.timed += 1
+                else:
+                    passed = check(value, employment_type)
+                
+                results[name] = passed
+                if not passed:
+                    rule.failures += 1
+                    failed.append(message(value, employment_type))
+            
+            return results, failed, interest_rate, monthly_emi, dti_ratio
+        
+        return evaluate
+    
+    @property
+    def evaluations(self) -> int:
+        return self._evaluations[0]
+    
+    def get_stats(self) -> Dict:
+        return {
+            "version": self.version,
+            "evaluations": self.evaluations,
+            "timing_every": self.timing_every,
+            "rules": [rule.get_stats(self.evaluations) for rule in self.rules]
+        }
+
+class PolicyEngine:
+    """
+    Holds the active compiled policy. The file is re-checked at most every
+    `check_interval` seconds when the policy is used and recompiled when it
+    changed (hot reload, no restart). An invalid file never replaces the
+    active policy - the error is logged and reported in the stats.
+    """
+    
+    def __init__(self, path: str, check_interval: float = 5.0, timing_every: int = 64):
+        self.path = path
+        self.check_interval = check_interval
+        self.timing_every = timing_every
+        
+        self._policy: Optional[CompiledPolicy] = None
+        self._mtime: Optional[int] = None
+        self._next_check = 0.0
+        
+        self.loaded_at: Optional[datetime] = None
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_error: Optional[str] = None
+        
+        self.reload()
+        self._next_check = time.monotonic() + self.check_interval
+    
+    @property
+    def policy(self) -> CompiledPolicy:
+        if self.check_interval > 0 and time.monotonic() >= self._next_check:
+            self._check_for_changes()
+        return self._policy
+    
+    def _check_for_changes(self):
+        self._next_check = time.monotonic() + self.check_interval
+        try:
+            self.reload(force=False)
+        except (OSError, ValueError):
+            pass  # logged by reload(), the current policy stays active
+    
+    def reload(self, force: bool = True) -> bool:
+        """
+        Recompile the policy file (force=False: only if it changed since the
+        last attempt). Raises on an unreadable/invalid policy.
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if not force and mtime == self._mtime:
+                return False
+            self._mtime = mtime
+            
+            with open(self.path, encoding="utf-8") as f:
+                policy = CompiledPolicy(json.load(f), timing_every=self.timing_every)
+        except (OSError, ValueError) as e:
+            self.reload_errors += 1
+            self.last_error = str(e)
+            if self._policy is not None:
+                print(f"⚠️  Underwriting policy reload failed, keeping version {self._policy.version}: {e}")
+            raise
+        
+        if self._policy is not None:
+            self.reloads += 1
+        self._policy = policy
+        self.loaded_at = datetime.now()
+        self.last_error = None
+        print(f"✅ Underwriting policy {policy.version} loaded ({len(policy.rules)} rules)")
+        return True
+    
+    def get_stats(self) -> Dict:
+        return {
+            "path": self.path,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "last_error": self.last_error,
+            "check_interval_seconds": self.check_interval,
+            **self._policy.get_stats()
+        }
+
+# Global policy engine instance
+policy_engine = PolicyEngine(
+    path=os.getenv("UNDERWRITING_POLICY_PATH", DEFAULT_POLICY_PATH),
+    check_interval=float(os.getenv("POLICY_RELOAD_INTERVAL", 5)),
+    timing_every=int(os.getenv("POLICY_TIMING_SAMPLE_EVERY", 64)) if os.getenv("POLICY_RULE_TIMING", "on").lower() != "off" else 0
+)
@@ -0,0 +1,294 @@
+# ============================================================================
+# BULK PRE-QUALIFICATION - Partner lead files -> pre-approved offers (NDJSON)
+# Path: backend/utils/prequalification.py
+# ============================================================================
+
+from typing import IO, AsyncIterator, Dict, Iterator, Optional
+from itertools import islice
+import asyncio
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from dotenv import load_dotenv
+
+from mock_data.kyc_database import calculate_age
+from utils.bureau_cache import bureau_cache
+from utils.concurrency import ConcurrencyGovernor
+from utils.underwriting import eligibility, normalize_employment_type, underwriting_decision
+
+load_dotenv()
+
+STATUSES = ("pre_approved", "rejected", "kyc_failed", "not_found", "no_credit_history", "invalid", "error")
+
+# ============================================================================
+# INPUT
+# ============================================================================
+
+def detect_format(filename: Optional[str], requested: Optional[str] = None) -> str:
+    """'csv' or 'jsonl' from an explicit format or the file extension"""
+    fmt = (requested or os.path.splitext(filename or "")[1].lstrip(".")).lower()
+    if fmt == "csv":
+        return "csv"
+    if fmt in ("jsonl", "ndjson", "json"):
+        return "jsonl"
+    raise ValueError("Unsupported file format - upload .csv or .jsonl (or pass format=csv|jsonl)")
+
+def spool_upload(source: IO[bytes]) -> IO[bytes]:
+    """
+    Copy an upload into a temporary file we own (the framework closes the
+    upload when the handler returns, before a streamed response is read)
+    """
+    spool = tempfile.TemporaryFile()
+    source.seek(0)
+    shutil.copyfileobj(source, spool, 1024 * 1024)
+    spool.seek(0)
+    return spool
+
+def iter_rows(fileobj: IO[bytes], fmt: str) -> Iterator[Dict]:
+    """Rows of a binary file, parsed line by line"""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    
+    if fmt == "csv":
+        yield from csv.DictReader(text)
+        return
+    
+    for line in text:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            row = {"_error": f"Invalid JSON: {e.msg}"}
+        yield row if isinstance(row, dict) else {"_error": "Each line must be a JSON object"}
+
+def _number(value) -> Optional[float]:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    if isinstance(value, str):
+        value = value.replace(",", "").replace("₹", "").strip()
+    return float(value)
+
+def parse_lead(row: Dict) -> Dict:
+    """Normalize a lead row (column names are case-insensitive) - raises ValueError"""
+    if row.get("_error"):
+        raise ValueError(row["_error"])
+    
+    row = {str(key).strip().lower(): value for key, value in row.items() if key is not None}
+    
+    pan = str(row.get("pan") or row.get("pan_number") or "").strip().upper()
+    if not pan:
+        raise ValueError("Missing pan")
+    
+    monthly_income = _number(row.get("monthly_income") or row.get("income"))
+    if not monthly_income or monthly_income <= 0:
+        raise ValueError("Missing or invalid monthly_income")
+    
+    employment_type = normalize_employment_type(str(row.get("employment_type") or row.get("employment") or "").strip())
+    if not employment_type:
+        raise ValueError("Missing employment_type")
+    
+    tenure = _number(row["tenure"] if row.get("tenure") not in (None, "") else row.get("tenure_months"))
+    if tenure is not None and (tenure < 1 or tenure != int(tenure)):
+        raise ValueError("tenure must be a whole number of months (1 or more)")
+    
+    return {
+        "pan": pan,
+        "monthly_income": monthly_income,
+        "employment_type": employment_type,
+        "loan_amount": _number(row.get("loan_amount")),
+        "tenure": int(tenure) if tenure is not None else 36,
+        "existing_emi": _number(row.get("existing_emi")) or 0
+    }
+
+# ============================================================================
+# PIPELINE
+# ============================================================================
+
+class BulkPrequalifier:
+    """
+    Streams a lead file through KYC + credit lookups (shared bureau cache)
+    and the underwriting rules, with `concurrency` leads in flight.
+    Rows are read in small batches and all queues are bounded, so memory
+    stays flat however large the file is. Results are emitted as they
+    complete (not in file order - each carries its row number).
+    """
+    
+    def __init__(self, concurrency: int = 16, progress_every: int = 500, read_batch: int = 256):
+        self.concurrency = concurrency
+        self.progress_every = progress_every
+        self.read_batch = read_batch
+        
+        self.jobs = 0
+        self.rows_processed = 0
+        self.totals = {status: 0 for status in STATUSES}
+    
+    async def prequalify(self, row_number: int, row: Dict) -> Dict:
+        """Pre-qualification result for one lead row"""
+        try:
+            lead = parse_lead(row)
+        except (ValueError, TypeError) as e:
+            return {"type": "result", "row": row_number, "status": "invalid", "reason": str(e)}
+        
+        pan = lead["pan"]
+        result = {"type": "result", "row": row_number, "pan": pan}
+        
+        try:
+            kyc, credit = await asyncio.gather(
+                # Shares in-flight calls and cached results with chat, but
+                # never fills the shared cache with a partner's whole file
+                bureau_cache.verify_kyc(pan, store=False),
+                bureau_cache.fetch_credit_score(pan, store=False)
+            )
+        except Exception as e:
+            return {**result, "status": "error", "reason": f"Bureau lookup failed: {e}"}
+        
+        if not kyc:
+            return {**result, "status": "not_found", "reason": "PAN not found in records"}
+        if kyc.get("kyc_status") != "VERIFIED":
+            return {**result, "status": "kyc_failed", "reason": f"KYC status: {kyc.get('kyc_status')}"}
+        if not credit:
+            return {**result, "status": "no_credit_history", "reason": "No credit history found for this PAN"}
+        
+        age = calculate_age(kyc.get("date_of_birth"))
+        credit_score = credit.get("score")
+        result.update({"full_name": kyc.get("full_name"), "age": age, "credit_score": credit_score})
+        
+        # Requested amount, or the most the customer is eligible for
+        loan_amount = lead["loan_amount"]
+        if not loan_amount:
+            loan_amount = eligibility(lead["monthly_income"], lead["employment_type"], lead["existing_emi"])["max_eligible_amount"]
+            if loan_amount <= 0:
+                return {
+                    **result,
+                    "status": "rejected",
+                    "decision": {
+                        "approved": False,
+                        "decision": "rejected",
+                        "failed_rules": ["Existing EMIs leave no room for a new loan"],
+                        "rejection_reason": "Application does not meet eligibility criteria"
+                    }
+                }
+        
+        decision = underwriting_decision(
+            age,
+            lead["monthly_income"],
+            lead["employment_type"],
+            credit_score,
+            loan_amount,
+            lead["tenure"],
+            lead["existing_emi"]
+        )
+        status = "pre_approved" if decision["approved"] else "rejected"
+        return {**result, "status": status, "decision": decision}
+    
+    async def run(self, fileobj: IO[bytes], fmt: str) -> AsyncIterator[str]:
+        """NDJSON lines: result per row, progress every `progress_every` rows, then a summary"""
+        self.jobs += 1
+        started = time.perf_counter()
+        counts = {status: 0 for status in STATUSES}
+        processed = 0
+        
+        rows: asyncio.Queue = asyncio.Queue(maxsize=2 * self.concurrency)
+        results: asyncio.Queue = asyncio.Queue(maxsize=2 * self.concurrency)
+        
+        async def read():
+            reader = iter_rows(fileobj, fmt)
+            row_number = 0
+            try:
+                while True:
+                    # File reads happen off the event loop, a batch at a time
+                    batch = await asyncio.to_thread(lambda: list(islice(reader, self.read_batch)))
+                    if not batch:
+                        break
+                    for row in batch:
+                        row_number += 1
+                        await rows.put((row_number, row))
+            except Exception as e:
+                await results.put({"type": "error", "error": f"Could not read file: {e}"})
+            finally:
+                if not asyncio.current_task().cancelling():
+                    for _ in range(self.concurrency):
+                        await rows.put(None)
+        
+        async def work():
+            try:
+                while True:
+                    item = await rows.get()
+                    if item is None:
+                        break
+                    
+                    # One bad row must not take the worker (and the whole stream) down
+                    try:
+                        result = await self.prequalify(*item)
+                    except Exception as e:
+                        result = {"type": "result", "row": item[0], "status": "error", "reason": f"{type(e).__name__}: {e}"}
+                    await results.put(result)
+            finally:
+                # The consumer counts these - but not while run() is tearing the job down
+                if not asyncio.current_task().cancelling():
+                    await results.put(None)
+        
+        def progress(kind: str) -> Dict:
+            elapsed = time.perf_counter() - started
+            return {
+                "type": kind,
+                "processed": processed,
+                **counts,
+                "elapsed_seconds": round(elapsed, 2),
+                "rows_per_second": round(processed / elapsed, 1) if elapsed else 0.0
+            }
+        
+        tasks = [asyncio.create_task(read())] + [asyncio.create_task(work()) for _ in range(self.concurrency)]
+        workers_left = self.concurrency
+        
+        try:
+            while workers_left:
+                item = await results.get()
+                if item is None:
+                    workers_left -= 1
+                    continue
+                
+                if item["type"] == "result":
+                    processed += 1
+                    counts[item["status"]] += 1
+                    self.rows_processed += 1
+                    self.totals[item["status"]] += 1
+                
+                yield json.dumps(item, default=str) + "\n"
+                
+                if item["type"] == "result" and processed % self.progress_every == 0:
+                    yield json.dumps(progress("progress")) + "\n"
+            
+            yield json.dumps(progress("summary")) + "\n"
+            print(f"📦 Bulk pre-qualification: {processed} rows in {time.perf_counter() - started:.1f}s")
+        
+        finally:
+            # Client went away (or we are done) - stop reading and looking up
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            fileobj.close()
+    
+    def get_stats(self) -> Dict:
+        return {
+            "concurrency": self.concurrency,
+            "jobs": self.jobs,
+            "rows_processed": self.rows_processed,
+            "totals": dict(self.totals)
+        }
+
+# Global instances - one pipeline, and a cap on concurrently running jobs (no queueing)
+bulk_prequalifier = BulkPrequalifier(
+    concurrency=int(os.getenv("BULK_PREQUAL_CONCURRENCY", 16)),
+    progress_every=int(os.getenv("BULK_PREQUAL_PROGRESS_EVERY", 500))
+)
+
+bulk_governor = ConcurrencyGovernor(
+    max_in_flight=int(os.getenv("BULK_PREQUAL_MAX_JOBS", 2)),
+    max_queue=0
+)
@@ -0,0 +1,302 @@
+# ============================================================================
+# REDIS SESSION BACKEND - Sessions shared across worker processes
+# Path: backend/utils/redis_session_backend.py
+# ============================================================================
+
+from typing import Dict, List, Optional
+from datetime import datetime
+import json
+import time
+import uuid
+
+from utils.session_manager import SessionBackend
+
+# Per session (same hash tag, so one session's keys share a cluster slot):
+#   {prefix}{<id>}:meta      HASH  created_at, last_activity, summary_text, summary_covered
+#   {prefix}{<id>}:messages  LIST  JSON messages, appended with RPUSH
+#   {prefix}{<id>}:customer  HASH  field -> JSON value
+# Plus {prefix}active        ZSET  session_id -> last activity (unix time)
+#
+# Every write refreshes EXPIRE on all three keys, so Redis drops idle
+# sessions itself; the ZSET only backs counts and is pruned periodically.
+
+# KEYS: meta, messages, customer, active
+# ARGV: session_id, now_iso, now_ts, ttl_seconds
+TOUCH_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'last_activity', ARGV[2])
+for i = 1, 3 do
+    redis.call('EXPIRE', KEYS[i], ARGV[4])
+end
+redis.call('ZADD', KEYS[4], ARGV[3], ARGV[1])
+return 1
+"""
+
+# ARGV[5]: message JSON - returns new message count (0 if session is gone)
+APPEND_MESSAGE_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local count = redis.call('RPUSH', KEYS[2], ARGV[5])
+redis.call('HSET', KEYS[1], 'last_activity', ARGV[2])
+for i = 1, 3 do
+    redis.call('EXPIRE', KEYS[i], ARGV[4])
+end
+redis.call('ZADD', KEYS[4], ARGV[3], ARGV[1])
+return count
+"""
+
+# ARGV[5]: 'meta' or 'customer', ARGV[6..]: field/value pairs
+UPDATE_HASH_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local target = KEYS[1]
+if ARGV[5] == 'customer' then
+    target = KEYS[3]
+end
+for i = 6, #ARGV, 2 do
+    redis.call('HSET', target, ARGV[i], ARGV[i + 1])
+end
+redis.call('HSET', KEYS[1], 'last_activity', ARGV[2])
+for i = 1, 3 do
+    redis.call('EXPIRE', KEYS[i], ARGV[4])
+end
+redis.call('ZADD', KEYS[4], ARGV[3], ARGV[1])
+return 1
+"""
+
+# ARGV[2]: cutoff (unix time) - deletes the session only if it is still idle,
+# so a session touched after the index was scanned survives
+PRUNE_LUA = """
+local score = redis.call('ZSCORE', KEYS[4], ARGV[1])
+if score and tonumber(score) > tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('DEL', KEYS[1], KEYS[2], KEYS[3])
+redis.call('ZREM', KEYS[4], ARGV[1])
+return 1
+"""
+
+class RedisSessionBackend(SessionBackend):
+    """
+    Session storage in Redis (or anything speaking its protocol)
+    - message appends and field updates are single server-side scripts,
+      so concurrent workers never lose each other's writes
+    - idle sessions expire through Redis key TTLs
+    - capacity is bounded by the server's maxmemory policy
+    """
+    
+    backend_name = "redis"
+    
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        ttl_minutes: float = 30,
+        key_prefix: str = "loan:session:",
+        eviction_interval: float = 60,
+        client=None
+    ):
+        super().__init__(ttl_minutes=ttl_minutes, eviction_interval=eviction_interval)
+        
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:
+                raise ImportError("SESSION_BACKEND=redis requires the 'redis' package") from e
+            client = redis.from_url(url, decode_responses=True)
+        
+        self.url = url
+        self.client = client
+        self.key_prefix = key_prefix
+        self.ttl_seconds = max(1, int(self.cleanup_interval.total_seconds()))
+        self.active_key = f"{key_prefix}active"
+        
+        self._touch = client.register_script(TOUCH_LUA)
+        self._append = client.register_script(APPEND_MESSAGE_LUA)
+        self._update = client.register_script(UPDATE_HASH_LUA)
+        self._prune = client.register_script(PRUNE_LUA)
+        
+        self.expired_evictions = 0
+    
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+    
+    def _keys(self, session_id: str) -> List[str]:
+        base = f"{self.key_prefix}{{{session_id}}}"
+        return [f"{base}:meta", f"{base}:messages", f"{base}:customer", self.active_key]
+    
+    def _args(self, session_id: str, *extra) -> List:
+        now = datetime.now()
+        return [session_id, now.isoformat(), now.timestamp(), self.ttl_seconds, *extra]
+    
+    @staticmethod
+    def _decode_customer(raw: Dict[str, str]) -> Dict:
+        return {field: json.loads(value) for field, value in raw.items()}
+    
+    # ------------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------------
+    
+    async def create_session(self) -> str:
+        """Create new session"""
+        session_id = str(uuid.uuid4())
+        meta, messages, customer, active = self._keys(session_id)
+        now = datetime.now()
+        
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(meta, mapping={
+                "created_at": now.isoformat(),
+                "last_activity": now.isoformat(),
+                "summary_text": "",
+                "summary_covered": 0
+            })
+            pipe.expire(meta, self.ttl_seconds)
+            pipe.zadd(active, {session_id: now.timestamp()})
+            await pipe.execute()
+        
+        return session_id
+    
+    async def _touched_read(self, session_id: str, *reads) -> Optional[List]:
+        """
+        Refresh the session TTL and run read commands in one round trip
+        `reads` are (method_name, key_index, *args) on the pipeline
+        Returns the read results, or None if the session does not exist
+        """
+        keys = self._keys(session_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            await self._touch(keys=keys, args=self._args(session_id), client=pipe)
+            for method, key_index, *args in reads:
+                getattr(pipe, method)(keys[key_index], *args)
+            exists, *results = await pipe.execute()
+        return results if exists else None
+    
+    async def get_session(self, session_id: str) -> Optional[Dict]:
+        """Get session by ID"""
+        results = await self._touched_read(
+            session_id,
+            ("hgetall", 0),
+            ("lrange", 1, 0, -1),
+            ("hgetall", 2)
+        )
+        if results is None:
+            return None
+        
+        meta, messages, customer = results
+        return {
+            "messages": [json.loads(m) for m in messages],
+            "customer_data": self._decode_customer(customer),
+            "summary": {
+                "text": meta.get("summary_text", ""),
+                "covered": int(meta.get("summary_covered", 0))
+            },
+            "created_at": datetime.fromisoformat(meta["created_at"]),
+            "last_activity": datetime.fromisoformat(meta["last_activity"])
+        }
+    
+    async def touch_session(self, session_id: str) -> bool:
+        return bool(await self._touch(keys=self._keys(session_id), args=self._args(session_id)))
+    
+    async def add_message(self, session_id: str, role: str, content: str):
+        """Atomically append message to session history"""
+        message = json.dumps({
+            "role": role,
+            "content": content,
+            "timestamp": datetime.now().isoformat()
+        })
+        await self._append(keys=self._keys(session_id), args=self._args(session_id, message))
+    
+    async def get_messages(self, session_id: str, start: int = 0) -> List[Dict]:
+        """Get messages for session from index `start`"""
+        results = await self._touched_read(session_id, ("lrange", 1, start, -1))
+        return [json.loads(m) for m in results[0]] if results else []
+    
+    async def update_customer_data(self, session_id: str, data: Dict):
+        """Update customer data for session (per-field merge)"""
+        if not data:
+            return
+        pairs = []
+        for field, value in data.items():
+            pairs.extend([field, json.dumps(value, default=str)])
+        await self._update(keys=self._keys(session_id), args=self._args(session_id, "customer", *pairs))
+    
+    async def get_customer_data(self, session_id: str) -> Dict:
+        """Get customer data for session"""
+        results = await self._touched_read(session_id, ("hgetall", 2))
+        return self._decode_customer(results[0]) if results else {}
+    
+    async def get_history_summary(self, session_id: str) -> Dict:
+        """Rolling summary of older messages and how many messages it covers"""
+        results = await self._touched_read(session_id, ("hmget", 0, ["summary_text", "summary_covered"]))
+        if not results:
+            return {"text": "", "covered": 0}
+        text, covered = results[0]
+        return {"text": text or "", "covered": int(covered or 0)}
+    
+    async def set_history_summary(self, session_id: str, text: str, covered: int):
+        """Store rolling summary covering the first `covered` messages"""
+        await self._update(
+            keys=self._keys(session_id),
+            args=self._args(session_id, "meta", "summary_text", text, "summary_covered", covered)
+        )
+    
+    async def clear_session(self, session_id: str):
+        """Delete session from Redis"""
+        meta, messages, customer, active = self._keys(session_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(meta, messages, customer)
+            pipe.zrem(active, session_id)
+            await pipe.execute()
+        self._notify_removed(session_id)
+    
+    async def cleanup_inactive_sessions(self) -> int:
+        """
+        Drop index entries of sessions Redis has already expired
+        (also deletes any leftover keys, e.g. after a TTL change). Each
+        candidate is re-checked server-side, so sessions touched since
+        the scan are kept
+        """
+        cutoff = time.time() - self.ttl_seconds
+        expired = await self.client.zrangebyscore(self.active_key, "-inf", cutoff)
+        if not expired:
+            return 0
+        
+        async with self.client.pipeline(transaction=False) as pipe:
+            for session_id in expired:
+                await self._prune(keys=self._keys(session_id), args=[session_id, cutoff], client=pipe)
+            results = await pipe.execute()
+        
+        removed = 0
+        for session_id, pruned in zip(expired, results):
+            if pruned:
+                removed += 1
+                self._notify_removed(session_id)
+        
+        self.expired_evictions += removed
+        return removed
+    
+    async def get_active_sessions_count(self) -> int:
+        """Get count of sessions active within the TTL"""
+        return await self.client.zcount(self.active_key, time.time() - self.ttl_seconds, "+inf")
+    
+    async def close(self):
+        await self.client.aclose()
+    
+    async def get_stats(self) -> Dict:
+        stats = {
+            "backend": self.backend_name,
+            "active_sessions": await self.get_active_sessions_count(),
+            "ttl_minutes": self.ttl_seconds / 60,
+            "expired_evictions": self.expired_evictions
+        }
+        try:
+            memory = await self.client.info("memory")
+            stats["used_memory_bytes"] = memory.get("used_memory")
+            stats["maxmemory_bytes"] = memory.get("maxmemory")
+            stats["maxmemory_policy"] = memory.get("maxmemory_policy")
+        except Exception as e:
+            stats["info_error"] = str(e)
+        return stats
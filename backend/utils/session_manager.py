@@ -1,89 +1,483 @@
 # ============================================================================
-# IN-MEMORY SESSION MANAGER
+# SESSION MANAGER - Backend interface + in-memory backend
 # Path: backend/utils/session_manager.py
 # ============================================================================
 
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Union
+from collections import OrderedDict
 from datetime import datetime, timedelta
+import asyncio
+import json
+import os
+import sys
+import time
 import uuid
+import zlib
+from dotenv import load_dotenv
 
-class SessionManager:
+load_dotenv()
+
+# Rough per-object overheads (slotted records, list/dict slots, keys) for the byte estimate
+SESSION_OVERHEAD_BYTES = 400
+MESSAGE_OVERHEAD_BYTES = 120
+
+_MISSING = object()
+
+# ============================================================================
+# COMPACT RECORDS (in-memory backend)
+# ============================================================================
+
+class Message:
+    """
+    One chat message - role is interned, timestamp is unix time and cold
+    content may be zlib-compressed. Reads like the dict it replaces
+    (m["role"], m.get("content"), m.get("timestamp") as ISO string)
+    """
+    
+    __slots__ = ("role", "_content", "timestamp")
+    
+    def __init__(self, role: str, content: str, timestamp: float):
+        self.role = sys.intern(role)
+        self._content: Union[str, bytes] = content
+        self.timestamp = timestamp
+    
+    @property
+    def content(self) -> str:
+        content = self._content
+        return zlib.decompress(content).decode("utf-8") if isinstance(content, bytes) else content
+    
+    @property
+    def compressed(self) -> bool:
+        return isinstance(self._content, bytes)
+    
+    def payload_bytes(self) -> int:
+        content = self._content
+        return len(content) if isinstance(content, bytes) else len(content.encode("utf-8"))
+    
+    def compress(self, min_bytes: int) -> int:
+        """Compress content in place if it is large enough to pay off - returns bytes saved"""
+        if self.compressed:
+            return 0
+        raw = self._content.encode("utf-8")
+        if len(raw) < min_bytes:
+            return 0
+        packed = zlib.compress(raw)
+        if len(packed) >= len(raw):
+            return 0
+        self._content = packed
+        return len(raw) - len(packed)
+    
+    def get(self, key: str, default=None):
+        if key == "role":
+            return self.role
+        if key == "content":
+            return self.content
+        if key == "timestamp":
+            return datetime.fromtimestamp(self.timestamp).isoformat()
+        return default
+    
+    def __getitem__(self, key: str):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+    
+    def to_dict(self) -> Dict:
+        return {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat()
+        }
+
+class Session:
+    """One session's state - customer_data stays None until something is pinned"""
+    
+    __slots__ = ("messages", "customer_data", "summary_text", "summary_covered", "created_at", "last_activity")
+    
+    def __init__(self, now: float):
+        self.messages: List[Message] = []
+        self.customer_data: Optional[Dict] = None
+        self.summary_text = ""
+        self.summary_covered = 0
+        self.created_at = now
+        self.last_activity = now
+    
+    def to_dict(self) -> Dict:
+        """Same shape as the other backends' get_session()"""
+        return {
+            "messages": [message.to_dict() for message in self.messages],
+            "customer_data": dict(self.customer_data or {}),
+            "summary": {"text": self.summary_text, "covered": self.summary_covered},
+            "created_at": datetime.fromtimestamp(self.created_at),
+            "last_activity": datetime.fromtimestamp(self.last_activity)
+        }
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+class SessionBackend:
     """
-    In-memory storage for chat sessions
-    Stores conversation history and customer data
+    Storage interface for chat sessions (conversation history, customer
+    data, rolling summary). Every method is async so backends can live in
+    another process; the background task removes expired sessions.
+    
+    get_session() returns a dict with messages, customer_data, summary,
+    created_at and last_activity (datetimes)
     """
     
-    def __init__(self):
-        self.sessions: Dict[str, Dict] = {}
-        self.cleanup_interval = timedelta(minutes=30)
+    backend_name = "base"
+    
+    def __init__(self, ttl_minutes: float = 30, eviction_interval: float = 60):
+        self.cleanup_interval = timedelta(minutes=ttl_minutes)
+        self.eviction_interval = eviction_interval
+        self._task: Optional[asyncio.Task] = None
+        self._eviction_listeners: List[Callable[[str], None]] = []
+    
+    def add_eviction_listener(self, callback: Callable[[str], None]):
+        """
+        Call `callback(session_id)` whenever this worker removes a session
+        (cleared, expired or evicted) - for per-session caches kept elsewhere
+        """
+        self._eviction_listeners.append(callback)
+    
+    def _notify_removed(self, session_id: str):
+        for callback in self._eviction_listeners:
+            try:
+                callback(session_id)
+            except Exception as e:
+                print(f"⚠️  Session eviction listener error: {e}")
+    
+    def track_cache_bytes(self, session_id: str, delta: int):
+        """
+        Memory held for a session outside the backend (e.g. converted
+        history) - backends with a memory cap count it against the cap
+        """
+    
+    async def create_session(self) -> str:
+        raise NotImplementedError
+    
+    async def get_session(self, session_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+    
+    async def touch_session(self, session_id: str) -> bool:
+        """Refresh last activity - False if the session does not exist (or expired)"""
+        raise NotImplementedError
+    
+    async def add_message(self, session_id: str, role: str, content: str):
+        raise NotImplementedError
+    
+    async def get_messages(self, session_id: str, start: int = 0) -> List[Dict]:
+        """Messages from index `start`, oldest first - dicts, or records readable like them"""
+        raise NotImplementedError
+    
+    async def update_customer_data(self, session_id: str, data: Dict):
+        raise NotImplementedError
+    
+    async def get_customer_data(self, session_id: str) -> Dict:
+        raise NotImplementedError
+    
+    async def get_history_summary(self, session_id: str) -> Dict:
+        raise NotImplementedError
+    
+    async def set_history_summary(self, session_id: str, text: str, covered: int):
+        raise NotImplementedError
+    
+    async def clear_session(self, session_id: str):
+        raise NotImplementedError
+    
+    async def cleanup_inactive_sessions(self) -> int:
+        raise NotImplementedError
+    
+    async def get_active_sessions_count(self) -> int:
+        raise NotImplementedError
     
-    def create_session(self) -> str:
+    async def get_stats(self) -> Dict:
+        raise NotImplementedError
+    
+    async def close(self):
+        """Release backend resources (connections)"""
+    
+    # ------------------------------------------------------------------
+    # Background eviction
+    # ------------------------------------------------------------------
+    
+    async def start(self):
+        """Start background eviction task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            print(f"✅ Session eviction started ({self.backend_name} backend)")
+    
+    async def stop(self):
+        """Stop background eviction task and close the backend"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.close()
+    
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.eviction_interval)
+            try:
+                removed = await self.cleanup_inactive_sessions()
+                if removed:
+                    print(f"🧹 Evicted {removed} expired session(s)")
+            except Exception as e:
+                print(f"⚠️  Session eviction error: {e}")
+
+class InMemorySessionBackend(SessionBackend):
+    """
+    In-memory storage for chat sessions (single worker process)
+    Stores conversation history and customer data as compact slotted
+    records; messages older than the last `hot_messages` are compressed
+    (when compression is on and they are large enough to benefit).
+    Sessions are kept in least-recently-used order, which is also expiry
+    order (TTL counts from last activity), so expiry and LRU eviction
+    only ever look at the front of the OrderedDict
+    """
+    
+    backend_name = "memory"
+    
+    def __init__(
+        self,
+        ttl_minutes: float = 30,
+        max_sessions: int = 10000,
+        max_bytes: int = 256 * 1024 * 1024,
+        eviction_interval: float = 60,
+        compress_cold: bool = True,
+        hot_messages: int = 16,
+        compress_min_bytes: int = 256
+    ):
+        super().__init__(ttl_minutes=ttl_minutes, eviction_interval=eviction_interval)
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.ttl_seconds = self.cleanup_interval.total_seconds()
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        
+        self.compress_cold = compress_cold
+        self.hot_messages = hot_messages
+        self.compress_min_bytes = compress_min_bytes
+        
+        # Approximate memory per session and in total (cached bytes included)
+        self._sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+        self._cached: Dict[str, int] = {}
+        self._cache_bytes = 0
+        
+        self.expired_evictions = 0
+        self.lru_evictions = 0
+        self.compressed_messages = 0
+        self.compression_saved_bytes = 0
+    
+    # ------------------------------------------------------------------
+    # Size accounting
+    # ------------------------------------------------------------------
+    
+    def _set_size(self, session_id: str, size: int):
+        self._total_bytes += size - self._sizes.get(session_id, 0)
+        self._sizes[session_id] = size
+    
+    def _grow(self, session_id: str, delta: int):
+        self._set_size(session_id, self._sizes.get(session_id, 0) + delta)
+    
+    def _customer_data_bytes(self, session: Session) -> int:
+        return len(json.dumps(session.customer_data, default=str)) if session.customer_data else 0
+    
+    def _remove(self, session_id: str):
+        self.sessions.pop(session_id, None)
+        self._total_bytes -= self._sizes.pop(session_id, 0)
+        self._cache_bytes -= self._cached.pop(session_id, 0)
+        self._notify_removed(session_id)
+    
+    def track_cache_bytes(self, session_id: str, delta: int):
+        """Count cached per-session memory against max_bytes (evicting LRU sessions if over)"""
+        if session_id not in self.sessions or not delta:
+            return
+        self._cached[session_id] = self._cached.get(session_id, 0) + delta
+        self._cache_bytes += delta
+        self._grow(session_id, delta)
+        self._enforce_limits()
+    
+    def _enforce_limits(self):
+        """Evict least recently used sessions until under both caps (the newest always stays)"""
+        while len(self.sessions) > 1 and (len(self.sessions) > self.max_sessions or self._total_bytes > self.max_bytes):
+            session_id = next(iter(self.sessions))
+            self._remove(session_id)
+            self.lru_evictions += 1
+    
+    def _is_expired(self, session: Session, now: float) -> bool:
+        return now - session.last_activity > self.ttl_seconds
+    
+    def _compress_cold(self, session_id: str, session: Session):
+        """Compress the message that just left the hot tail"""
+        index = len(session.messages) - self.hot_messages - 1
+        if index < 0:
+            return
+        saved = session.messages[index].compress(self.compress_min_bytes)
+        if saved:
+            self._grow(session_id, -saved)
+            self.compressed_messages += 1
+            self.compression_saved_bytes += saved
+    
+    # ------------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------------
+    
+    async def create_session(self) -> str:
         """Create new session"""
         session_id = str(uuid.uuid4())
-        self.sessions[session_id] = {
-            "messages": [],
-            "customer_data": {},
-            "created_at": datetime.now(),
-            "last_activity": datetime.now()
-        }
+        self.sessions[session_id] = Session(time.time())
+        self._set_size(session_id, SESSION_OVERHEAD_BYTES)
+        self._enforce_limits()
         return session_id
     
-    def get_session(self, session_id: str) -> Optional[Dict]:
-        """Get session by ID"""
+    def _get(self, session_id: str) -> Optional[Session]:
         session = self.sessions.get(session_id)
         if session:
-            # Update last activity
-            session["last_activity"] = datetime.now()
+            now = time.time()
+            if self._is_expired(session, now):
+                self._remove(session_id)
+                self.expired_evictions += 1
+                return None
+            
+            # Update last activity (and LRU position)
+            session.last_activity = now
+            self.sessions.move_to_end(session_id)
         return session
     
-    def add_message(self, session_id: str, role: str, content: str):
+    async def get_session(self, session_id: str) -> Optional[Dict]:
+        """Get session by ID (materialized as plain dicts)"""
+        session = self._get(session_id)
+        return session.to_dict() if session else None
+    
+    async def touch_session(self, session_id: str) -> bool:
+        return self._get(session_id) is not None
+    
+    async def add_message(self, session_id: str, role: str, content: str):
         """Add message to session history"""
-        session = self.get_session(session_id)
+        session = self._get(session_id)
         if session:
-            session["messages"].append({
-                "role": role,
-                "content": content,
-                "timestamp": datetime.now().isoformat()
-            })
-    
-    def get_messages(self, session_id: str) -> List[Dict]:
-        """Get all messages for session"""
-        session = self.get_session(session_id)
-        return session["messages"] if session else []
-    
-    def update_customer_data(self, session_id: str, data: Dict):
+            message = Message(role, content, time.time())
+            session.messages.append(message)
+            self._grow(session_id, MESSAGE_OVERHEAD_BYTES + message.payload_bytes())
+            if self.compress_cold:
+                self._compress_cold(session_id, session)
+            self._enforce_limits()
+    
+    async def get_messages(self, session_id: str, start: int = 0) -> List[Message]:
+        """Get messages for session from index `start`"""
+        session = self._get(session_id)
+        return session.messages[start:] if session else []
+    
+    async def update_customer_data(self, session_id: str, data: Dict):
         """Update customer data for session"""
-        session = self.get_session(session_id)
-        if session:
-            session["customer_data"].update(data)
+        session = self._get(session_id)
+        if session and data:
+            before = self._customer_data_bytes(session)
+            if session.customer_data is None:
+                session.customer_data = {}
+            session.customer_data.update(data)
+            self._grow(session_id, self._customer_data_bytes(session) - before)
     
-    def get_customer_data(self, session_id: str) -> Dict:
+    async def get_customer_data(self, session_id: str) -> Dict:
         """Get customer data for session"""
-        session = self.get_session(session_id)
-        return session["customer_data"] if session else {}
+        session = self._get(session_id)
+        return (session.customer_data or {}) if session else {}
+    
+    async def get_history_summary(self, session_id: str) -> Dict:
+        """Rolling summary of older messages and how many messages it covers"""
+        session = self._get(session_id)
+        if not session:
+            return {"text": "", "covered": 0}
+        return {"text": session.summary_text, "covered": session.summary_covered}
+    
+    async def set_history_summary(self, session_id: str, text: str, covered: int):
+        """Store rolling summary covering the first `covered` messages"""
+        session = self._get(session_id)
+        if session:
+            self._grow(session_id, len(text.encode("utf-8")) - len(session.summary_text.encode("utf-8")))
+            session.summary_text = text
+            session.summary_covered = covered
     
-    def clear_session(self, session_id: str):
+    async def clear_session(self, session_id: str):
         """Clear session from memory"""
         if session_id in self.sessions:
-            del self.sessions[session_id]
+            self._remove(session_id)
     
-    def cleanup_inactive_sessions(self):
-        """Remove sessions inactive for > 30 minutes"""
-        now = datetime.now()
-        to_remove = []
+    async def cleanup_inactive_sessions(self) -> int:
+        """Remove sessions inactive for > 30 minutes (oldest first, stops at first live one)"""
+        now = time.time()
+        removed = 0
         
-        for session_id, session in self.sessions.items():
-            if now - session["last_activity"] > self.cleanup_interval:
-                to_remove.append(session_id)
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if not self._is_expired(session, now):
+                break
+            self._remove(session_id)
+            removed += 1
         
-        for session_id in to_remove:
-            del self.sessions[session_id]
-        
-        return len(to_remove)
+        self.expired_evictions += removed
+        return removed
     
-    def get_active_sessions_count(self) -> int:
+    async def get_active_sessions_count(self) -> int:
         """Get count of active sessions"""
         return len(self.sessions)
+    
+    async def get_stats(self) -> Dict:
+        return {
+            "backend": self.backend_name,
+            "active_sessions": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "approx_bytes": self._total_bytes,
+            "approx_mb": round(self._total_bytes / (1024 * 1024), 2),
+            "max_bytes": self.max_bytes,
+            "cache_bytes": self._cache_bytes,
+            "ttl_minutes": self.ttl_seconds / 60,
+            "expired_evictions": self.expired_evictions,
+            "lru_evictions": self.lru_evictions,
+            "compress_cold": self.compress_cold,
+            "compressed_messages": self.compressed_messages,
+            "compression_saved_bytes": self.compression_saved_bytes
+        }
+
+# Backwards-compatible name for the in-memory backend
+SessionManager = InMemorySessionBackend
+
+def create_session_manager() -> SessionBackend:
+    """
+    Session backend selected by SESSION_BACKEND:
+    - memory (default): sessions live in this worker process
+    - redis: sessions shared by all workers via REDIS_URL
+    """
+    backend = os.getenv("SESSION_BACKEND", "memory").strip().lower()
+    ttl_minutes = float(os.getenv("SESSION_TTL_MINUTES", 30))
+    eviction_interval = float(os.getenv("SESSION_EVICTION_INTERVAL", 60))
+    
+    if backend == "redis":
+        from utils.redis_session_backend import RedisSessionBackend
+        return RedisSessionBackend(
+            url=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            ttl_minutes=ttl_minutes,
+            key_prefix=os.getenv("SESSION_REDIS_PREFIX", "loan:session:"),
+            eviction_interval=eviction_interval
+        )
+    
+    if backend != "memory":
+        print(f"⚠️  Unknown SESSION_BACKEND '{backend}', using in-memory sessions")
+    
+    return InMemorySessionBackend(
+        ttl_minutes=ttl_minutes,
+        max_sessions=int(os.getenv("SESSION_MAX_SESSIONS", 10000)),
+        max_bytes=int(os.getenv("SESSION_MAX_BYTES", 256 * 1024 * 1024)),
+        eviction_interval=eviction_interval,
+        compress_cold=os.getenv("SESSION_COMPRESS_COLD", "on").lower() != "off",
+        hot_messages=int(os.getenv("SESSION_HOT_MESSAGES", 16)),
+        compress_min_bytes=int(os.getenv("SESSION_COMPRESS_MIN_BYTES", 256))
+    )
 
 # Global session manager instance
-session_manager = SessionManager()
\ No newline at end of file
+session_manager = create_session_manager()
@@ -0,0 +1,16 @@
+# ============================================================================
+# TOKEN ESTIMATION - Cheap token counts without a tokenizer
+# Path: backend/utils/tokens.py
+# ============================================================================
+
+# Llama / GPT-style BPE tokenizers average roughly 4 characters per token
+# for English text, which is close enough for budgeting and chunk sizing.
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate token count of text
+    """
+    if not text:
+        return 0
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
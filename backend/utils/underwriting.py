@@ -0,0 +1,96 @@
+# ============================================================================
+# UNDERWRITING RULES - Scalar eligibility / business rules / decision
+# (thresholds, bands and failure texts come from the policy engine)
+# Path: backend/utils/underwriting.py
+# ============================================================================
+
+from typing import Dict, Optional
+
+from utils.calculations import calculate_processing_fee
+from utils.policy_engine import policy_engine
+
+EMPLOYMENT_ALIASES = {
+    "salaried": "Salaried",
+    "self employed": "Self-Employed",
+    "selfemployed": "Self-Employed",
+    "business owner": "Business Owner",
+    "business": "Business Owner",
+}
+
+def normalize_employment_type(value: Optional[str]) -> Optional[str]:
+    """'salaried' / 'self employed' / ... -> canonical name (unknown values unchanged)"""
+    if not value:
+        return value
+    key = " ".join(value.replace("-", " ").replace("_", " ").lower().split())
+    return EMPLOYMENT_ALIASES.get(key, value.strip())
+
+def eligibility(monthly_income: float, employment_type: str, existing_emi: float = 0) -> Dict:
+    """Maximum eligible loan amount from income and existing obligations"""
+    eligible_amount, affordable_emi, multiplier = policy_engine.policy.max_eligible(
+        monthly_income, employment_type, existing_emi
+    )
+    
+    return {
+        "max_eligible_amount": int(eligible_amount),
+        "monthly_income": monthly_income,
+        "employment_type": employment_type,
+        "existing_emi": existing_emi,
+        "affordable_new_emi": max(0, affordable_emi),
+        "calculation_basis": f"Based on {multiplier}x monthly income"
+    }
+
+def business_rules(
+    age: int,
+    monthly_income: float,
+    employment_type: str,
+    credit_score: int,
+    loan_amount: float,
+    existing_emi: float,
+    tenure: int
+) -> Dict:
+    """Rule-by-rule validation of an application"""
+    rules, failed_rules, interest_rate, monthly_emi, dti_ratio = policy_engine.policy.evaluators["rules"](
+        age, monthly_income, employment_type, credit_score, loan_amount, existing_emi, tenure
+    )
+    
+    return {
+        "all_rules_passed": len(failed_rules) == 0,
+        "rules_evaluation": rules,
+        "failed_rules": failed_rules,
+        "dti_ratio": dti_ratio,
+        "estimated_emi": monthly_emi,
+        "interest_rate": interest_rate
+    }
+
+def underwriting_decision(
+    age: int,
+    monthly_income: float,
+    employment_type: str,
+    credit_score: int,
+    loan_amount: float,
+    tenure: int = 36,
+    existing_emi: float = 0
+) -> Dict:
+    """Final approve/reject decision (all fields present)"""
+    _, failed_rules, interest_rate, monthly_emi, dti_ratio = policy_engine.policy.evaluators["decision"](
+        age, monthly_income, employment_type, credit_score, loan_amount, existing_emi, tenure
+    )
+    
+    if failed_rules:
+        return {
+            "approved": False,
+            "decision": "rejected",
+            "failed_rules": failed_rules,
+            "rejection_reason": "Application does not meet eligibility criteria"
+        }
+    
+    return {
+        "approved": True,
+        "decision": "approved",
+        "sanctioned_amount": loan_amount,
+        "interest_rate": interest_rate,
+        "monthly_emi": monthly_emi,
+        "tenure": tenure,
+        "dti_ratio": dti_ratio,
+        "processing_fee": calculate_processing_fee(loan_amount)
+    }
@@ -0,0 +1,232 @@
+# ============================================================================
+# VECTORIZED UNDERWRITING - Columnar (NumPy) version of the underwriting rules
+# Path: backend/utils/vectorized_underwriting.py
+# ============================================================================
+
+from typing import Dict, List, Optional
+import time
+import numpy as np
+
+from utils.calculations import calculate_processing_fee
+from utils.policy_engine import CompiledPolicy, policy_engine
+
+def round2(values: np.ndarray) -> np.ndarray:
+    """Elementwise round(x, 2), bit-identical to Python's round"""
+    scaled = values * 100
+    rounded = np.rint(scaled) / 100
+    
+    # Python rounds the exact decimal value, rint the (already rounded) product -
+    # they can only disagree right next to a half cent, so redo those in Python
+    distance = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5)
+    for i in np.flatnonzero(distance < 1e-6 + np.abs(scaled) * 1e-15):
+        rounded[i] = round(float(values[i]), 2)
+    
+    return rounded
+
+def rate_band(policy: CompiledPolicy, credit_score: np.ndarray) -> np.ndarray:
+    """Index into the policy's credit bands per score (CompiledPolicy.band over arrays)"""
+    return len(policy.band_thresholds) - np.searchsorted(np.array(policy.band_thresholds), credit_score, side="right")
+
+def batch_emi(policy: CompiledPolicy, principal: np.ndarray, band: np.ndarray, tenure: np.ndarray) -> np.ndarray:
+    """
+    calculate_emi over arrays (rate given as a credit band index).
+    (1 + r)^n is computed once per distinct (band, tenure) pair with Python's
+    pow - NumPy's SIMD power can differ in the last bit, which would change
+    rounded EMIs and DTI ratios
+    """
+    monthly_rates = np.array([rate / 12 / 100 for rate in policy.band_rates])
+    
+    # One key per (band, tenure) pair, looked up in small per-pair tables
+    width = int(tenure.max()) + 1 if tenure.size else 1
+    keys = band * width + tenure
+    present = np.flatnonzero(np.bincount(keys, minlength=len(monthly_rates) * width))
+    
+    growth = np.ones(len(monthly_rates) * width)
+    for key in present:
+        growth[key] = pow(1 + monthly_rates[key // width], int(key % width))
+    
+    monthly_rate = monthly_rates[band]
+    factor = growth[keys]
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        emi = round2((principal * monthly_rate * factor) / (factor - 1))
+        flat = principal / tenure
+    
+    return np.where(monthly_rate == 0, flat, emi)
+
+def batch_dti(existing_emi: np.ndarray, new_emi: np.ndarray, monthly_income: np.ndarray) -> np.ndarray:
+    """calculate_dti over arrays"""
+    return round2(((existing_emi + new_emi) / monthly_income) * 100)
+
+def _months(tenure: np.ndarray) -> np.ndarray:
+    months = tenure.astype(np.int64)
+    if not np.array_equal(months, tenure):
+        raise ValueError("tenure must be a whole number of months")
+    if months.size and months.min() <= 0:
+        raise ValueError("tenure must be positive")
+    return months
+
+class BatchDecisions:
+    """
+    Underwriting outcome for a batch of applicants, one array per column.
+    `failures` holds the failed-rule bits per row (bit i = policy.rules[i],
+    0 = approved); the text forms (failed_rules / decisions) are built on
+    demand and match the scalar underwriting_decision / business_rules
+    output exactly
+    """
+    
+    def __init__(
+        self,
+        policy: CompiledPolicy,
+        columns: Dict[str, np.ndarray],
+        employment_type: np.ndarray,
+        failures: np.ndarray
+    ):
+        self.policy = policy
+        self.columns = columns
+        self.employment_type = employment_type
+        self.failures = failures
+    
+    def __len__(self) -> int:
+        return len(self.failures)
+    
+    @property
+    def interest_rate(self) -> np.ndarray:
+        return self.columns["interest_rate"]
+    
+    @property
+    def monthly_emi(self) -> np.ndarray:
+        return self.columns["monthly_emi"]
+    
+    @property
+    def dti_ratio(self) -> np.ndarray:
+        return self.columns["dti_ratio"]
+    
+    @property
+    def approved(self) -> np.ndarray:
+        return self.failures == 0
+    
+    def reasons(self, row: int, wording: str = "decision") -> List[str]:
+        """Failed-rule texts for one row ("rules" = business_rules wording)"""
+        failed = int(self.failures[row])
+        employment_type = str(self.employment_type[row])
+        reasons = []
+        for bit, rule in enumerate(self.policy.rules):
+            if failed & (1 << bit):
+                value = self.columns[rule.field][row].item()
+                reasons.append(rule.messages[wording](value, employment_type))
+        return reasons
+    
+    def failed_rules(self, wording: str = "decision") -> List[List[str]]:
+        """Failed-rule texts for every row (empty for approved rows)"""
+        failed_rules: List[List[str]] = [[] for _ in range(len(self))]
+        for row in np.flatnonzero(self.failures):
+            failed_rules[row] = self.reasons(row, wording)
+        return failed_rules
+    
+    def decisions(self) -> List[Dict]:
+        """Per-row dicts, as underwriting_decision returns them"""
+        loan_amounts = self.columns["loan_amount"].tolist()
+        tenures = self.columns["tenure"].tolist()
+        interest_rates = self.columns["interest_rate"].tolist()
+        monthly_emis = self.columns["monthly_emi"].tolist()
+        dti_ratios = self.columns["dti_ratio"].tolist()
+        decisions = []
+        
+        for row in range(len(self)):
+            if self.failures[row]:
+                decisions.append({
+                    "approved": False,
+                    "decision": "rejected",
+                    "failed_rules": self.reasons(row),
+                    "rejection_reason": "Application does not meet eligibility criteria"
+                })
+                continue
+            
+            decisions.append({
+                "approved": True,
+                "decision": "approved",
+                "sanctioned_amount": loan_amounts[row],
+                "interest_rate": interest_rates[row],
+                "monthly_emi": monthly_emis[row],
+                "tenure": tenures[row],
+                "dti_ratio": dti_ratios[row],
+                "processing_fee": calculate_processing_fee(loan_amounts[row])
+            })
+        
+        return decisions
+    
+    def get_stats(self) -> Dict:
+        return {
+            "rows": len(self),
+            "approved": int(np.count_nonzero(self.approved)),
+            "failed": {
+                rule.name: int(np.count_nonzero(self.failures & (1 << bit)))
+                for bit, rule in enumerate(self.policy.rules)
+            }
+        }
+
+def evaluate_batch(
+    age,
+    monthly_income,
+    employment_type,
+    credit_score,
+    loan_amount,
+    tenure=36,
+    existing_emi=0,
+    policy: Optional[CompiledPolicy] = None
+) -> BatchDecisions:
+    """
+    underwriting_decision over columns (array-likes of equal length, or
+    scalars broadcast to every row), under the active policy unless one
+    is given. Monthly income must be positive and tenure a whole number
+    of months, as for the scalar rules
+    """
+    policy = policy or policy_engine.policy
+    if len(policy.rules) > 32:
+        raise ValueError("Batch evaluation supports at most 32 rules")
+    
+    age, monthly_income, employment_type, credit_score, loan_amount, tenure, existing_emi = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(column)) for column in (
+            age, monthly_income, employment_type, credit_score, loan_amount, tenure, existing_emi
+        ))
+    )
+    months = _months(tenure)
+    
+    band = rate_band(policy, credit_score)
+    monthly_emi = batch_emi(policy, loan_amount, band, months)
+    
+    columns = {
+        "age": age,
+        "monthly_income": monthly_income,
+        "credit_score": credit_score,
+        "loan_amount": loan_amount,
+        "tenure": tenure,
+        "existing_emi": existing_emi,
+        "interest_rate": np.array(policy.band_rates)[band],
+        "monthly_emi": monthly_emi,
+        "dti_ratio": batch_dti(existing_emi, monthly_emi, monthly_income)
+    }
+    
+    failures = np.zeros(age.shape, dtype=np.uint32)
+    for bit, rule in enumerate(policy.rules):
+        started = time.perf_counter_ns()
+        
+        value = columns[rule.field]
+        failed = np.zeros(age.shape, dtype=bool)
+        if rule.min_by_employment:
+            low = np.full(age.shape, rule.min, dtype=np.result_type(rule.min, *rule.min_by_employment.values()))
+            for name, amount in rule.min_by_employment.items():
+                low[employment_type == name] = amount
+            failed |= value < low
+        elif rule.min is not None:
+            failed |= value < rule.min
+        if rule.max is not None:
+            failed |= value > rule.max
+        failures[failed] |= np.uint32(1 << bit)
+        
+        rule.batch_ns += time.perf_counter_ns() - started
+        rule.batch_rows += len(failed)
+        rule.failures += int(np.count_nonzero(failed))
+    
+    return BatchDecisions(policy, columns, employment_type, failures)